@@ -0,0 +1,163 @@
+# app/management/commands/apply_tasks.py
+
+import glob
+import json
+import logging
+import os
+import time
+from typing import Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply a task list to CSV/XLSX files offline and write the results to an "
+        "output directory, e.g.\n"
+        "  python manage.py apply_tasks 'exports/*.csv' --tasks rules.json --out-dir redacted --jobs 4\n"
+        "Tasks are the JSON the API takes ([{\"target\", \"regex\", \"replacement\"}, ...]); "
+        "--describe generates them from a description instead (the LLM, and so "
+        "OPENAI_API_KEY, is only needed if the local rule parser cannot answer)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("inputs", nargs="+", help="input files or glob patterns (** recurses)")
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument("--tasks", help="JSON file: a task array, or {\"tasks\": [...]}")
+        source.add_argument("--describe", help="natural-language description to generate tasks from")
+        parser.add_argument("--out-dir", required=True, help="directory for the processed files")
+        parser.add_argument(
+            "--jobs", type=int, default=1, help="files processed in parallel (0 = one per CPU)"
+        )
+        parser.add_argument("--overwrite", action="store_true", help="replace existing output files")
+        parser.add_argument("--summary", help="also write the per-file summary as JSON to this path")
+
+    def handle(self, *args, **options):
+        from app.services.batch_service import SUPPORTED_EXTENSIONS, process_path
+        from app.utils.async_runtime import iter_in_processes
+
+        if options["jobs"] < 0:
+            raise CommandError("--jobs must be 0 (one per CPU) or more")
+        paths = self._resolve_inputs(options["inputs"], SUPPORTED_EXTENSIONS)
+        tasks = (
+            self._load_tasks(options["tasks"])
+            if options["tasks"]
+            else self._generate_tasks(options["describe"], paths[0])
+        )
+
+        # Outputs mirror the inputs' layout below their common directory
+        base = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+        out_dir = options["out_dir"]
+        jobs = []
+        for path in paths:
+            name = os.path.relpath(os.path.abspath(path), base)
+            output_path = os.path.join(out_dir, name)
+            if os.path.exists(output_path) and not options["overwrite"]:
+                raise CommandError(f"{output_path} exists (use --overwrite to replace it)")
+            jobs.append((path, name, output_path, tasks))
+
+        workers = options["jobs"] or os.cpu_count() or 1
+        self.stdout.write(
+            f"Applying {len(tasks)} tasks to {len(paths)} files with {workers} job(s)"
+        )
+
+        start = time.perf_counter()
+        summaries: List[Dict] = [{}] * len(jobs)
+        for position, summary in iter_in_processes(process_path, jobs, workers=workers):
+            summaries[position] = summary
+            self._report(summary)
+        elapsed = time.perf_counter() - start
+
+        failed = [s for s in summaries if s["status"] != "ok"]
+        rows = sum(s.get("rows", 0) for s in summaries)
+        mb = sum(s["bytes_in"] for s in summaries) / (1024 * 1024)
+        self.stdout.write(
+            f"Done: {len(summaries) - len(failed)} ok, {len(failed)} failed, "
+            f"{sum(s.get('replacements', 0) for s in summaries)} replacements, "
+            f"{rows} rows in {elapsed:.2f} s ({rows / elapsed:,.0f} rows/s, {mb / elapsed:.2f} MB/s)"
+        )
+
+        if options["summary"]:
+            with open(options["summary"], "w") as f:
+                json.dump(
+                    {"tasks": tasks, "files": summaries, "elapsed_s": round(elapsed, 3)},
+                    f,
+                    indent=2,
+                    default=str,
+                )
+        if failed:
+            raise CommandError(f"{len(failed)} of {len(summaries)} files failed")
+
+    def _resolve_inputs(self, patterns: List[str], extensions) -> List[str]:
+        paths = []
+        for pattern in patterns:
+            if glob.has_magic(pattern):
+                matches = sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+            elif os.path.isfile(pattern):
+                matches = [pattern]
+            else:
+                raise CommandError(f"Not a file: {pattern}")
+            if not matches:
+                raise CommandError(f"No files match {pattern}")
+            for path in matches:
+                if not path.lower().endswith(extensions):
+                    self.stderr.write(f"Skipping {path}: not a .csv or .xlsx file")
+                    continue
+                if path not in paths:
+                    paths.append(path)
+        if not paths:
+            raise CommandError("No .csv or .xlsx files to process")
+        return paths
+
+    def _load_tasks(self, path: str) -> List[Dict]:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise CommandError(f"Cannot read tasks from {path}: {e}")
+        tasks = data.get("tasks") if isinstance(data, dict) else data
+        if not tasks or not isinstance(tasks, list) or not all(isinstance(t, dict) for t in tasks):
+            raise CommandError(f"{path} has no task array")
+        return tasks
+
+    def _generate_tasks(self, description: str, sample_path: str) -> List[Dict]:
+        """
+        Generate tasks from the description against the columns of the
+        first input (the rule parser first, then the LLM).
+        """
+        from app.services.generate_service import generate_tasks
+        from app.utils.file_parser import parse_file
+
+        try:
+            with open(sample_path, "rb") as f:
+                columns = [str(c) for c in parse_file(f).columns]
+        except ValueError as e:
+            raise CommandError(f"Cannot read the columns of {sample_path}: {e}")
+        try:
+            tasks = generate_tasks(description, columns)
+        except EnvironmentError as e:
+            raise CommandError(
+                f"{e} (needed to generate tasks for this description; pass --tasks instead)"
+            )
+        if not tasks:
+            raise CommandError("No tasks could be generated for that description")
+        self.stdout.write(f"Generated tasks: {json.dumps(tasks)}")
+        return tasks
+
+    def _report(self, summary: Dict):
+        name = summary["file"]
+        if summary["status"] != "ok":
+            self.stderr.write(f"FAILED {name}: {summary.get('error')}")
+            return
+        seconds = summary["elapsed_ms"] / 1000 or 1e-9
+        line = (
+            f"ok {name}: {summary['rows']} rows, {summary['replacements']} replacements "
+            f"in {seconds:.2f} s ({summary['rows'] / seconds:,.0f} rows/s, "
+            f"{summary['bytes_in'] / (1024 * 1024) / seconds:.2f} MB/s)"
+        )
+        failures = len(summary.get("failed_tasks") or [])
+        if failures:
+            line += f", {failures} failed tasks"
+        self.stdout.write(line)
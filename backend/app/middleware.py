@@ -0,0 +1,135 @@
+# app/middleware.py
+
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+
+from app.utils.stage_timer import server_timing_header, stage, start_timer, stop_timer
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """
+    Times sampled requests stage by stage.
+
+    A fraction SERVER_TIMING_SAMPLE_RATE of requests get a StageTimer that
+    views and services fill through `stage(...)`. The stages and the total
+    are sent back in a Server-Timing header and logged as one JSON line.
+    Must come before SessionMiddleware so the session save is included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = float(getattr(settings, "SERVER_TIMING_SAMPLE_RATE", 0.0))
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        timer, token = start_timer()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_timer(token)
+        self._report(request, response, timer, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        timer, token = start_timer()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_timer(token)
+        self._report(request, response, timer, time.perf_counter() - start)
+        return response
+
+    def _sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def _report(self, request, response, timer, elapsed: float):
+        stages = timer.as_milliseconds()
+        stages["total"] = round(elapsed * 1000, 2)
+        response["Server-Timing"] = server_timing_header(stages)
+        logger.info(
+            "Request timing: "
+            + json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "stages": stages,
+                }
+            )
+        )
+
+
+class MetricsMiddleware:
+    """
+    Records the latency of every request, labelled by route, method and status.
+    Routes (e.g. "api/jobs/<str:job_id>") keep label cardinality bounded.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+        return response
+
+    def _record(self, request, response, elapsed: float):
+        match = getattr(request, "resolver_match", None)
+        metrics.observe(
+            "http_request_duration_seconds",
+            elapsed,
+            labels={
+                "route": match.route if match else "unmatched",
+                "method": request.method,
+                "status": str(response.status_code),
+            },
+        )
+
+
+class TimedSessionMiddleware(SessionMiddleware):
+    """
+    SessionMiddleware that reports the session save as the "session_save" stage.
+    """
+
+    def process_response(self, request, response):
+        with stage("session_save"):
+            return super().process_response(request, response)
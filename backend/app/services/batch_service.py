@@ -0,0 +1,307 @@
+# app/services/batch_service.py
+
+import json
+import logging
+import os
+import posixpath
+import time
+import zipfile
+import zlib
+from io import BytesIO
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from django.conf import settings
+
+from app.services.replace_service import apply_tasks, failed_tasks, group_tasks_by_sheet
+from app.utils.async_runtime import iter_in_processes
+from app.utils.dataset_store import MB
+from app.utils.file_parser import parse_sheets
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# File types a batch processes (anything else in a zip archive is skipped)
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx")
+
+# Name of the per-file summary, the last entry of the output archive
+SUMMARY_NAME = "summary.json"
+
+
+class BatchError(ValueError):
+    """
+    The batch as a whole is invalid (no input, too many files, bad archive).
+    """
+
+
+class BatchTooLargeError(BatchError):
+    """
+    An input file, or the batch in total, is over its size limit.
+    """
+
+
+def collect_inputs(files) -> Tuple[List[Tuple[str, bytes]], List[Dict]]:
+    """
+    Read the uploaded files into [(name, content)], expanding .zip archives
+    into the CSV and XLSX files they contain (named by their path in the
+    archive). Returns the inputs and a summary entry per skipped member,
+    including archive members that cannot be decompressed (e.g. a bad CRC).
+
+    Raises:
+        BatchError: If there is no input or more than BATCH_MAX_FILES inputs.
+        BatchTooLargeError: If an input is over MAX_UPLOAD_BYTES, or all of
+        them over BATCH_MAX_BYTES.
+    """
+    inputs, skipped = [], []
+    total = 0
+
+    def add(name: str, size: int, read):
+        nonlocal total
+        if size > settings.MAX_UPLOAD_BYTES:
+            raise BatchTooLargeError(
+                f"File too large: {name} is {size / MB:.1f} MB "
+                f"(limit {settings.MAX_UPLOAD_BYTES / MB:.1f} MB)."
+            )
+        if total + size > settings.BATCH_MAX_BYTES:
+            raise BatchTooLargeError(
+                f"Batch too large (limit {settings.BATCH_MAX_BYTES / MB:.1f} MB)."
+            )
+        if len(inputs) >= settings.BATCH_MAX_FILES:
+            raise BatchError(f"Too many files (limit {settings.BATCH_MAX_FILES}).")
+        try:
+            content = read()
+        except (zipfile.BadZipFile, zlib.error, EOFError) as e:
+            # A damaged archive member costs that file, not the whole batch
+            logger.warning(f"Batch archive member unreadable: {name}: {e}")
+            skipped.append(_summary(name, "skipped", error=f"Corrupt file in the archive: {e}"))
+            return
+        total += size
+        inputs.append((name, content))
+
+    for file in files:
+        if file.name.lower().endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(file)
+            except zipfile.BadZipFile:
+                raise BatchError(f"Not a valid zip archive: {file.name}")
+            with archive:
+                for member in archive.infolist():
+                    name = member.filename
+                    if member.is_dir() or _is_metadata(name):
+                        continue
+                    if not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                        skipped.append(_summary(name, "skipped", error="Unsupported file format."))
+                        continue
+                    # Sizes come from the archive's directory, so a zip bomb is
+                    # rejected before anything is decompressed
+                    add(name, member.file_size, lambda: archive.read(member))
+        elif file.name.lower().endswith(SUPPORTED_EXTENSIONS):
+            add(file.name, file.size, file.read)
+        else:
+            skipped.append(_summary(file.name, "skipped", error="Unsupported file format."))
+
+    if not inputs:
+        raise BatchError("No .csv or .xlsx files to process.")
+    return inputs, skipped
+
+
+def process_file(job: Tuple[str, bytes, List[Dict]]) -> Dict:
+    """
+    Apply the tasks to one input file and write it back in its format (every
+    sheet of a workbook). Returns {"summary": {...}, "data": bytes or None}.
+    Runs in a worker of the process pool; failures are reported in the summary.
+    """
+    name, content, tasks = job
+    start = time.perf_counter()
+    try:
+        buffer = BytesIO(content)
+        buffer.name = name
+        sheets, fields = _apply_to_sheets(buffer, tasks)
+        out = BytesIO()
+        _write_sheets(name, sheets, out)
+        return {
+            "summary": _summary(
+                name, "ok", **fields, elapsed_ms=(time.perf_counter() - start) * 1000
+            ),
+            "data": out.getvalue(),
+        }
+    except Exception as e:
+        return {"summary": _failure(name, e, start), "data": None}
+
+
+def process_path(job: Tuple[str, str, str, List[Dict]]) -> Dict:
+    """
+    process_file for a file on disk: job is (input path, name, output path,
+    tasks). The worker reads the input from its file and writes the output
+    straight to disk, so file contents never pass through the caller, and a
+    CSV file is never held as bytes next to its DataFrame (a workbook is
+    read whole: its zip directory is at the end). Returns the file's
+    summary, with "bytes_in" and the output path; an unreadable input or
+    unwritable output is that file's failure.
+    """
+    path, name, output_path, tasks = job
+    start = time.perf_counter()
+    tmp_path = f"{output_path}.tmp"
+    bytes_in = 0
+    try:
+        bytes_in = os.path.getsize(path)
+        with open(path, "rb") as f:
+            sheets, fields = _apply_to_sheets(f, tasks)
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        _write_sheets(name, sheets, tmp_path)
+        os.replace(tmp_path, output_path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return {**_failure(name, e, start), "bytes_in": bytes_in}
+    return _summary(
+        name,
+        "ok",
+        **fields,
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+        bytes_in=bytes_in,
+        output=output_path,
+    )
+
+
+def stream_batch(
+    inputs: List[Tuple[str, bytes]], tasks: List[Dict], skipped: Optional[List[Dict]] = None
+) -> Iterator[bytes]:
+    """
+    Process the inputs in the process pool and yield a zip archive as it is
+    written: each output file is added as soon as it is ready (in completion
+    order, under its input name), then SUMMARY_NAME with one entry per input
+    in input order and the batch totals.
+    """
+    start = time.perf_counter()
+    out = _ZipStream()
+    summaries: List[Optional[Dict]] = [None] * len(inputs)
+    used_names = set()
+
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        jobs = [(name, content, tasks) for name, content in inputs]
+        for position, result in iter_in_processes(process_file, jobs):
+            summary = result["summary"]
+            metrics.inc("batch_files_total", labels={"status": summary["status"]})
+            if result["data"] is not None:
+                output = _unique_name(_safe_name(summary["file"]), used_names)
+                summary["output"] = output
+                # XLSX files are zip archives already: store them as they are
+                compression = zipfile.ZIP_STORED if output.lower().endswith(".xlsx") else None
+                archive.writestr(output, result["data"], compress_type=compression)
+            summaries[position] = summary
+            logger.info(
+                f"Batch file {summary['file']}: {summary['status']} "
+                f"in {summary['elapsed_ms']:.0f} ms"
+            )
+            yield out.drain()
+
+        files = summaries + list(skipped or [])
+        archive.writestr(
+            SUMMARY_NAME,
+            json.dumps(
+                {
+                    "files": files,
+                    "total_files": len(inputs),
+                    "succeeded": sum(1 for s in summaries if s["status"] == "ok"),
+                    "failed": sum(1 for s in summaries if s["status"] == "error"),
+                    "skipped": len(skipped or []),
+                    "total_replacements": sum(s.get("replacements", 0) for s in summaries),
+                    "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+                },
+                indent=2,
+                default=str,
+            ),
+        )
+    yield out.drain()
+
+
+def _apply_to_sheets(file, tasks: List[Dict]) -> Tuple[Dict[str, pd.DataFrame], Dict]:
+    # Returns the edited sheets and the summary fields of an input file
+    sheets = parse_sheets(file)
+    # Tasks for a sheet this file does not have are left out, not an error:
+    # a batch mixes files of different shapes
+    unmatched = []
+    groups = group_tasks_by_sheet(tasks, list(sheets), unknown=unmatched)
+
+    replacements, reports = 0, []
+    for sheet, sheet_tasks in groups.items():
+        sheet_reports = []
+        replacements += len(apply_tasks(sheets[sheet], sheet_tasks, reports=sheet_reports))
+        if len(sheets) > 1:
+            sheet_reports = [{**report, "sheet": sheet} for report in sheet_reports]
+        reports += sheet_reports
+
+    return sheets, {
+        "sheets": len(sheets),
+        "rows": sum(len(df) for df in sheets.values()),
+        "replacements": replacements,
+        "failed_tasks": failed_tasks(reports),
+        "unmatched_tasks": unmatched,
+    }
+
+
+def _write_sheets(name: str, sheets: Dict[str, pd.DataFrame], out):
+    # `out` is a path or a binary buffer; `name` decides the format
+    if name.lower().endswith(".xlsx"):
+        with pd.ExcelWriter(out, engine="openpyxl") as writer:
+            for sheet, df in sheets.items():
+                df.to_excel(writer, sheet_name=sheet, index=False)
+    else:
+        next(iter(sheets.values())).to_csv(out, index=False, encoding="utf-8")
+
+
+def _failure(name: str, error: Exception, start: float) -> Dict:
+    logger.warning(f"Batch file failed: {name}: {error}")
+    return _summary(
+        name, "error", error=str(error), elapsed_ms=(time.perf_counter() - start) * 1000
+    )
+
+
+def _summary(name: str, status: str, **fields) -> Dict:
+    summary = {"file": name, "status": status, "output": None, **fields}
+    if "elapsed_ms" in summary:
+        summary["elapsed_ms"] = round(summary["elapsed_ms"], 1)
+    return summary
+
+
+def _is_metadata(name: str) -> bool:
+    # Files archivers add next to the real content (macOS resource forks, dotfiles)
+    return name.startswith("__MACOSX/") or posixpath.basename(name).startswith(".")
+
+
+def _safe_name(name: str) -> str:
+    # Keep the folder structure of a zip input, without absolute or parent paths
+    parts = [p for p in name.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+    return "/".join(parts) or "file"
+
+
+def _unique_name(name: str, used: set) -> str:
+    stem, ext = posixpath.splitext(name)
+    candidate, n = name, 2
+    while candidate.lower() in used:
+        candidate, n = f"{stem} ({n}){ext}", n + 1
+    used.add(candidate.lower())
+    return candidate
+
+
+class _ZipStream:
+    """
+    Write-only sink for zipfile: collects what is written until drained.
+    Without tell()/seek(), zipfile writes streaming entries (data descriptors).
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
@@ -3,6 +3,15 @@
 import pandas as pd
 import logging
 from io import StringIO, BytesIO
+from typing import Optional
+
+from app.utils.dataset_store import (
+    ORIGINAL,
+    WORKING,
+    load_dataset,
+    session_sheets,
+    sheet_dataset,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -10,8 +19,13 @@ logger = logging.getLogger(__name__)
 def get_file_from_session(session) -> tuple[bytes, str, str]:
     """
     Returns: (file_bytes, mime_type, filename)
+
+    An XLSX download holds every sheet of the upload; a CSV download holds
+    the first sheet.
     """
-    if "working_df" not in session and "uploaded_data" not in session:
+    sheets = session_sheets(session)
+    df = _load_sheet(session, sheets[0])
+    if df is None:
         raise ValueError(
             "No processed data found in session. Please upload and process a file first."
         )
@@ -19,20 +33,17 @@ def get_file_from_session(session) -> tuple[bytes, str, str]:
     try:
         format = session.get("uploaded_format", "csv").lower()
 
-        if "working_df" in session:
-            df = pd.read_json(session["working_df"])
-            if "Joined Date" in df.columns:
-                df["Joined Date"] = pd.to_datetime(
-                    df["Joined Date"], errors="coerce"
-                ).dt.strftime("%Y-%m-%d")
-        else:
-            df = pd.read_json(session["uploaded_data"])
-
         if format == "xlsx":
             buffer = BytesIO()
-            df.to_excel(buffer, index=False, engine="openpyxl")
+            with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+                for position, sheet in enumerate(sheets):
+                    frame = df if position == 0 else _load_sheet(session, sheet)
+                    if frame is None:
+                        logger.warning(f"Sheet '{sheet}' is missing from the dataset store")
+                        continue
+                    frame.to_excel(writer, sheet_name=sheet or "Sheet1", index=False)
             buffer.seek(0)
-            logger.info("XLSX file generated for download")
+            logger.info(f"XLSX file generated for download ({len(sheets)} sheet(s))")
             return (
                 buffer.read(),
                 "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
@@ -52,3 +63,22 @@ def get_file_from_session(session) -> tuple[bytes, str, str]:
     except Exception as e:
         logger.exception("Failed to generate file from session data")
         raise ValueError("Failed to prepare data for download.")
+
+
+def _load_sheet(session, sheet: str) -> Optional[pd.DataFrame]:
+    """
+    The working DataFrame of a sheet, or its original upload before any edit.
+    """
+    df_json = load_dataset(session, sheet_dataset(session, WORKING, sheet or None))
+    if df_json is not None:
+        df = pd.read_json(StringIO(df_json))
+        if "Joined Date" in df.columns:
+            df["Joined Date"] = pd.to_datetime(
+                df["Joined Date"], errors="coerce"
+            ).dt.strftime("%Y-%m-%d")
+        return df
+
+    original_json = load_dataset(session, sheet_dataset(session, ORIGINAL, sheet or None))
+    if original_json is None:
+        return None
+    return pd.read_json(StringIO(original_json))
@@ -1,13 +1,94 @@
 # app/services/generate_service.py
 
 import logging
+import threading
 from typing import List, Dict
-from app.utils.openai_client import get_regex_tasks_from_nl
+from django.conf import settings
+from app.utils.openai_client import get_regex_tasks_from_nl, aget_regex_tasks_from_nl
+from app.utils.async_runtime import run_cpu
+from app.utils.stage_timer import stage
+from app.utils import metrics
+from app.utils.instruction_parser import parse_instruction
 from app.utils.task_expander import expand_task
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# How often the local rule parser answered without calling the LLM
+_fast_path_lock = threading.Lock()
+_fast_path_counters = {"requests": 0, "hits": 0}
+
+
+def get_fast_path_stats() -> Dict:
+    """
+    Return how many generations were answered by the rule parser.
+    """
+    with _fast_path_lock:
+        requests = _fast_path_counters["requests"]
+        hits = _fast_path_counters["hits"]
+    return {
+        "requests": requests,
+        "hits": hits,
+        "hit_rate": round(hits / requests, 4) if requests else 0.0,
+    }
+
+
+def _parse_locally(description: str, columns: List[str]):
+    """
+    Try the rule parser and record whether it answered.
+    """
+    tasks = None
+    if getattr(settings, "RULE_PARSER_ENABLED", True):
+        tasks = parse_instruction(description, columns)
+
+    with _fast_path_lock:
+        _fast_path_counters["requests"] += 1
+        if tasks is not None:
+            _fast_path_counters["hits"] += 1
+    metrics.inc("rule_parser_requests_total")
+    if tasks is not None:
+        metrics.inc("rule_parser_hits_total")
+
+    if tasks is not None:
+        logger.info(f"Rule parser produced {len(tasks)} tasks without calling the LLM.")
+    return tasks
+
+
+def generate_tasks(description: str, columns: List[str]) -> List[Dict[str, str]]:
+    """
+    Turn a description into high-level tasks, trying the local rule parser
+    before falling back to the LLM.
+    """
+    with stage("rule_parser"):
+        tasks = _parse_locally(description, columns)
+    if tasks is not None:
+        return tasks
+    with stage("llm"):
+        return get_regex_tasks_from_nl(description, columns)
+
+
+async def agenerate_tasks(description: str, columns: List[str]) -> List[Dict[str, str]]:
+    """
+    Async version of generate_tasks.
+    """
+    with stage("rule_parser"):
+        tasks = _parse_locally(description, columns)
+    if tasks is not None:
+        return tasks
+    with stage("llm"):
+        return await aget_regex_tasks_from_nl(description, columns)
+
+
+def _expand_all(df: pd.DataFrame, tasks: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    expanded_tasks = []
+    with stage("expand_task"):
+        for task in tasks:
+            expanded = expand_task(df, task)
+            expanded_tasks.extend(expanded)
+
+    logger.info(f"Expanded to {len(expanded_tasks)} cell-level tasks.")
+    return expanded_tasks
+
 
 def generate_and_expand_tasks(
     description: str, df: pd.DataFrame
@@ -17,16 +98,28 @@ def generate_and_expand_tasks(
     """
     try:
         logger.debug(f"Generating regex tasks from description: {description}")
-        tasks = get_regex_tasks_from_nl(description)
+        tasks = generate_tasks(description, list(df.columns))
         logger.info(f"Generated {len(tasks)} high-level tasks.")
+        return _expand_all(df, tasks)
+
+    except Exception as e:
+        logger.error("Regex task generation or expansion failed.")
+        logger.exception(e)
+        raise ValueError("Regex task generation or expansion failed.")
 
-        expanded_tasks = []
-        for task in tasks:
-            expanded = expand_task(df, task)
-            expanded_tasks.extend(expanded)
 
-        logger.info(f"Expanded to {len(expanded_tasks)} cell-level tasks.")
-        return expanded_tasks
+async def agenerate_and_expand_tasks(
+    description: str, df: pd.DataFrame
+) -> List[Dict[str, str]]:
+    """
+    Async version of generate_and_expand_tasks: awaits the LLM without
+    holding a worker thread and expands the tasks in the CPU executor.
+    """
+    try:
+        logger.debug(f"Generating regex tasks from description: {description}")
+        tasks = await agenerate_tasks(description, list(df.columns))
+        logger.info(f"Generated {len(tasks)} high-level tasks.")
+        return await run_cpu(_expand_all, df, tasks)
 
     except Exception as e:
         logger.error("Regex task generation or expansion failed.")
@@ -0,0 +1,167 @@
+# app/services/job_service.py
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import AsyncIterator, Callable, Coroutine, Dict, Optional
+
+from django.conf import settings
+
+from app.utils.async_runtime import submit
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Job states, in order
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+
+class Job:
+    """
+    A unit of background work owned by one session.
+
+    Jobs run on the shared background loop and live in process memory, so
+    status and event requests must reach the process that created the job.
+    """
+
+    def __init__(self, kind: str, owner: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner = owner
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.updated = self.created
+        self.version = 0
+        self._changed = Future()
+        self._lock = threading.Lock()
+
+    def update(self, status: str, result=None, error: Optional[str] = None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.updated = time.time()
+            self.version += 1
+            changed, self._changed = self._changed, Future()
+        changed.set_result(None)
+        _publish_depth()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            data = {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "created": self.created,
+                "updated": self.updated,
+            }
+            if self.status == SUCCEEDED:
+                data["result"] = self.result
+            if self.status == FAILED:
+                data["error"] = self.error
+            return data
+
+    def changed(self) -> Future:
+        with self._lock:
+            return self._changed
+
+
+_jobs: Dict[str, Job] = {}
+_jobs_lock = threading.Lock()
+
+
+def start_job(kind: str, owner: Optional[str], work: Callable[[], Coroutine]) -> Job:
+    """
+    Create a job and run `work()` on the background loop.
+
+    The coroutine's return value becomes the job result. A ValueError
+    message is reported to the client as is; other exceptions are logged
+    and reported generically, as the views do.
+    """
+    _prune()
+    job = Job(kind, owner)
+    with _jobs_lock:
+        _jobs[job.id] = job
+    _publish_depth()
+    submit(_run(job, work))
+    logger.info(f"Started {kind} job {job.id}")
+    return job
+
+
+async def _run(job: Job, work: Callable[[], Coroutine]):
+    job.update(RUNNING)
+    try:
+        result = await work()
+    except ValueError as e:
+        logger.warning(f"Job {job.id} failed: {e}")
+        job.update(FAILED, error=str(e))
+    except Exception:
+        logger.exception(f"Unexpected error in job {job.id}")
+        job.update(FAILED, error="Unexpected error occurred.")
+    else:
+        logger.info(f"Job {job.id} succeeded")
+        job.update(SUCCEEDED, result=result)
+
+
+def get_job(job_id: str, owner: Optional[str]) -> Optional[Job]:
+    """
+    Return the job if it exists and belongs to `owner` (a session key).
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None or job.owner != owner:
+        return None
+    return job
+
+
+async def job_events(job: Job, heartbeat: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+    """
+    Yield a snapshot now and after every state change, until the job finishes.
+    Yields None when `heartbeat` seconds pass without a change.
+    Usable from any event loop.
+    """
+    while True:
+        changed = job.changed()
+        snapshot = job.snapshot()
+        yield snapshot
+        if snapshot["status"] in FINISHED_STATES:
+            return
+        while not changed.done():
+            try:
+                # shield: a timeout must not cancel the future other listeners share
+                await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(changed)), heartbeat
+                )
+            except asyncio.TimeoutError:
+                yield None
+
+
+def _publish_depth():
+    with _jobs_lock:
+        depth = sum(job.status not in FINISHED_STATES for job in _jobs.values())
+    metrics.set_gauge("jobs_in_progress", depth)
+
+
+def _prune():
+    """
+    Drop finished jobs older than JOB_TTL seconds.
+    """
+    ttl = float(getattr(settings, "JOB_TTL", 3600))
+    cutoff = time.time() - ttl
+    with _jobs_lock:
+        expired = [
+            job_id
+            for job_id, job in _jobs.items()
+            if job.status in FINISHED_STATES and job.updated < cutoff
+        ]
+        for job_id in expired:
+            del _jobs[job_id]
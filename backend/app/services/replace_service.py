@@ -1,164 +1,473 @@
 # app/services/replace_service.py
 
 import pandas as pd
+import numpy as np
+import copy
+import json
 import logging
-from typing import List, Dict
+import random
+import time
+from io import StringIO
+from typing import List, Dict, Optional, Set, Tuple
+from django.conf import settings
 
 from app.utils.replace_all_matches import replace_all_matches
 from app.utils.replace_column_matches import replace_column_matches
 from app.utils.replace_row_matches import replace_row_matches
 from app.utils.replace_cell_match import replace_cell_match
 
-# Notice: use the utils path for task_expander, since that's where it lives
-from app.utils.task_expander import expand_task
+from app.utils.task_expander import split_sheet
+from app.utils.trigram_index import TrigramIndex
+from app.utils.column_profiler import profile_dataframe
+from app.utils.async_runtime import map_in_processes
+from app.utils.stage_timer import stage
+from app.utils import metrics
+from app.services.task_planner import (
+    plan_task,
+    resolve_column,
+    skippable_columns,
+    task_pattern,
+)
+from app.utils.redos_guard import TaskTimeoutError, run_with_time_budget
 
 logger = logging.getLogger(__name__)
 
 
-def apply_tasks(df: pd.DataFrame, tasks: List[Dict[str, str]]) -> List[Dict]:
+def apply_tasks(
+    df: pd.DataFrame,
+    tasks: List[Dict[str, str]],
+    index: Optional[TrigramIndex] = None,
+    profile: Optional[Dict[str, Dict]] = None,
+    reports: Optional[List[Dict]] = None,
+) -> List[Dict]:
     """
     Apply a list of regex tasks to the given DataFrame.
 
-    1. First, expand each high-level task into simple tasks (cell/row/column/all).
+    1. First, plan each high-level task (task_planner.plan_task): expand it
+       into simple tasks (cell/row/column/all), pick the engine, isolation
+       and the columns evaluated once per distinct value.
     2. Run the appropriate replace function for each simple task.
     3. Return all replacement records.
+
+    If a trigram index is given, "all" and "column" tasks only scan candidate
+    rows, and the index is updated with every cell that gets rewritten.
+    If a column profile is given, tasks using a built-in pattern class skip
+    columns the profile shows cannot match (until a task modifies them).
+
+    Tasks whose pattern is flagged by the ReDoS analysis (or every task, per
+    REGEX_TASK_ISOLATION) run in a worker process that is killed once
+    REGEX_TASK_TIME_BUDGET seconds have passed; a timed-out task leaves the
+    DataFrame untouched. The analysis is static and only recognizes nested
+    quantifiers and overlapping repeated alternations: with the default
+    "risky", other slow patterns (e.g. polynomial "\\d*\\d*\\d*x") run
+    in this process without a budget. Set REGEX_TASK_ISOLATION="always" to
+    bound every task.
+
+    One execution report per task is logged and, if `reports` is given,
+    appended to it:
+      {
+        "task": {...}, "status": "ok" | "partial" | "error" | "timed_out",
+        "engine": "re", "simple_tasks": 3, "cells_scanned": 120, "matches": 7,
+        "replacements": 5, "elapsed_ms": 1.84,
+        "detail": "...",                          # when the whole task failed
+        "errors": [{"task": {...}, "detail": "..."}]  # simple tasks that failed
+      }
+    Use failed_tasks(reports) for the list of tasks that could not be applied.
     """
     all_replacements = []
+    modified_columns = set()
+    budget = float(getattr(settings, "REGEX_TASK_TIME_BUDGET", 5.0))
 
     for task in tasks:
-        # Expand higher-level task (e.g., "column Email rows 0 to 2") into simple tasks
+        task_start = time.perf_counter()
+        report = {
+            "task": task,
+            "status": "ok",
+            "engine": None,
+            "simple_tasks": 0,
+            "cells_scanned": 0,
+            "matches": 0,
+            "replacements": 0,
+            "elapsed_ms": 0.0,
+            "errors": [],
+        }
+        all_replacements += _run_task(
+            df, task, report, index, profile, modified_columns, budget
+        )
+        report["elapsed_ms"] = round((time.perf_counter() - task_start) * 1000, 2)
+        _publish_report(report)
+        if reports is not None:
+            reports.append(report)
+
+    logger.info(
+        f"Applied {len(tasks)} tasks: {len(all_replacements)} replacements in total"
+    )
+    return all_replacements
+
+
+def _run_task(
+    df: pd.DataFrame,
+    task: Dict[str, str],
+    report: Dict,
+    index: Optional[TrigramIndex],
+    profile: Optional[Dict[str, Dict]],
+    modified_columns: Set,
+    budget: float,
+) -> List[Dict]:
+    """
+    Run one high-level task, filling in its report. Returns its replacements.
+    """
+    # Expand the task (e.g., "column Email rows 0 to 2") and decide how to run it
+    with stage("plan"):
+        plan = plan_task(df, task, profile=profile, modified_columns=modified_columns)
+    expanded = plan["expanded"]
+    report["simple_tasks"] = len(expanded)
+    report["engine"] = plan["engine"]
+    if plan["status"] != "ok":
+        return _fail(report, "error", plan["detail"])
+
+    if plan["warnings"]:
+        logger.warning(f"Potentially catastrophic regex in task {task}: {plan['warnings']}")
+    dedup = [step["dedup"] for step in plan["steps"]]
+
+    if plan["isolated"]:
+        # Run in a killable worker on a copy of the columns the task reads (it
+        # scans them without the trigram index); results are written back,
+        # and the index updated, afterwards
         try:
-            expanded = expand_task(df, task)
+            with stage("regex"):
+                replacements, errors, stats = run_with_time_budget(
+                    _apply_expanded,
+                    (_isolated_frame(df, expanded), expanded, None, profile,
+                     set(modified_columns), dedup, plan["engine"]),
+                    budget,
+                )
+        except TaskTimeoutError as e:
+            return _fail(report, "timed_out", str(e))
         except Exception as e:
-            logger.warning(f"Failed to expand task {task}: {e}")
-            continue
+            return _fail(report, "error", str(e))
+        _write_back(df, replacements, index, modified_columns)
+    else:
+        with stage("regex"):
+            replacements, errors, stats = _apply_expanded(
+                df, expanded, index, profile, modified_columns, dedup, plan["engine"]
+            )
+
+    report["cells_scanned"] = stats["cells_scanned"]
+    report["matches"] = stats["matches"]
+    report["replacements"] = len(replacements)
+    report["errors"] = [
+        {"task": small_task, "detail": detail} for small_task, detail in errors
+    ]
+    if errors:
+        report["status"] = "error" if len(errors) == len(expanded) else "partial"
+    return replacements
+
+
+def _isolated_frame(df: pd.DataFrame, expanded: List[Dict[str, str]]) -> pd.DataFrame:
+    """
+    The data an isolated task's worker receives: df with only the columns
+    its simple tasks read ("column"/"cell" targets; every column for "all"
+    and "row"). The other columns are blanked (NaN cells are never
+    scanned), so targets by column index still point at the same column.
+    """
+    needed = set()
+    for small_task in expanded:
+        target = small_task["target"].strip().lower()
+        if target == "all" or target.startswith("row "):
+            return df
+        try:
+            if target.startswith("column "):
+                needed.add(resolve_column(df, small_task["target"].strip()[len("column ") :]))
+            elif target.startswith("cell "):
+                needed.add(df.columns[int(target[len("cell ") :].split(",")[1])])
+        except (ValueError, IndexError):
+            continue  # an invalid target fails the same way in the worker
+    frame = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        frame[col] = df[col] if col in needed else np.nan
+    return frame
 
-        # Process each simple task from the expansion
-        for small_task in expanded:
-            try:
-                tgt = small_task[
-                    "target"
-                ]  # e.g., "cell 0,1" or "row 2" or "column 3" or "all"
-                pattern = small_task["regex"]
-                replacement = small_task["replacement"]
-
-                # Normalize ".*" to "^.*$" to ensure full-string match if needed
-                if pattern.strip() == ".*":
-                    logger.debug(
-                        f"Normalizing regex '.*' to '^.*$' for task: {small_task}"
-                    )
-                    pattern = "^.*$"
-
-                # Four types of simple targets:
-                # 1) "all" => entire DataFrame
-                # 2) "column N" => column by index or name
-                # 3) "row N" => single row by zero-based index
-                # 4) "cell R,C" => single cell by row R and column C (both zero-based)
-                if tgt.lower() == "all":
-                    all_replacements += replace_in_all(df, pattern, replacement)
-
-                elif tgt.lower().startswith("column "):
-                    col_spec = tgt[len("column ") :].strip()
-                    all_replacements += replace_in_column(
-                        df, col_spec, pattern, replacement
-                    )
 
-                elif tgt.lower().startswith("row "):
-                    row_idx = int(tgt[len("row ") :].strip())
-                    all_replacements += replace_in_row(
-                        df, row_idx, pattern, replacement
-                    )
+def _fail(report: Dict, status: str, detail: str) -> List[Dict]:
+    report["status"] = status
+    report["detail"] = detail
+    return []
 
-                elif tgt.lower().startswith("cell "):
-                    coords = tgt[len("cell ") :].split(",")
-                    row_idx = int(coords[0].strip())
-                    col_idx = int(coords[1].strip())
-                    all_replacements += replace_in_cell(
-                        df, row_idx, col_idx, pattern, replacement
-                    )
 
-                else:
-                    # This should not happen if expand_task returns valid targets
-                    raise ValueError(f"Unsupported normalized target: '{tgt}'")
+def _publish_report(report: Dict):
+    """
+    Log a task report once and record it in the process metrics.
+    """
+    summary = {k: v for k, v in report.items() if k not in ("task", "errors")}
+    summary["target"] = report["task"].get("target")
+    summary["regex"] = report["task"].get("regex")
+    summary["failed_simple_tasks"] = len(report["errors"])
+    level = logging.INFO if report["status"] == "ok" else logging.WARNING
+    logger.log(level, "Task report: " + json.dumps(summary, default=str))
+
+    metrics.inc("regex_cells_scanned_total", report["cells_scanned"])
+    metrics.inc("regex_task_seconds_total", report["elapsed_ms"] / 1000)
+    metrics.observe("regex_replacements_per_task", report["replacements"])
+    if "detail" in report:
+        metrics.inc("regex_task_failures_total", labels={"status": report["status"]})
+    if report["errors"]:
+        metrics.inc(
+            "regex_task_failures_total", len(report["errors"]), labels={"status": "error"}
+        )
 
-            except Exception as e:
-                logger.warning(f"Skipping small task due to error: {small_task} → {e}")
 
-    logger.info(f"Total replacements applied: {len(all_replacements)}")
-    return all_replacements
+def failed_tasks(reports: List[Dict]) -> List[Dict]:
+    """
+    Flatten task reports into {"task", "status": "timed_out" | "error", "detail"}
+    records, one per task or simple task that could not be applied.
+    """
+    failures = []
+    for report in reports:
+        if "detail" in report:
+            failures.append(
+                {
+                    "task": report["task"],
+                    "status": report["status"],
+                    "detail": report["detail"],
+                }
+            )
+        for error in report["errors"]:
+            failures.append(
+                {"task": error["task"], "status": "error", "detail": error["detail"]}
+            )
+    return failures
+
+
+def _tracing() -> bool:
+    """
+    True for a sample (REGEX_TRACE_SAMPLE_RATE) of simple tasks when DEBUG
+    logging is enabled; per-cell tracing is otherwise skipped entirely.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    rate = float(getattr(settings, "REGEX_TRACE_SAMPLE_RATE", 0.01))
+    return rate >= 1 or random.random() < rate
+
+
+def _apply_expanded(
+    df: pd.DataFrame,
+    expanded: List[Dict[str, str]],
+    index: Optional[TrigramIndex],
+    profile: Optional[Dict[str, Dict]],
+    modified_columns: Set,
+    dedup: Optional[List[bool]] = None,
+    engine: Optional[str] = None,
+) -> Tuple[List[Dict], List[Tuple[Dict, str]], Dict[str, int]]:
+    """
+    Run the simple tasks of one expanded task against df (in place).
+    `dedup` (one flag per simple task, from the task's plan) selects the
+    "all"/"column" tasks that evaluate the regex once per distinct value;
+    `engine` is the engine the plan chose (a worker process does not see
+    the settings of this one).
+    Returns (replacement records, [(small_task, error message), ...],
+    {"cells_scanned": n, "matches": m}).
+    """
+    all_replacements = []
+    errors = []
+    stats = {"cells_scanned": 0, "matches": 0}
+
+    # Process each simple task from the expansion
+    for position, small_task in enumerate(expanded):
+        try:
+            tgt = small_task[
+                "target"
+            ]  # e.g., "cell 0,1" or "row 2" or "column 3" or "all"
+            # Library references resolved, ".*" anchored, compiled once with
+            # the engine chosen for this task (or deployment)
+            pattern = task_pattern(small_task["regex"], small_task.get("engine") or engine)
+            replacement = small_task["replacement"]
+            distinct_only = bool(dedup and dedup[position])
+
+            # Columns the upload profile proves cannot contain this pattern class
+            skip_columns = skippable_columns(df, pattern, profile, modified_columns)
+
+            # Four types of simple targets:
+            # 1) "all" => entire DataFrame
+            # 2) "column N" => column by index or name
+            # 3) "row N" => single row by zero-based index
+            # 4) "cell R,C" => single cell by row R and column C (both zero-based)
+            if tgt.lower() == "all":
+                replacements = replace_in_all(
+                    df, pattern, replacement, index, skip_columns, stats, distinct_only
+                )
+
+            elif tgt.lower().startswith("column "):
+                col_spec = tgt[len("column ") :].strip()
+                replacements = replace_in_column(
+                    df, col_spec, pattern, replacement, index, skip_columns, stats,
+                    distinct_only,
+                )
+
+            elif tgt.lower().startswith("row "):
+                row_idx = int(tgt[len("row ") :].strip())
+                replacements = replace_in_row(
+                    df, row_idx, pattern, replacement, stats
+                )
+
+            elif tgt.lower().startswith("cell "):
+                coords = tgt[len("cell ") :].split(",")
+                row_idx = int(coords[0].strip())
+                col_idx = int(coords[1].strip())
+                replacements = replace_in_cell(
+                    df, row_idx, col_idx, pattern, replacement, stats
+                )
+
+            else:
+                # This should not happen if expand_task returns valid targets
+                raise ValueError(f"Unsupported normalized target: '{tgt}'")
+
+            if index is not None:
+                for rep in replacements:
+                    index.update_cell(
+                        rep["row"], rep["column"], rep["original"], rep["modified"]
+                    )
+            modified_columns.update(rep["column"] for rep in replacements)
+            all_replacements += replacements
+
+        except Exception as e:
+            # Reported once per task; only traced here
+            if _tracing():
+                logger.debug(f"Skipping small task due to error: {small_task} → {e}")
+            errors.append((small_task, str(e)))
+
+    return all_replacements, errors, stats
 
 
-def replace_in_all(df: pd.DataFrame, pattern: str, replacement: str) -> List[Dict]:
+def _write_back(
+    df: pd.DataFrame,
+    replacements: List[Dict],
+    index: Optional[TrigramIndex],
+    modified_columns: Set,
+):
+    """
+    Apply replacement records produced by an isolated worker to df, in order.
+    """
+    for rep in replacements:
+        df.at[rep["row"], rep["column"]] = rep["modified"]
+        if index is not None:
+            index.update_cell(
+                rep["row"], rep["column"], rep["original"], rep["modified"]
+            )
+        modified_columns.add(rep["column"])
+
+
+def replace_in_all(
+    df: pd.DataFrame,
+    pattern: str,
+    replacement: str,
+    index: Optional[TrigramIndex] = None,
+    skip_columns: Optional[Set] = None,
+    stats: Optional[Dict] = None,
+    dedup: bool = False,
+) -> List[Dict]:
     """
     Replace regex matches across the entire DataFrame.
+    If `stats` is given, its "cells_scanned" and "matches" counts are increased.
+    With `dedup`, the regex runs once per distinct cell value.
     """
     try:
-        logger.info(f"Applying regex to entire table: pattern='{pattern}'")
-        result = replace_all_matches(df, pattern, replacement, inplace=True)
+        if _tracing():
+            logger.debug(f"Applying regex to entire table: pattern='{_source(pattern)}'")
+        candidates = {col: set() for col in skip_columns or ()}
+        if index is not None:
+            for col in df.columns:
+                if col in candidates:
+                    continue
+                rows = index.candidate_rows(df, col, pattern)
+                if rows is not None:
+                    candidates[col] = rows
+        result = replace_all_matches(
+            df, pattern, replacement, inplace=True, candidates=candidates, dedup=dedup
+        )
+        _count_cells(stats, result)
         return result["replacements"]
     except Exception as e:
-        logger.exception("Failed to apply replacement to entire table.")
+        logger.debug("Failed to apply replacement to entire table.", exc_info=True)
         raise ValueError(f"Regex replacement failed (all): {e}")
 
 
 def replace_in_column(
-    df: pd.DataFrame, col_name: str | int, pattern: str, replacement: str
+    df: pd.DataFrame,
+    col_name: str | int,
+    pattern: str,
+    replacement: str,
+    index: Optional[TrigramIndex] = None,
+    skip_columns: Optional[Set] = None,
+    stats: Optional[Dict] = None,
+    dedup: bool = False,
 ) -> List[Dict]:
     """
     Replace regex matches in a specific column.
+    If `stats` is given, its "cells_scanned" and "matches" counts are increased.
+    With `dedup`, the regex runs once per distinct cell value.
 
     col_name: int or digit string => zero-based column index
               otherwise => column name (must exist in df.columns)
     """
     try:
-        # If col_name is numeric (as int or digit string), treat as index
-        if isinstance(col_name, int) or (
-            isinstance(col_name, str) and col_name.strip().isdigit()
-        ):
-            col_index = int(col_name)
-            if col_index < 0 or col_index >= len(df.columns):
-                raise ValueError(f"Column index {col_index} is out of range.")
-            col_name_real = df.columns[col_index]
-        else:
-            col_name_real = col_name.strip()
-            if col_name_real not in df.columns:
-                raise ValueError(
-                    f"Column '{col_name_real}' does not exist in DataFrame."
-                )
-
-        logger.info(f"Applying regex to column '{col_name_real}': pattern='{pattern}'")
+        col_name_real = resolve_column(df, col_name)
+
+        if _tracing():
+            logger.debug(
+                f"Applying regex to column '{col_name_real}': pattern='{_source(pattern)}'"
+            )
+        rows = None
+        if skip_columns and col_name_real in skip_columns:
+            rows = set()
+        elif index is not None:
+            rows = index.candidate_rows(df, col_name_real, pattern)
         result = replace_column_matches(
-            df, col_name_real, pattern, replacement, inplace=True
+            df, col_name_real, pattern, replacement, inplace=True, rows=rows, dedup=dedup
         )
+        _count_cells(stats, result)
         return result["replacements"]
 
     except Exception as e:
-        logger.exception(f"Failed to apply replacement to column '{col_name}'.")
+        logger.debug(f"Failed to apply replacement to column '{col_name}'.", exc_info=True)
         raise ValueError(f"Regex replacement failed (column={col_name}): {e}")
 
 
 def replace_in_row(
-    df: pd.DataFrame, row_index: int, pattern: str, replacement: str
+    df: pd.DataFrame,
+    row_index: int,
+    pattern: str,
+    replacement: str,
+    stats: Optional[Dict] = None,
 ) -> List[Dict]:
     """
     Replace regex matches in all cells of a specific row (zero-based index).
+    If `stats` is given, its "cells_scanned" and "matches" counts are increased.
     """
     try:
         if row_index < 0 or row_index >= len(df):
             raise ValueError(f"Row index {row_index} is out of range.")
-        logger.info(f"Applying regex to row {row_index}: pattern='{pattern}'")
+        if _tracing():
+            logger.debug(f"Applying regex to row {row_index}: pattern='{_source(pattern)}'")
         result = replace_row_matches(df, row_index, pattern, replacement, inplace=True)
+        _count_cells(stats, result)
         return result["replacements"]
     except Exception as e:
-        logger.exception(f"Failed to apply replacement to row {row_index}.")
+        logger.debug(f"Failed to apply replacement to row {row_index}.", exc_info=True)
         raise ValueError(f"Regex replacement failed (row={row_index}): {e}")
 
 
 def replace_in_cell(
-    df: pd.DataFrame, row_index: int, col_index: int, pattern: str, replacement: str
+    df: pd.DataFrame,
+    row_index: int,
+    col_index: int,
+    pattern: str,
+    replacement: str,
+    stats: Optional[Dict] = None,
 ) -> List[Dict]:
     """
     Replace regex match in a single cell, specified by zero-based (row_index, col_index).
+    If `stats` is given, its "cells_scanned" and "matches" counts are increased.
     """
     try:
         if row_index < 0 or row_index >= len(df):
@@ -171,15 +480,18 @@ def replace_in_cell(
         # Build the cell reference string, e.g., "B2" for row_index=1, col_index=1
         cell_ref = f"{col_letter}{row_index + 1}"
 
-        logger.info(
-            f"Applying regex to cell ({row_index}, {col_index}) -> '{cell_ref}': pattern='{pattern}'"
-        )
+        if _tracing():
+            logger.debug(
+                f"Applying regex to cell ({row_index}, {col_index}) -> '{cell_ref}': pattern='{_source(pattern)}'"
+            )
         result = replace_cell_match(df, cell_ref, pattern, replacement, inplace=True)
+        _count_cells(stats, result)
         return result["replacements"]
 
     except Exception as e:
-        logger.exception(
-            f"Failed to apply replacement to cell (row={row_index}, col={col_index})."
+        logger.debug(
+            f"Failed to apply replacement to cell (row={row_index}, col={col_index}).",
+            exc_info=True,
         )
         letter = _column_index_to_letter(col_index)
         raise ValueError(
@@ -187,21 +499,39 @@ def replace_in_cell(
         )
 
 
-def preview_tasks(df: pd.DataFrame, tasks: List[Dict[str, str]]) -> List[Dict]:
+def preview_tasks(
+    df: pd.DataFrame,
+    tasks: List[Dict[str, str]],
+    index: Optional[TrigramIndex] = None,
+    profile: Optional[Dict[str, Dict]] = None,
+    reports: Optional[List[Dict]] = None,
+) -> List[Dict]:
     """
     Generate a preview of changes without modifying the original DataFrame.
+
+    Only cells reported as rewritten by apply_tasks are compared, and a given
+    trigram index is used through a fork so its postings stay untouched.
     """
     from copy import deepcopy
 
-    original_df = deepcopy(df)
-    preview_df = deepcopy(df)
+    with stage("copy"):
+        preview_df = deepcopy(df)
+    preview_index = index.fork(df) if index is not None else None
 
-    apply_tasks(preview_df, tasks)
+    replacements = apply_tasks(
+        preview_df, tasks, index=preview_index, profile=profile, reports=reports
+    )
+
+    col_positions = {col: pos for pos, col in enumerate(df.columns)}
+    touched = sorted(
+        {(rep["row"], rep["column"]) for rep in replacements},
+        key=lambda cell: (cell[0], col_positions[cell[1]]),
+    )
 
     diffs = []
-    for i in range(len(original_df)):
-        for col in original_df.columns:
-            before = original_df.at[i, col]
+    with stage("diff"):
+        for i, col in touched:
+            before = df.at[i, col]
             after = preview_df.at[i, col]
             # Record only when both values are non-null and differ as strings
             if pd.notnull(before) and pd.notnull(after) and str(before) != str(after):
@@ -218,6 +548,112 @@ def preview_tasks(df: pd.DataFrame, tasks: List[Dict[str, str]]) -> List[Dict]:
     return diffs
 
 
+# ---------------------------------------------------------------------------
+# Workbooks: tasks grouped by sheet, each sheet applied to its stored dataset
+# ---------------------------------------------------------------------------
+
+
+def group_tasks_by_sheet(
+    tasks: List[Dict], sheets: List[str], unknown: Optional[List[Dict]] = None
+) -> Dict[str, List[Dict]]:
+    """
+    Group tasks by the sheet they target, in workbook order. The sheet comes
+    from a "sheet <name>" target qualifier or a "sheet" key (expanded tasks);
+    tasks without one target the first sheet. Names match case-insensitively.
+    Raises ValueError for a sheet the workbook does not have, unless an
+    `unknown` list is given to collect those tasks.
+    """
+    by_name = {name.lower(): name for name in sheets}
+    groups: Dict[str, List[Dict]] = {}
+    for task in tasks:
+        sheet, _ = split_sheet(str(task.get("target", "")))
+        sheet = sheet if sheet is not None else task.get("sheet")
+        if sheet is None:
+            name = sheets[0]
+        elif str(sheet).lower() in by_name:
+            name = by_name[str(sheet).lower()]
+        elif unknown is not None:
+            unknown.append(task)
+            continue
+        else:
+            raise ValueError(f"Unknown sheet '{sheet}' (sheets: {', '.join(sheets)}).")
+        groups.setdefault(name, []).append(task)
+    return {name: groups[name] for name in sheets if name in groups}
+
+
+def apply_tasks_to_payload(
+    df_json: str,
+    tasks: List[Dict[str, str]],
+    index: Optional[TrigramIndex] = None,
+    profile: Optional[Dict[str, Dict]] = None,
+) -> Dict:
+    """
+    Apply tasks to a serialized dataset (DataFrame.to_json) and return
+    {"payload": the new JSON, "replacements": [...], "reports": [...],
+     "profile": `profile` refreshed for the modified columns (or None)}.
+    """
+    # Load the DataFrame from the stored JSON
+    with stage("read_json"):
+        df = pd.read_json(StringIO(df_json))
+
+    # Make a deep copy to avoid modifying the original DataFrame directly
+    with stage("copy"):
+        modified_df = copy.deepcopy(df)
+
+    reports = []
+    replacements = apply_tasks(
+        modified_df, tasks, index=index, profile=profile, reports=reports
+    )
+    with stage("to_json"):
+        new_json = modified_df.to_json()
+
+    # Refresh the profile of the columns that were modified
+    if profile is not None:
+        touched = {rep["column"] for rep in replacements}
+        with stage("profile"):
+            profile.update(profile_dataframe(modified_df, touched))
+
+    return {
+        "payload": new_json,
+        "replacements": replacements,
+        "reports": reports,
+        "profile": profile,
+    }
+
+
+def apply_tasks_to_sheets(
+    jobs: Dict[str, Tuple[str, List[Dict], Optional[Dict]]]
+) -> Dict[str, Dict]:
+    """
+    Apply the tasks of several sheets, {sheet: (df_json, tasks, profile)},
+    each sheet in a worker of the process pool (sheets are independent).
+    Returns {sheet: apply_tasks_to_payload result}. Trigram indexes live in
+    this process and are not used by the workers.
+    """
+    sheets = list(jobs)
+    logger.info(f"Applying tasks to {len(sheets)} sheets in parallel")
+    results = map_in_processes(_apply_sheet_job, [jobs[sheet] for sheet in sheets])
+    return dict(zip(sheets, results))
+
+
+def _apply_sheet_job(job: Tuple[str, List[Dict], Optional[Dict]]) -> Dict:
+    df_json, tasks, profile = job
+    return apply_tasks_to_payload(df_json, tasks, profile=profile)
+
+
+def _count_cells(stats: Optional[Dict], result: Dict):
+    if stats is not None:
+        stats["cells_scanned"] = stats.get("cells_scanned", 0) + result["cells_scanned"]
+        stats["matches"] = stats.get("matches", 0) + result["matches"]
+
+
+def _source(pattern) -> str:
+    """
+    Return the source text of a pattern string or compiled pattern (for logging).
+    """
+    return getattr(pattern, "pattern", pattern)
+
+
 def _column_index_to_letter(col_idx: int) -> str:
     """
     Convert a 0-based column index to an Excel-style column letter.
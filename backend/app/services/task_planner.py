@@ -0,0 +1,373 @@
+# app/services/task_planner.py
+
+import logging
+import re
+import time
+from typing import Dict, List, Optional, Set
+
+import pandas as pd
+from django.conf import settings
+
+from app.utils.task_expander import expand_task
+from app.utils.pattern_library import pattern_class_of, resolve_pattern
+from app.utils.column_profiler import column_may_match
+from app.utils.regex_utils import compile_pattern, convert_dollar_groups_to_python, select_engine
+from app.utils.trigram_index import extract_required_literals, index_enabled, required_trigrams
+from app.utils.replace_all_matches import replace_all_matches
+from app.utils.redos_guard import TaskTimeoutError, analyze_pattern, run_with_time_budget
+
+logger = logging.getLogger(__name__)
+
+# Sampled cost per cell above which a pattern is reported as slow
+SLOW_CELL_SECONDS = 0.0005
+
+# Plan keys used by execution only (not JSON-serializable)
+_PRIVATE_KEYS = ("expanded", "pattern")
+
+
+def task_pattern(regex, engine: Optional[str] = None):
+    """
+    The compiled pattern a task runs: library references resolved, a bare
+    ".*" made to match whole cells ("^.*$"), compiled with the task's engine.
+    Raises ValueError (or re.error) if it cannot be compiled.
+    """
+    pattern = resolve_pattern(regex)
+    if isinstance(pattern, str) and pattern.strip() == ".*":
+        pattern = "^.*$"
+    return compile_pattern(pattern, engine)
+
+
+def skippable_columns(
+    df: pd.DataFrame, pattern, profile: Optional[Dict[str, Dict]], modified_columns: Set
+) -> Set:
+    """
+    Columns the upload profile proves cannot contain the pattern's built-in
+    class (none for other patterns). Columns modified since are rescanned.
+    """
+    class_name = pattern_class_of(pattern)
+    if not profile or not class_name:
+        return set()
+    return {
+        col
+        for col in df.columns
+        if col not in modified_columns and not column_may_match(profile, col, class_name)
+    }
+
+
+def resolve_column(df: pd.DataFrame, col_spec) -> str:
+    """
+    The column a "column <spec>" target names: an int or digit string is a
+    zero-based index, anything else a column name.
+    Raises ValueError if there is no such column.
+    """
+    if isinstance(col_spec, int) or (isinstance(col_spec, str) and col_spec.strip().isdigit()):
+        col_index = int(col_spec)
+        if col_index < 0 or col_index >= len(df.columns):
+            raise ValueError(f"Column index {col_index} is out of range.")
+        return df.columns[col_index]
+    name = col_spec.strip()
+    if name not in df.columns:
+        raise ValueError(f"Column '{name}' does not exist in DataFrame.")
+    return name
+
+
+def plan_task(
+    df: pd.DataFrame,
+    task: Dict[str, str],
+    profile: Optional[Dict[str, Dict]] = None,
+    modified_columns: Optional[Set] = None,
+    count_cells: bool = False,
+) -> Dict:
+    """
+    Compile a task into the plan apply_tasks executes:
+      {
+        "task": {...}, "status": "ok" | "error",
+        "detail": "...",                 # why the task cannot run (status "error")
+        "engine": "re", "linear_time": False,
+        "warnings": [...],               # ReDoS analysis (backtracking engines only)
+        "isolated": True,                # runs in a killable worker
+        "literals": ["@"],               # substrings every match contains
+        "prefilter": "trigram_index",    # or None: how "all"/"column" rows are narrowed
+        "skipped_columns": [...],        # proved not to match by the column profile
+        "steps": [{"target": "column 1", "columns": ["Email"], "dedup": True,
+                   "cells": 980}, ...],  # one per simple task ("cells" with count_cells)
+        "cells": 980,                    # with count_cells: non-null cells to scan
+        "issues": [...],                 # problems worth reporting before running
+        "expanded": [...], "pattern": <compiled>   # for execution (see public_plan)
+      }
+    A "dedup" step evaluates the regex once per distinct cell value: the
+    column profile shows at most REGEX_DEDUP_MAX_DISTINCT_RATIO distinct
+    values per non-null cell. Nothing is scanned here.
+    """
+    modified_columns = modified_columns or set()
+    regex = task.get("regex")
+    plan = {
+        "task": task,
+        "status": "ok",
+        "engine": None,
+        "linear_time": False,
+        "warnings": [],
+        "isolated": False,
+        "literals": [],
+        "prefilter": None,
+        "skipped_columns": [],
+        "steps": [],
+        "issues": [],
+        "expanded": [],
+        "pattern": None,
+    }
+
+    if not isinstance(regex, str):
+        return _error(plan, f"Invalid regex: must be a string, not {type(regex).__name__}")
+    try:
+        plan["expanded"] = expand_task(df, task)
+    except Exception as e:
+        return _error(plan, f"Cannot expand task: {e}")
+
+    try:
+        resolved = resolve_pattern(task["regex"])
+        engine = select_engine(resolved, task.get("engine"))
+    except (ValueError, TypeError, KeyError, re.error) as e:
+        # A malformed task must end up as this task's error, not fail the request
+        return _error(plan, str(e) if isinstance(e, ValueError) else f"Invalid task: {e}")
+    plan["engine"] = engine.name
+    plan["linear_time"] = engine.linear_time
+
+    try:
+        pattern = plan["pattern"] = task_pattern(task["regex"], task.get("engine"))
+    except Exception as e:
+        return _error(plan, f"Invalid regex: {e}")
+
+    # Linear-time engines cannot backtrack catastrophically
+    plan["warnings"] = [] if engine.linear_time else analyze_pattern(resolved)
+    isolation = getattr(settings, "REGEX_TASK_ISOLATION", "risky")
+    plan["isolated"] = isolation == "always" or (
+        isolation == "risky" and bool(plan["warnings"])
+    )
+    plan["issues"] += [f"Backtracking risk: {w}" for w in plan["warnings"]]
+    if _matches_empty(pattern):
+        plan["issues"].append(
+            "Pattern can match the empty string: the replacement is also "
+            "inserted where no text matches"
+        )
+
+    plan["literals"] = extract_required_literals(pattern)
+    if index_enabled() and required_trigrams(pattern):
+        plan["prefilter"] = "trigram_index"
+
+    skipped = skippable_columns(df, pattern, profile, modified_columns)
+    plan["skipped_columns"] = [str(col) for col in df.columns if col in skipped]
+    for small_task in plan["expanded"]:
+        plan["steps"].append(_plan_step(df, small_task["target"], skipped, profile, count_cells))
+    if count_cells:
+        plan["cells"] = sum(step.get("cells", 0) for step in plan["steps"])
+    return plan
+
+
+def public_plan(plan: Dict) -> Dict:
+    """
+    A plan without the parts only execution uses (expanded tasks, compiled pattern).
+    """
+    return {k: v for k, v in plan.items() if k not in _PRIVATE_KEYS}
+
+
+def estimate_plan(df: pd.DataFrame, plan: Dict, sample_rows: Optional[int] = None) -> Dict:
+    """
+    Estimate how long a plan's regex stage takes by running it on a sample
+    of the rows it scans (a copy; the DataFrame is not modified). Patterns
+    with a backtracking risk are sampled in a worker killed after
+    EXPLAIN_SAMPLE_BUDGET seconds. Returns
+      {"sampled_cells": n, "us_per_cell": x, "us_per_regex": y,
+       "selectivity": 0.12, "cells_visited": n, "regex_runs": m,
+       "estimated_ms": n * (x - y) + m * y}
+    where "selectivity" is the share of sampled cells containing every
+    literal (about the share of rows a trigram prefilter keeps),
+    "cells_visited" the cells left after the prefilter and "regex_runs"
+    the regex evaluations left after dedup. "us_per_cell" is the full cost
+    of a visited cell (read, match, write back), "us_per_regex" the match
+    alone. "estimated_ms" is None when the sample timed out. Adds to
+    plan["issues"].
+    """
+    sample_rows = sample_rows or int(getattr(settings, "EXPLAIN_SAMPLE_ROWS", 200))
+    columns = [c for c in _scanned_columns(df, plan) if c in df.columns]
+    estimate = {
+        "sampled_cells": 0,
+        "us_per_cell": None,
+        "us_per_regex": None,
+        "selectivity": 1.0,
+        "cells_visited": 0,
+        "regex_runs": 0,
+        "estimated_ms": 0.0,
+    }
+    if plan["status"] != "ok" or not columns or df.empty:
+        return estimate
+
+    sample = df[columns].sample(n=min(sample_rows, len(df)), random_state=0).reset_index(drop=True)
+    task = plan["task"]
+    # The pattern is recompiled from its source: the sample may run in a worker
+    args = (sample, task["regex"], plan["engine"], task.get("replacement", ""), plan["literals"])
+    try:
+        if plan["warnings"]:
+            budget = float(getattr(settings, "EXPLAIN_SAMPLE_BUDGET", 1.0))
+            cells, elapsed, regex_elapsed, with_literals = run_with_time_budget(
+                _run_sample, args, budget
+            )
+        else:
+            cells, elapsed, regex_elapsed, with_literals = _run_sample(*args)
+    except TaskTimeoutError:
+        plan["issues"].append(
+            f"Sample of {len(sample)} rows did not finish in the explain budget: "
+            f"the pattern backtracks catastrophically on this data"
+        )
+        estimate["estimated_ms"] = None
+        return estimate
+    except Exception as e:
+        plan["issues"].append(f"Sample run failed: {e}")
+        estimate["estimated_ms"] = None
+        return estimate
+
+    estimate["sampled_cells"] = cells
+    if not cells:
+        return estimate
+    per_cell = elapsed / cells
+    per_regex = min(regex_elapsed / cells, per_cell)
+    selectivity = with_literals / cells if plan["literals"] else 1.0
+    estimate["us_per_cell"] = round(per_cell * 1e6, 2)
+    estimate["us_per_regex"] = round(per_regex * 1e6, 2)
+    estimate["selectivity"] = round(selectivity, 4)
+
+    visited = runs = 0
+    for step in plan["steps"]:
+        step_cells = step.get("cells", 0)
+        if plan["prefilter"] and step["kind"] in ("all", "column"):
+            step_cells = step_cells * selectivity
+        visited += step_cells
+        runs += min(step_cells, step["distinct"]) if step["dedup"] else step_cells
+    estimate["cells_visited"] = int(round(visited))
+    estimate["regex_runs"] = int(round(runs))
+    estimate["estimated_ms"] = round(
+        (visited * (per_cell - per_regex) + runs * per_regex) * 1000, 2
+    )
+
+    if per_regex > SLOW_CELL_SECONDS:
+        plan["issues"].append(f"Slow pattern: {per_regex * 1e6:.0f} µs per cell on the sample")
+    budget = float(getattr(settings, "REGEX_TASK_TIME_BUDGET", 5.0))
+    if plan["isolated"] and estimate["estimated_ms"] > budget * 1000:
+        plan["issues"].append(
+            f"Estimated {estimate['estimated_ms'] / 1000:.1f}s exceeds the "
+            f"{budget:g}s budget of isolated tasks: it would time out"
+        )
+    return estimate
+
+
+def _plan_step(
+    df: pd.DataFrame,
+    target: str,
+    skipped: Set,
+    profile: Optional[Dict[str, Dict]],
+    count_cells: bool,
+) -> Dict:
+    lowered = target.lower()
+    step = {"target": target, "kind": lowered.split(" ", 1)[0], "columns": [], "dedup": False}
+    try:
+        if lowered == "all":
+            columns = [col for col in df.columns if col not in skipped]
+        elif lowered.startswith("column "):
+            col = resolve_column(df, target[len("column ") :])
+            columns = [] if col in skipped else [col]
+        elif lowered.startswith("row "):
+            row = int(target[len("row ") :].strip())
+            if count_cells:
+                step["cells"] = int(df.iloc[row].count()) if 0 <= row < len(df) else 0
+            return step
+        elif lowered.startswith("cell "):
+            if count_cells:
+                step["cells"] = 1
+            return step
+        else:
+            raise ValueError(f"Unsupported normalized target: '{target}'")
+    except (ValueError, IndexError) as e:
+        step["error"] = str(e)
+        if count_cells:
+            step["cells"] = 0
+        return step
+
+    step["columns"] = [str(col) for col in columns]
+    distinct = _distinct_values(df, columns, profile)
+    if distinct is not None:
+        non_null = sum(_non_null(df, col, profile) for col in columns)
+        ratio = float(getattr(settings, "REGEX_DEDUP_MAX_DISTINCT_RATIO", 0.5))
+        step["dedup"] = non_null > 0 and distinct <= ratio * non_null
+        step["distinct"] = distinct
+    if count_cells:
+        step["cells"] = int(sum(df[col].count() for col in columns))
+    return step
+
+
+def _distinct_values(
+    df: pd.DataFrame, columns: List, profile: Optional[Dict[str, Dict]]
+) -> Optional[int]:
+    # Known from the column profile only: counting them here would cost a scan
+    if not profile or not columns:
+        return None
+    total = 0
+    for col in columns:
+        column_profile = profile.get(str(col))
+        if column_profile is None:
+            return None
+        total += column_profile["distinct"]
+    return total
+
+
+def _non_null(df: pd.DataFrame, col, profile: Dict[str, Dict]) -> float:
+    return (1 - profile[str(col)]["null_ratio"]) * len(df)
+
+
+def _scanned_columns(df: pd.DataFrame, plan: Dict) -> List:
+    by_name = {str(col): col for col in df.columns}
+    columns = []
+    for step in plan["steps"]:
+        if step["kind"] in ("row", "cell"):
+            # Rows and cells hold values of every column
+            return list(df.columns)
+        for name in step["columns"]:
+            if by_name[name] not in columns:
+                columns.append(by_name[name])
+    return columns
+
+
+def _run_sample(
+    sample: pd.DataFrame, regex, engine: Optional[str], replacement: str, literals: List[str]
+):
+    """
+    Time the replacement on a sample; returns (cells scanned, seconds,
+    seconds spent in the regex alone, cells containing every literal).
+    """
+    pattern = task_pattern(regex, engine)
+    strings = [str(v) for col in sample.columns for v in sample[col].dropna()]
+    with_literals = sum(1 for text in strings if all(lit in text for lit in literals))
+    regex_replacement = convert_dollar_groups_to_python(replacement)
+    start = time.perf_counter()
+    for text in strings:
+        pattern.subn(regex_replacement, text)
+    regex_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = replace_all_matches(sample, pattern, replacement, inplace=True)
+    return result["cells_scanned"], time.perf_counter() - start, regex_elapsed, with_literals
+
+
+def _matches_empty(pattern) -> bool:
+    # A zero-width match on a non-empty probe means the pattern matches "nothing"
+    try:
+        match = pattern.search("#")
+    except Exception:
+        return False
+    return match is not None and match.end() == match.start()
+
+
+def _error(plan: Dict, detail: str) -> Dict:
+    plan["status"] = "error"
+    plan["detail"] = detail
+    plan["issues"].append(detail)
+    return plan
@@ -1,21 +1,46 @@
 # app/services/upload_service.py
 
 import logging
-from app.utils.file_parser import parse_file
+from io import StringIO
+
+import pandas as pd
+
+from app.utils.file_parser import parse_sheets
+from app.utils.column_profiler import profile_dataframe
+from app.utils.stage_timer import stage
 
 logger = logging.getLogger(__name__)  # Get module-level logger
 
 
 def handle_upload(file):
     """
-    Parses the uploaded file and returns the full DataFrame and column names.
+    Parses the uploaded file and returns {sheet name: DataFrame} (every sheet
+    of a workbook, one for a CSV file), the column names of the first sheet,
+    {sheet name: working dataset} (DataFrame.to_json) and {sheet name:
+    per-column profile} (nulls, distinct values, lengths, PII classes).
+
+    Profiles describe the working dataset as tasks and scans read it back
+    (pd.read_json), not the parsed frame: read_json turns some columns into
+    other types (e.g. integer epochs in "modified" or "*_at" columns become
+    dates), and profile-based skips must agree with what is scanned.
     """
     try:
         logger.debug(f"Received file for upload: {file.name}")
-        df = parse_file(file)
+        with stage("parse"):
+            sheets = parse_sheets(file)
+        df = next(iter(sheets.values()))
         columns = list(df.columns)
-        logger.info(f"File parsed successfully: {file.name}, columns: {columns}")
-        return df, columns
+        logger.info(
+            f"File parsed successfully: {file.name}, sheets: {list(sheets)}, columns: {columns}"
+        )
+        with stage("to_json"):
+            payloads = {name: sheet_df.to_json() for name, sheet_df in sheets.items()}
+        with stage("profile"):
+            profiles = {
+                name: profile_dataframe(pd.read_json(StringIO(payload)))
+                for name, payload in payloads.items()
+            }
+        return sheets, columns, payloads, profiles
     except Exception as e:
         logger.error(f"Failed to process uploaded file: {file.name}")
         logger.exception(e)  # logs full traceback
@@ -0,0 +1,60 @@
+# app/tests/helpers.py
+
+import io
+import json
+import shutil
+import tempfile
+
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+import app.utils.dataset_store as dataset_store
+
+
+def csv_file(df: pd.DataFrame, name: str = "data.csv") -> SimpleUploadedFile:
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return SimpleUploadedFile(name, buffer.getvalue().encode("utf-8"), content_type="text/csv")
+
+
+def xlsx_bytes(sheets: dict) -> bytes:
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        for sheet, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet, index=False)
+    return buffer.getvalue()
+
+
+def xlsx_file(sheets: dict, name: str = "book.xlsx") -> SimpleUploadedFile:
+    return SimpleUploadedFile(name, xlsx_bytes(sheets))
+
+
+class ApiTestCase(TestCase):
+    """
+    Test case with its own dataset store and metrics directory, and helpers
+    for the JSON API.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp(prefix="regexflow-test-")
+        overrides = override_settings(
+            DATASET_STORE_DIR=f"{self.tmp_dir}/datasets",
+            METRICS_DIR=f"{self.tmp_dir}/metrics",
+            DATASET_SWEEP_INTERVAL=0,
+            PROCESS_POOL_WORKERS=1,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        dataset_store._store = None
+        self.addCleanup(setattr, dataset_store, "_store", None)
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+
+    def post_json(self, url: str, body):
+        return self.client.post(url, json.dumps(body), content_type="application/json")
+
+    def upload(self, file) -> dict:
+        response = self.client.post("/api/upload", {"file": file})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
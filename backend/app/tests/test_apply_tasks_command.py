@@ -0,0 +1,124 @@
+# app/tests/test_apply_tasks_command.py
+
+import io
+import json
+import os
+import tempfile
+
+import pandas as pd
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+
+from app.services.batch_service import process_path
+
+TASKS = [{"target": "column Email", "regex": r"[\w.]+@[\w.]+", "replacement": "[email]"}]
+
+
+@override_settings(PROCESS_POOL_WORKERS=1)
+class ApplyTasksCommandTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.dir = self._tmp.name
+        os.makedirs(self._path("in/feb"))
+        contacts = pd.DataFrame({"Name": ["a", "b"], "Email": ["a@x.com", "b@y.org"]})
+        contacts.to_csv(self._path("in/jan.csv"), index=False)
+        contacts.to_csv(self._path("in/feb/feb.csv"), index=False)
+        with open(self._path("in/notes.txt"), "w") as f:
+            f.write("not a table")
+        self.tasks_path = self._path("rules.json")
+        with open(self.tasks_path, "w") as f:
+            json.dump({"tasks": TASKS}, f)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def _run(self, *args) -> str:
+        out = io.StringIO()
+        call_command("apply_tasks", *args, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_outputs_mirror_the_inputs(self):
+        summary_path = self._path("summary.json")
+        output = self._run(
+            self._path("in/**/*"),
+            "--tasks", self.tasks_path,
+            "--out-dir", self._path("out"),
+            "--summary", summary_path,
+        )
+        self.assertIn("Done: 2 ok, 0 failed, 4 replacements", output)
+        for name in ("jan.csv", "feb/feb.csv"):
+            result = pd.read_csv(self._path(f"out/{name}"))
+            self.assertEqual(result["Email"].tolist(), ["[email]", "[email]"])
+        self.assertFalse(os.path.exists(self._path("out/notes.txt")))
+
+        with open(summary_path) as f:
+            summary = json.load(f)
+        self.assertEqual(summary["tasks"], TASKS)
+        self.assertEqual(sorted(s["file"] for s in summary["files"]), ["feb/feb.csv", "jan.csv"])
+
+    def test_existing_outputs_need_overwrite(self):
+        args = [self._path("in/jan.csv"), "--tasks", self.tasks_path, "--out-dir", self._path("out")]
+        self._run(*args)
+        with self.assertRaisesRegex(CommandError, "--overwrite"):
+            self._run(*args)
+        self._run(*args, "--overwrite")
+
+    def test_describe_uses_the_rule_parser(self):
+        output = self._run(
+            self._path("in/jan.csv"),
+            "--describe", "redact emails in column Email",
+            "--out-dir", self._path("out"),
+        )
+        self.assertIn("Generated tasks", output)
+        result = pd.read_csv(self._path("out/jan.csv"))
+        self.assertEqual(result["Email"].tolist(), ["[email]", "[email]"])
+
+    def test_invalid_arguments(self):
+        with open(self.tasks_path, "w") as f:
+            json.dump(["foo"], f)
+        with self.assertRaisesRegex(CommandError, "no task array"):
+            self._run(self._path("in/jan.csv"), "--tasks", self.tasks_path, "--out-dir", self._path("out"))
+        with self.assertRaisesRegex(CommandError, "No files match"):
+            self._run(self._path("in/*.xlsx"), "--tasks", self.tasks_path, "--out-dir", self._path("out"))
+        with self.assertRaisesRegex(CommandError, "--jobs"):
+            self._run(
+                self._path("in/jan.csv"), "--tasks", self.tasks_path, "--out-dir", self._path("out"), "--jobs", "-1"
+            )
+
+    def test_jobs_size_a_pool_of_their_own(self):
+        output = self._run(
+            self._path("in/**/*.csv"),
+            "--tasks", self.tasks_path,
+            "--out-dir", self._path("out"),
+            "--jobs", "2",
+        )
+        self.assertIn("with 2 job(s)", output)
+        self.assertIn("Done: 2 ok, 0 failed", output)
+        self.assertEqual(settings.PROCESS_POOL_WORKERS, 1)
+
+    def test_unwritable_output_is_that_files_failure(self):
+        # The output directory is a file, so no output can be written
+        blocked = self._path("blocked")
+        with open(blocked, "w") as f:
+            f.write("")
+        summary_path = self._path("summary.json")
+        with self.assertRaisesRegex(CommandError, "2 of 2 files failed"):
+            self._run(
+                self._path("in/**/*.csv"),
+                "--tasks", self.tasks_path,
+                "--out-dir", blocked,
+                "--summary", summary_path,
+            )
+        with open(summary_path) as f:
+            summary = json.load(f)
+        self.assertEqual({s["status"] for s in summary["files"]}, {"error"})
+        self.assertTrue(all(s["bytes_in"] > 0 and s["output"] is None for s in summary["files"]))
+
+    def test_unreadable_input_is_that_files_failure(self):
+        output_path = self._path("out/gone.csv")
+        summary = process_path((self._path("in/gone.csv"), "gone.csv", output_path, TASKS))
+        self.assertEqual((summary["status"], summary["bytes_in"]), ("error", 0))
+        self.assertIn("gone.csv", summary["error"])
+        self.assertFalse(os.path.exists(self._path("out")))
@@ -0,0 +1,96 @@
+# app/tests/test_batch.py
+
+import io
+import json
+import zipfile
+
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from app.tests.helpers import ApiTestCase, csv_file, xlsx_bytes
+
+TASKS = [
+    {"target": "column Email", "regex": r"[\w.]+@[\w.]+", "replacement": "[email]"},
+    {"target": "sheet Orders column Note", "regex": r"\d+", "replacement": "#"},
+]
+
+
+class BatchTests(ApiTestCase):
+    def _batch(self, files, tasks=TASKS) -> zipfile.ZipFile:
+        response = self.client.post("/api/batch", {"files": files, "tasks": json.dumps(tasks)})
+        self.assertEqual(response.status_code, 200)
+        return zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+
+    def test_summary_of_a_mixed_batch(self):
+        book = xlsx_bytes(
+            {
+                "Contacts": pd.DataFrame({"Name": ["a"], "Email": ["a@x.com"]}),
+                "Orders": pd.DataFrame({"Note": ["n 12", "n 3"]}),
+            }
+        )
+        contacts = pd.DataFrame({"Name": ["a", "b"], "Email": ["a@x.com", "b@y.org"]})
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as z:
+            z.writestr("m1/book.xlsx", book)
+            z.writestr("README.txt", "notes")
+            z.writestr("__MACOSX/._book.xlsx", "x")
+        files = [
+            csv_file(contacts, "feb.csv"),
+            SimpleUploadedFile("exports.zip", archive.getvalue()),
+            SimpleUploadedFile("bad.xlsx", b"\x00\x01garbage"),
+        ]
+
+        result = self._batch(files)
+        self.assertEqual(sorted(result.namelist()), ["feb.csv", "m1/book.xlsx", "summary.json"])
+        self.assertEqual(result.namelist()[-1], "summary.json")
+
+        summary = json.loads(result.read("summary.json"))
+        self.assertEqual(
+            {k: summary[k] for k in ("total_files", "succeeded", "failed", "skipped", "total_replacements")},
+            {"total_files": 3, "succeeded": 2, "failed": 1, "skipped": 1, "total_replacements": 5},
+        )
+        by_file = {f["file"]: f for f in summary["files"]}
+        self.assertEqual([f["file"] for f in summary["files"]], ["feb.csv", "m1/book.xlsx", "bad.xlsx", "README.txt"])
+        self.assertEqual((by_file["feb.csv"]["status"], by_file["feb.csv"]["replacements"]), ("ok", 2))
+        # The Orders task has no sheet to edit in a CSV file
+        self.assertEqual(len(by_file["feb.csv"]["unmatched_tasks"]), 1)
+        self.assertEqual(by_file["bad.xlsx"]["status"], "error")
+        self.assertIsNone(by_file["bad.xlsx"]["output"])
+        self.assertEqual(by_file["README.txt"]["status"], "skipped")
+
+        sheets = pd.read_excel(io.BytesIO(result.read("m1/book.xlsx")), sheet_name=None)
+        self.assertEqual(sheets["Contacts"]["Email"].tolist(), ["[email]"])
+        self.assertEqual(sheets["Orders"]["Note"].tolist(), ["n #", "n #"])
+        feb = pd.read_csv(io.BytesIO(result.read("feb.csv")))
+        self.assertEqual(feb["Email"].tolist(), ["[email]", "[email]"])
+
+    def test_invalid_requests(self):
+        contacts = pd.DataFrame({"Email": ["a@x.com"]})
+        for tasks in ("nope", json.dumps(["foo"]), json.dumps([])):
+            response = self.client.post("/api/batch", {"files": [csv_file(contacts)], "tasks": tasks})
+            self.assertEqual(response.status_code, 400, tasks)
+        response = self.client.post("/api/batch", {"tasks": json.dumps(TASKS)})
+        self.assertEqual(response.status_code, 400)
+
+    def test_corrupt_archive_member_is_skipped(self):
+        contacts = pd.DataFrame({"Email": ["a@x.com"]}).to_csv(index=False).encode()
+        broken = b"Email\nbroken@example.com\n"
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_STORED) as z:
+            z.writestr("good.csv", contacts)
+            z.writestr("broken.csv", broken)
+        # Damage the stored data so its CRC no longer matches
+        data = archive.getvalue().replace(broken, broken.replace(b"broken", b"BROKEN"))
+
+        result = self._batch([SimpleUploadedFile("exports.zip", data)])
+        self.assertEqual(sorted(result.namelist()), ["good.csv", "summary.json"])
+        summary = json.loads(result.read("summary.json"))
+        self.assertEqual((summary["succeeded"], summary["skipped"]), (1, 1))
+        by_file = {f["file"]: f for f in summary["files"]}
+        self.assertEqual(by_file["broken.csv"]["status"], "skipped")
+        self.assertIn("CRC", by_file["broken.csv"]["error"])
+
+        # With nothing readable left the batch itself is invalid
+        only_broken = SimpleUploadedFile("only.zip", data.replace(b"good.csv", b"good.txt"))
+        response = self.client.post("/api/batch", {"files": [only_broken], "tasks": json.dumps(TASKS)})
+        self.assertEqual(response.status_code, 400)
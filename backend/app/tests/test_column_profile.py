@@ -0,0 +1,77 @@
+# app/tests/test_column_profile.py
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from app.tests.helpers import ApiTestCase, csv_file, xlsx_file
+from app.utils.column_profiler import column_may_match, profile_dataframe
+
+
+class ProfileDataFrameTests(SimpleTestCase):
+    def test_pattern_fractions(self):
+        df = pd.DataFrame(
+            {
+                "Email": ["a@x.com", "b@y.org", None, "none"],
+                "Phone": ["0412 345 678", "call 02 9876 5432", "x", "y"],
+            }
+        )
+        profile = profile_dataframe(df)
+        self.assertEqual(profile["Email"]["null_ratio"], 0.25)
+        self.assertEqual(profile["Email"]["distinct"], 3)
+        self.assertAlmostEqual(profile["Email"]["pattern_fractions"]["email"], 2 / 3, places=3)
+        self.assertEqual(profile["Email"]["pattern_fractions"]["phone"], 0.0)
+        self.assertEqual(profile["Phone"]["pattern_fractions"]["phone"], 0.5)
+        self.assertFalse(column_may_match(profile, "Email", "phone"))
+        self.assertTrue(column_may_match(profile, "Phone", "phone"))
+
+    def test_class_inside_another_match_is_counted(self):
+        # The digits of a phone number also hold a postcode: the column must
+        # not be reported as postcode-free
+        profile = profile_dataframe(pd.DataFrame({"Phone": ["0412 345 678"]}))
+        self.assertTrue(column_may_match(profile, "Phone", "postcode"))
+
+
+class SheetProfileTests(ApiTestCase):
+    def test_one_profile_per_sheet(self):
+        body = self.upload(
+            xlsx_file(
+                {
+                    "Contacts": pd.DataFrame({"Email": ["a@x.com", "b@y.org"]}),
+                    "Calls": pd.DataFrame({"Phone": ["0412 345 678", "none"]}),
+                }
+            )
+        )
+        self.assertIn("Email", body["profile"])
+        self.assertEqual(body["sheets"][1]["profile"]["Phone"]["pattern_fractions"]["phone"], 0.5)
+
+        first = self.client.get("/api/profile").json()["profile"]
+        calls = self.client.get("/api/profile", {"sheet": "Calls"}).json()["profile"]
+        self.assertEqual(list(first), ["Email"])
+        self.assertEqual(list(calls), ["Phone"])
+        self.assertEqual(self.client.get("/api/profile", {"sheet": "Nope"}).status_code, 400)
+
+        # A replace refreshes the profile of the sheet it modified
+        response = self.post_json(
+            "/api/replace",
+            {"tasks": [{"target": "sheet Calls column Phone", "regex": "@au_phone", "replacement": "-"}]},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        calls = self.client.get("/api/profile", {"sheet": "Calls"}).json()["profile"]
+        self.assertEqual(calls["Phone"]["pattern_fractions"]["phone"], 0.0)
+
+        # Scans of a sheet use that sheet's data
+        scan = self.post_json("/api/scan", {"sheet": "Contacts"}).json()
+        self.assertEqual(scan["counts"]["email"], 2)
+
+    def test_profile_matches_the_working_dataset(self):
+        # read_json turns the epoch seconds of a "modified" column into dates
+        self.upload(csv_file(pd.DataFrame({"modified": [1700000000, 1700000500]})))
+        profile = self.client.get("/api/profile").json()["profile"]
+        self.assertEqual(profile["modified"]["pattern_fractions"]["date"], 1.0)
+
+        response = self.post_json(
+            "/api/replace",
+            {"tasks": [{"target": "all", "regex": "@date", "replacement": "[date]"}]},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["total_replacements"], 2)
@@ -0,0 +1,148 @@
+# app/tests/test_dataset_store.py
+
+import os
+import tempfile
+import threading
+from unittest import mock
+
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from app.tests.helpers import ApiTestCase, csv_file
+from app.utils.dataset_store import DatasetQuotaError, DatasetStore, DatasetVersionConflict
+
+
+class DatasetStoreTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.dir = self._tmp.name
+
+    def _store(self, **overrides):
+        options = dict(
+            directory=self.dir,
+            memory_max_bytes=1000,
+            session_quota=1000,
+            global_quota=1500,
+            ttl=3600,
+            spill_after=600,
+        )
+        options.update(overrides)
+        return DatasetStore(**options)
+
+    def _age(self, store, owner, name, seconds):
+        store._entries[(owner, name)].last_access -= seconds
+
+    def test_session_and_global_quota(self):
+        store = self._store()
+        store.put("a", "working", "x" * 800)
+        with self.assertRaisesRegex(DatasetQuotaError, "per session"):
+            store.put("a", "original", "x" * 300)
+        # Replacing a dataset only counts the difference
+        store.put("a", "working", "y" * 900)
+        store.put("b", "working", "x" * 500)
+        with self.assertRaisesRegex(DatasetQuotaError, "full"):
+            store.put("c", "working", "x" * 200)
+        self.assertEqual(store.usage()["total_bytes"], 1400)
+
+    def test_put_many_is_all_or_nothing(self):
+        store = self._store()
+        with self.assertRaises(DatasetQuotaError):
+            store.put_many("a", {"working": "x" * 600, "original": "x" * 600})
+        self.assertEqual(store.usage()["datasets"], 0)
+
+    def test_conditional_put(self):
+        store = self._store()
+        version = store.put("a", "working", "one")
+        store.put("a", "working", "two", expected=version)
+        with self.assertRaises(DatasetVersionConflict) as raised:
+            store.put("a", "working", "three", expected=version)
+        self.assertEqual(raised.exception.current, store.get_versioned("a", "working")[1])
+        self.assertEqual(store.get("a", "working"), "two")
+
+    def test_least_recently_used_spills_to_disk(self):
+        store = self._store(memory_max_bytes=500)
+        store.put("a", "working", "a" * 300)
+        store.put("b", "working", "b" * 300)
+        usage = store.usage()
+        self.assertEqual((usage["memory_bytes"], usage["disk_bytes"]), (300, 300))
+        self.assertEqual(len(os.listdir(self.dir)), 1)
+        # Reading it back promotes it and spills the other one
+        self.assertEqual(store.get("a", "working"), "a" * 300)
+        self.assertIsNone(store._entries[("a", "working")].path)
+        self.assertIsNotNone(store._entries[("b", "working")].path)
+        self.assertEqual(store.get("b", "working"), "b" * 300)
+
+    def test_sweep_spills_idle_and_deletes_expired(self):
+        store = self._store(ttl=100, spill_after=10)
+        store.put("a", "working", "idle")
+        store.put("b", "working", "old")
+        store.put("c", "working", "fresh")
+        self._age(store, "a", "working", 20)
+        self._age(store, "b", "working", 200)
+        self.assertEqual(store.sweep(), {"evicted": 1, "orphans": 0, "spilled": 1})
+        self.assertIsNone(store.get("b", "working"))
+        self.assertEqual(store.get("a", "working"), "idle")
+        self.assertEqual(store.get("c", "working"), "fresh")
+
+    def test_expired_dataset_is_not_returned(self):
+        store = self._store(ttl=100)
+        store.put("a", "working", "x")
+        self._age(store, "a", "working", 200)
+        self.assertIsNone(store.get("a", "working"))
+        self.assertEqual(store.usage()["total_bytes"], 0)
+
+    def test_sweep_deletes_orphaned_files(self):
+        orphan = os.path.join(self.dir, "left-behind.json")
+        with open(orphan, "w") as f:
+            f.write("{}")
+        os.utime(orphan, (0, 0))
+        store = self._store()
+        self.assertEqual(store.sweep()["orphans"], 1)
+        self.assertFalse(os.path.exists(orphan))
+
+
+class UploadQuotaTests(ApiTestCase):
+    def test_upload_over_the_session_quota_is_rejected(self):
+        df = pd.DataFrame({"Name": ["x" * 200] * 50})
+        with override_settings(DATASET_SESSION_QUOTA=1000):
+            response = self.client.post("/api/upload", {"file": csv_file(df)})
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("per session", response.json()["error"])
+
+
+class SpillRaceTests(SimpleTestCase):
+    def test_concurrent_spills_do_not_lose_a_dataset(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = DatasetStore(
+                directory=directory,
+                memory_max_bytes=500,
+                session_quota=10_000,
+                global_quota=10_000,
+                ttl=3600,
+                spill_after=0,
+            )
+            store.put("a", "working", "a" * 300)
+
+            entered, release = threading.Event(), threading.Event()
+            encode = store.compressor.encode
+
+            def slow_encode(payload):
+                if threading.current_thread().name == "sweeper":
+                    entered.set()
+                    release.wait(10)
+                return encode(payload)
+
+            with mock.patch.object(store.compressor, "encode", side_effect=slow_encode):
+                sweeper = threading.Thread(target=store.sweep, name="sweeper")
+                sweeper.start()
+                self.assertTrue(entered.wait(10))
+                # Over the memory limit while the sweep is still writing "a"
+                store.put("b", "working", "b" * 300)
+                release.set()
+                sweeper.join(10)
+
+            self.assertEqual(store.get("a", "working"), "a" * 300)
+            self.assertEqual(store.get("b", "working"), "b" * 300)
+            leftovers = [n for n in os.listdir(directory) if n.endswith(".tmp")]
+            self.assertEqual(leftovers, [])
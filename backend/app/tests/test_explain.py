@@ -0,0 +1,67 @@
+# app/tests/test_explain.py
+
+import pandas as pd
+
+from app.tests.helpers import ApiTestCase, csv_file
+
+EMAIL = {"target": "column Email", "regex": r"[\w.]+@ex\.com", "replacement": "[email]"}
+
+
+def _contacts() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Name": [f"U{i}" for i in range(30)],
+            "Email": [f"u{i}@ex.com" for i in range(30)],
+            "City": ["Sydney", "Perth", "Hobart"] * 10,
+        }
+    )
+
+
+class ExplainTests(ApiTestCase):
+    def test_plans_without_changing_the_data(self):
+        version = self.upload(csv_file(_contacts()))["version"]
+        tasks = [
+            EMAIL,
+            {"target": "column City", "regex": "Syd(ney)", "replacement": "SYD"},
+            {"target": "column Nope", "regex": "a", "replacement": "b"},
+            {"target": "all", "regex": "a(", "replacement": "b"},
+            {"target": "all", "regex": "a", "replacement": "b", "engine": ["re"]},
+        ]
+        response = self.post_json("/api/explain", {"tasks": tasks, "sample_rows": 10})
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+
+        email, city, unknown, invalid, bad_engine = body["plans"]
+        self.assertEqual([p["task"] for p in body["plans"]], tasks)
+        self.assertEqual(email["status"], "ok")
+        self.assertEqual([s["target"] for s in email["steps"]], ["column 1"])
+        self.assertEqual(email["cells"], 30)
+        self.assertIn("@ex.com", email["literals"])
+        self.assertEqual(email["estimate"]["sampled_cells"], 10)
+        self.assertIsNotNone(email["estimate"]["estimated_ms"])
+        # Three distinct values in thirty cells: evaluated once per value
+        self.assertTrue(city["steps"][0]["dedup"])
+        self.assertNotIn("expanded", email)
+        self.assertNotIn("pattern", email)
+
+        self.assertEqual(unknown["status"], "error")
+        self.assertEqual(invalid["status"], "error")
+        self.assertIn("Invalid regex", invalid["detail"])
+        self.assertEqual(bad_engine["status"], "error")
+        self.assertEqual(body["invalid_tasks"], 3)
+        self.assertEqual(body["total_cells"], 60)
+        self.assertEqual(body["versions"], {"Sheet1": version})
+
+        preview = self.client.get("/api/preview_data").json()
+        self.assertEqual(preview["version"], version)
+
+    def test_invalid_requests(self):
+        self.upload(csv_file(_contacts()))
+        for body in (
+            {"tasks": []},
+            {"tasks": ["foo"]},
+            {"tasks": [EMAIL], "sample_rows": "many"},
+            {"tasks": [EMAIL], "sample_rows": 0},
+        ):
+            response = self.post_json("/api/explain", body)
+            self.assertEqual(response.status_code, 400, body)
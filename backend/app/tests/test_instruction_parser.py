@@ -0,0 +1,62 @@
+# app/tests/test_instruction_parser.py
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from app.utils.instruction_parser import parse_instruction
+from app.utils.task_expander import expand_task
+
+COLUMNS = ["Name", "Email", "Phone", "Date"]
+
+
+class InstructionParserTargetTests(SimpleTestCase):
+    def _targets(self, description):
+        return [task["target"] for task in parse_instruction(description, COLUMNS)]
+
+    def test_whole_sheet(self):
+        for phrase in ("", " in all rows", " across the whole sheet", " everywhere"):
+            self.assertEqual(self._targets(f"redact emails{phrase}"), ["all"])
+
+    def test_columns_by_name_and_letter(self):
+        self.assertEqual(self._targets("redact emails in column Email"), ["column 1"])
+        self.assertEqual(self._targets("remove dates from columns B and C"), ["column 1", "column 2"])
+        self.assertEqual(self._targets("mask phones in the Phone column"), ["column 2"])
+
+    def test_rows(self):
+        self.assertEqual(self._targets("remove dates in row 3"), ["row 3"])
+        self.assertEqual(self._targets("remove dates in rows 2 to 4"), ["row 2 to 4"])
+        self.assertEqual(self._targets("mask emails in the first 3 rows"), ["row 1 to 3"])
+
+    def test_every_clause_is_expanded(self):
+        tasks = parse_instruction(
+            "hide phone numbers in all rows and remove dates from columns B and C", COLUMNS
+        )
+        self.assertEqual(
+            [(t["target"], t["regex"], t["replacement"]) for t in tasks],
+            [("all", "@au_phone", "[phone]"), ("column 1", "@date", ""), ("column 2", "@date", "")],
+        )
+
+    def test_unknown_targets_fall_back_to_the_llm(self):
+        for description in (
+            "redact emails in column Nope",
+            "redact emails in column E",
+            "mask emails in the first 0 rows",
+            "remove dates in row 0",
+            "remove dates in rows 0 to 3",
+            "remove dates in rows 4 to 2",
+            "redact emails in the header",
+            "replace emails",
+            "summarise the sheet",
+        ):
+            self.assertIsNone(parse_instruction(description, COLUMNS), description)
+
+    def test_targets_are_accepted_by_expand_task(self):
+        df = pd.DataFrame([["a", "b", "c", "d"]] * 5, columns=COLUMNS)
+        for description in (
+            "redact emails",
+            "remove dates from columns B and C",
+            "remove dates in rows 2 to 4",
+            "mask emails in the first 3 rows",
+        ):
+            for task in parse_instruction(description, COLUMNS):
+                self.assertTrue(expand_task(df, task), task)
@@ -0,0 +1,75 @@
+# app/tests/test_jobs.py
+
+import json
+import time
+
+import pandas as pd
+from asgiref.sync import async_to_sync
+from django.test import Client
+
+from app.tests.helpers import ApiTestCase, csv_file
+
+
+def _contacts() -> pd.DataFrame:
+    return pd.DataFrame({"Name": ["a", "b"], "Email": ["a@x.com", "b@y.org"]})
+
+
+async def _read_stream(response) -> bytes:
+    # The event stream is an async iterator, as served under ASGI
+    return b"".join([chunk async for chunk in response.streaming_content])
+
+
+class BackgroundJobTests(ApiTestCase):
+    def _start(self, client=None) -> dict:
+        response = (client or self.client).post(
+            "/api/generate_tasks",
+            json.dumps({"description": "redact emails in column Email", "background": True}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 202, response.content)
+        return response.json()
+
+    def _wait(self, url: str) -> dict:
+        deadline = time.monotonic() + 10
+        while True:
+            job = self.client.get(url).json()
+            if job["status"] in ("succeeded", "failed") or time.monotonic() > deadline:
+                return job
+            time.sleep(0.02)
+
+    def test_background_generate_returns_a_job(self):
+        self.upload(csv_file(_contacts()))
+        started = self._start()
+        self.assertEqual(started["status_url"], f"/api/jobs/{started['job_id']}")
+
+        job = self._wait(started["status_url"])
+        self.assertEqual(job["status"], "succeeded", job)
+        self.assertEqual(job["kind"], "generate_tasks")
+        self.assertEqual(job["result"]["tasks"][0]["regex"], "@email")
+
+    def test_jobs_are_private_to_their_session(self):
+        self.upload(csv_file(_contacts()))
+        started = self._start()
+
+        other = Client()
+        other.post("/api/upload", {"file": csv_file(_contacts())})
+        self.assertEqual(other.get(started["status_url"]).status_code, 404)
+        self.assertEqual(other.get(started["events_url"]).status_code, 404)
+        self.assertEqual(self.client.get("/api/jobs/nope").status_code, 404)
+
+    def test_event_stream_ends_after_the_final_state(self):
+        self.upload(csv_file(_contacts()))
+        started = self._start()
+        response = self.client.get(started["events_url"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        body = async_to_sync(_read_stream)(response).decode()
+        events = [
+            json.loads(block.split("data: ", 1)[1])
+            for block in body.split("\n\n")
+            if block.startswith("event: status")
+        ]
+        self.assertEqual(events[-1]["status"], "succeeded")
+        self.assertIn("result", events[-1])
+        self.assertTrue(all(e["status"] != "succeeded" for e in events[:-1]))
@@ -0,0 +1,73 @@
+# app/tests/test_metrics.py
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from app.utils import metrics
+
+
+def _exited_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+class MetricsFilesTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.dir = self._tmp.name
+        settings = override_settings(METRICS_DIR=self.dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def _write(self, pid: int, start: int, entries):
+        path = os.path.join(self.dir, f"metrics_{pid}_{start}.json")
+        with open(path, "w") as f:
+            json.dump(entries, f)
+        return path
+
+    def test_exited_process_is_retired_once(self):
+        path = self._write(
+            _exited_pid(),
+            1,
+            [
+                ["batch_size_files", [["test", "retired"]], [1, 1, 1, 1, 1, 1, 1, 1, 5.0, 1]],
+                ["batch_files_total", [["status", "retired-test"]], 3],
+                ["dataset_store_bytes", [["tier", "retired-test"]], 7],
+            ],
+        )
+        for _ in range(2):
+            merged = metrics.collect()
+            self.assertEqual(merged[("batch_files_total", (("status", "retired-test"),))], 3)
+            self.assertNotIn(("dataset_store_bytes", (("tier", "retired-test"),)), merged)
+            self.assertEqual(merged[("batch_size_files", (("test", "retired"),))][-1], 1)
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(os.path.join(self.dir, "metrics_retired.json")))
+
+    def test_reused_pid_is_told_apart_by_start_time(self):
+        pid, start = metrics._own_identity()
+        if metrics._process_start(pid) is None:
+            self.skipTest("needs /proc")
+        stale = self._write(pid, start + 1, [["batch_files_total", [["status", "reused-pid"]], 2]])
+        merged = metrics.collect()
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(metrics._own_path()))
+        self.assertEqual(merged[("batch_files_total", (("status", "reused-pid"),))], 2)
+
+    def test_recording_does_not_write_on_the_calling_thread(self):
+        callers = []
+        with mock.patch.object(
+            metrics, "flush", side_effect=lambda: callers.append(threading.current_thread())
+        ):
+            metrics.inc("dataset_spills_total")
+            metrics.observe("batch_size_files", 3)
+        self.assertNotIn(threading.current_thread(), callers)
+        self.assertTrue(metrics._flusher.is_alive())
@@ -0,0 +1,149 @@
+# app/tests/test_openai_client.py
+
+import asyncio
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+import app.utils.openai_client as openai_client
+from app.utils.openai_client import (
+    FakeBackend,
+    aget_regex_tasks_from_nl,
+    cache_key,
+    get_cache,
+    get_llm_stats,
+    get_regex_tasks_from_nl,
+    set_backend,
+)
+
+TASK = {"target": "all", "regex": "@email", "replacement": "[email]"}
+
+
+class _ScriptedBackend:
+    """
+    Answers every prompt with the given content and counts the calls.
+    """
+
+    model = "scripted"
+
+    def __init__(self, content: str):
+        self.content = content
+        self.calls = 0
+
+    async def complete(self, prompt: str, description: str) -> str:
+        self.calls += 1
+        return self.content
+
+
+class LLMClientTestCase(SimpleTestCase):
+    """
+    Test case with its own LLM response cache and no backend set.
+    """
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        overrides = override_settings(
+            LLM_CACHE_ENABLED=True, LLM_CACHE_PATH=os.path.join(tmp.name, "llm.sqlite3")
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        openai_client._cache = None
+        self.addCleanup(setattr, openai_client, "_cache", None)
+        set_backend(None)
+        self.addCleanup(set_backend, None)
+
+
+class ReplyValidationTests(LLMClientTestCase):
+    def test_malformed_replies_are_rejected_and_not_cached(self):
+        for content in (
+            json.dumps({"tasks": [TASK]}),
+            json.dumps(["redact emails"]),
+            json.dumps([{"target": "all", "regex": "@email"}]),
+            json.dumps([]),
+        ):
+            backend = _ScriptedBackend(content)
+            set_backend(backend)
+            for _ in range(2):
+                with self.assertRaises(ValueError, msg=content):
+                    get_regex_tasks_from_nl("redact emails", ["Email"])
+            # Retries reach the model again
+            self.assertEqual(backend.calls, 2, content)
+            self.assertIsNone(get_cache().get(cache_key("redact emails", ["Email"])))
+
+    def test_well_formed_reply_is_cached(self):
+        backend = _ScriptedBackend(json.dumps([TASK]))
+        set_backend(backend)
+        for _ in range(2):
+            self.assertEqual(get_regex_tasks_from_nl("redact emails", ["Email"]), [TASK])
+        self.assertEqual(backend.calls, 1)
+
+    def test_cache_hit_needs_no_api_key(self):
+        with mock.patch.dict(os.environ, {"LLM_BACKEND": "openai"}):
+            os.environ.pop("OPENAI_API_KEY", None)
+            get_cache().set(cache_key("redact emails", ["Email"]), [TASK])
+            self.assertEqual(get_regex_tasks_from_nl("redact emails", ["Email"]), [TASK])
+            with self.assertRaises(EnvironmentError):
+                get_regex_tasks_from_nl("redact phones", ["Email"])
+        self.assertIsNone(openai_client._backend)
+
+
+class _CountingFakeBackend(FakeBackend):
+    def __init__(self, latency: float):
+        super().__init__(latency=latency)
+        self.calls = 0
+
+    async def complete(self, prompt: str, description: str) -> str:
+        self.calls += 1
+        return await super().complete(prompt, description)
+
+
+class SingleFlightTests(LLMClientTestCase):
+    def setUp(self):
+        super().setUp()
+        # Every request has to reach the backend (or join the one that does)
+        overrides = override_settings(LLM_CACHE_ENABLED=False)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_concurrent_identical_requests_share_one_call(self):
+        backend = _CountingFakeBackend(latency=0.3)
+        set_backend(backend)
+        before = get_llm_stats()
+
+        async def ask_all(n):
+            return await asyncio.gather(
+                *(aget_regex_tasks_from_nl("redact emails", ["Email"]) for _ in range(n))
+            )
+
+        results = asyncio.run(ask_all(5))
+        stats = get_llm_stats()
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(stats["requests"] - before["requests"], 5)
+        self.assertEqual(stats["coalesced"] - before["coalesced"], 4)
+        self.assertEqual(stats["inflight"], 0)
+
+        self.assertEqual(results[0], [TASK])
+        results[0][0]["target"] = "column 1"
+        self.assertTrue(all(r == [TASK] for r in results[1:]))
+        self.assertEqual(len({id(r[0]) for r in results}), 5)
+
+    def test_cancelled_waiter_does_not_cancel_the_shared_call(self):
+        backend = _CountingFakeBackend(latency=0.3)
+        set_backend(backend)
+
+        async def cancel_one():
+            first = asyncio.ensure_future(aget_regex_tasks_from_nl("redact emails", ["Email"]))
+            second = asyncio.ensure_future(aget_regex_tasks_from_nl("redact emails", ["Email"]))
+            await asyncio.sleep(0.1)
+            first.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await first
+            return await second
+
+        self.assertEqual(asyncio.run(cancel_one()), [TASK])
+        self.assertEqual(backend.calls, 1)
@@ -0,0 +1,32 @@
+# app/tests/test_pattern_library.py
+
+from django.test import SimpleTestCase
+
+from app.utils.pattern_library import LIBRARY, get_pattern, pattern_class_of, resolve_pattern
+
+
+class PatternLibraryTests(SimpleTestCase):
+    def test_examples_match(self):
+        for name, entry in LIBRARY.items():
+            for example in entry.examples:
+                self.assertTrue(get_pattern(name).search(f"x {example} y"), (name, example))
+                self.assertTrue(get_pattern(name, anchored=True).fullmatch(example), (name, example))
+
+    def test_phone_boundaries(self):
+        mobile, landline = get_pattern("au_mobile"), get_pattern("au_landline")
+        self.assertEqual(mobile.sub("#", "call 0412 345 678 now"), "call # now")
+        self.assertEqual(mobile.sub("#", "+61 412 345 678 or 61412345678"), "# or #")
+        # Part of a longer number
+        self.assertIsNone(mobile.search("10412345678"))
+        self.assertIsNone(mobile.search("04123456789"))
+        self.assertIsNone(mobile.search("02 9876 5432"))
+        self.assertEqual(landline.sub("#", "(02) 9876 5432, +61 7 3123 4567"), "#, #")
+        self.assertIsNone(landline.search("0412 345 678"))
+
+    def test_references(self):
+        self.assertIs(resolve_pattern("@email"), get_pattern("email"))
+        self.assertIs(resolve_pattern(" @abn:anchored "), get_pattern("abn", anchored=True))
+        self.assertEqual(resolve_pattern(r"\d+"), r"\d+")
+        self.assertEqual(pattern_class_of(get_pattern("au_mobile")), "phone")
+        with self.assertRaises(ValueError):
+            resolve_pattern("@nope")
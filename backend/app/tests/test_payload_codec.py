@@ -0,0 +1,84 @@
+# app/tests/test_payload_codec.py
+
+import json
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from app.utils.payload_codec import CODECS, PayloadCompressor, detect_codec, get_codec, get_compressor
+from app.utils.shared_dataset_store import SharedFileStore
+
+PAYLOAD = json.dumps({"email": {str(i): f"user{i}@example.com" for i in range(200)}})
+
+AVAILABLE = [name for name, codec in CODECS.items() if codec.available()]
+
+
+class PayloadCodecTests(SimpleTestCase):
+    def test_round_trip_every_available_codec(self):
+        for name in AVAILABLE:
+            with self.subTest(codec=name):
+                compressor = PayloadCompressor(name)
+                encoded = compressor.encode(PAYLOAD)
+                self.assertIs(detect_codec(encoded), CODECS[name])
+                self.assertEqual(compressor.decode(encoded), PAYLOAD)
+                # Any compressor decodes any codec, as does a memory view
+                self.assertEqual(PayloadCompressor("none").decode(memoryview(encoded)), PAYLOAD)
+                if name != "none":
+                    self.assertLess(len(encoded), len(PAYLOAD))
+                    self.assertTrue(CODECS[name].extension)
+
+    def test_detect_plain_and_zlib(self):
+        self.assertIs(detect_codec(PAYLOAD.encode("ascii")), CODECS["none"])
+        self.assertIs(detect_codec(b""), CODECS["none"])
+        self.assertIs(detect_codec(PayloadCompressor("zlib").encode(PAYLOAD)), CODECS["zlib"])
+
+    def test_detect_zstd_and_lz4(self):
+        for name in ("zstd", "lz4"):
+            with self.subTest(codec=name):
+                codec = CODECS[name]
+                if codec.available():
+                    self.assertIs(detect_codec(PayloadCompressor(name).encode(PAYLOAD)), codec)
+                else:
+                    # A payload from a deployment with the codec is recognised, not misread as JSON
+                    with self.assertRaisesRegex(ValueError, "not installed"):
+                        detect_codec(codec.MAGIC + b"\x00" * 8)
+
+    def test_get_codec(self):
+        self.assertIn(get_codec().name, AVAILABLE)
+        self.assertNotEqual(get_codec().name, "none")
+        with self.assertRaisesRegex(ValueError, "Unknown"):
+            get_codec("brotli")
+        for name in ("zstd", "lz4"):
+            if not CODECS[name].available():
+                with self.assertRaisesRegex(ValueError, "not installed"):
+                    get_codec(name)
+
+    @override_settings(DATASET_COMPRESSION="zlib", DATASET_COMPRESSION_LEVEL="6")
+    def test_get_compressor_reads_settings(self):
+        compressor = get_compressor()
+        self.assertEqual((compressor.codec.name, compressor.level), ("zlib", 6))
+
+    @override_settings(DATASET_COMPRESSION="zlib", DATASET_COMPRESSION_LEVEL="")
+    def test_get_compressor_default_level(self):
+        self.assertEqual(get_compressor().level, CODECS["zlib"].default_level)
+
+    def test_payload_stored_before_a_codec_change_stays_readable(self):
+        with tempfile.TemporaryDirectory() as directory:
+            options = dict(
+                directory=directory,
+                memory_max_bytes=0,
+                session_quota=1_000_000,
+                global_quota=10_000_000,
+                ttl=3600,
+                spill_after=600,
+            )
+            old = SharedFileStore(compressor=PayloadCompressor("none"), **options)
+            old.put("a", "working", PAYLOAD)
+
+            for name in AVAILABLE:
+                with self.subTest(codec=name):
+                    store = SharedFileStore(compressor=PayloadCompressor(name), **options)
+                    self.assertEqual(store.get("a", "working"), PAYLOAD)
+            store = SharedFileStore(compressor=PayloadCompressor("zlib"), **options)
+            store.put("a", "original", PAYLOAD)
+            self.assertEqual(old.get("a", "original"), PAYLOAD)
@@ -0,0 +1,119 @@
+# app/tests/test_redos_guard.py
+
+import re
+import time
+
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from app.services.replace_service import _isolated_frame, apply_tasks
+from app.services.task_planner import plan_task
+from app.utils.redos_guard import TaskTimeoutError, analyze_pattern, run_with_time_budget
+from app.utils.trigram_index import TrigramIndex
+
+# Nested quantifier: flagged by the analysis, exponential on "aaa...b"
+NESTED = r"(a+)+$"
+# Polynomial backtracking the static analysis does not recognize
+POLYNOMIAL = r"\d*\d*\d*\d*\d*x"
+
+
+def _search(source: str, text: str):
+    return bool(re.search(source, text))
+
+
+def _fail():
+    raise KeyError("boom")
+
+
+class RunWithTimeBudgetTests(SimpleTestCase):
+    def test_returns_the_result(self):
+        self.assertTrue(run_with_time_budget(_search, ("a+", "caat"), 10))
+
+    def test_kills_a_worker_over_budget(self):
+        start = time.perf_counter()
+        with self.assertRaises(TaskTimeoutError):
+            run_with_time_budget(_search, (NESTED, "a" * 40 + "b"), 0.5)
+        self.assertLess(time.perf_counter() - start, 5)
+
+    def test_worker_errors_are_reported(self):
+        with self.assertRaisesRegex(RuntimeError, "KeyError"):
+            run_with_time_budget(_fail, (), 10)
+
+
+class AnalyzePatternTests(SimpleTestCase):
+    def test_flags_nested_quantifiers_and_overlapping_alternations(self):
+        self.assertTrue(analyze_pattern(NESTED))
+        self.assertTrue(analyze_pattern(r"(\w+\s?)*$"))
+        overlapping = "quantified alternation with overlapping branches"
+        for source in (r"(a|ab)*", r"(?:a|a)*$", r"(\w|\d)+$", r"(?i)(?:a|A)+$", r"(?:ab|cd|)+$"):
+            self.assertIn(overlapping, analyze_pattern(source), source)
+        for source in (r"[\w.]+@\w+\.com", r"(?:foo|bar)+$", r"(\d|x)+$", r"(x(?:y|z)w)*"):
+            self.assertEqual(analyze_pattern(source), [], source)
+
+    def test_overlapping_alternation_is_isolated(self):
+        plan = plan_task(
+            pd.DataFrame({"A": ["a" * 24 + "!"]}),
+            {"target": "all", "regex": r"(?:a|a)*$", "replacement": "-", "engine": "re"},
+        )
+        self.assertTrue(plan["isolated"])
+
+    def test_polynomial_patterns_are_not_flagged(self):
+        # Documented limit: only REGEX_TASK_ISOLATION="always" bounds these
+        self.assertEqual(analyze_pattern(POLYNOMIAL), [])
+
+
+@override_settings(REGEX_TASK_TIME_BUDGET=0.5, REGEX_ENGINE="re")
+class IsolatedTaskTests(SimpleTestCase):
+    def _df(self):
+        return pd.DataFrame(
+            {
+                "Name": ["ann", "bob", "aaaa"],
+                "Code": ["1" * 120, "22", "a" * 40 + "b"],
+                "Email": ["ann@x.com", None, "c@y.org"],
+            }
+        )
+
+    def test_flagged_task_times_out_and_leaves_data(self):
+        df = self._df()
+        reports = []
+        apply_tasks(df, [{"target": "column Code", "regex": NESTED, "replacement": "-"}], reports=reports)
+        self.assertEqual(reports[0]["status"], "timed_out")
+        self.assertTrue(df.equals(self._df()))
+
+    def test_unflagged_slow_task_is_only_bounded_with_always(self):
+        df = self._df()
+        task = {"target": "column Code", "regex": POLYNOMIAL, "replacement": "-"}
+        self.assertFalse(plan_task(df, task)["isolated"])
+        with override_settings(REGEX_TASK_ISOLATION="always"):
+            self.assertTrue(plan_task(df, task)["isolated"])
+            reports = []
+            apply_tasks(df, [task], reports=reports)
+        self.assertEqual(reports[0]["status"], "timed_out")
+
+    def test_isolated_results_match_in_process_results(self):
+        tasks = [
+            {"target": "column Email", "regex": r"\w+\.(com|org)", "replacement": "hidden"},
+            {"target": "cell A2", "regex": "b", "replacement": "B"},
+            {"target": "column 0", "regex": "^a+$", "replacement": "A"},
+        ]
+        expected_df = self._df()
+        expected = apply_tasks(expected_df, tasks)
+
+        df = self._df()
+        index = TrigramIndex()
+        self.assertEqual(index.candidate_rows(df, "Email", re.compile("hidden")), set())
+        with override_settings(REGEX_TASK_ISOLATION="always"):
+            replacements = apply_tasks(df, tasks, index=index)
+        self.assertEqual(replacements, expected)
+        self.assertTrue(df.equals(expected_df))
+        # The parent applied the worker's writes to the index
+        self.assertEqual(index.candidate_rows(df, "Email", re.compile("hidden")), {0, 2})
+
+    def test_worker_gets_only_the_columns_it_reads(self):
+        df = self._df()
+        frame = _isolated_frame(df, [{"target": "column Email"}, {"target": "cell 0,1"}])
+        self.assertEqual(list(frame.columns), list(df.columns))
+        self.assertTrue(frame["Name"].isna().all())
+        self.assertTrue(frame["Email"].equals(df["Email"]))
+        self.assertTrue(frame["Code"].equals(df["Code"]))
+        self.assertIs(_isolated_frame(df, [{"target": "row 1"}]), df)
@@ -0,0 +1,70 @@
+# app/tests/test_regex_engines.py
+
+import re
+from unittest import skipUnless
+
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from app.services.replace_service import apply_tasks
+from app.services.task_planner import plan_task
+from app.utils.regex_utils import ENGINES, compile_pattern, select_engine
+
+HAS_RE2 = ENGINES["re2"].available()
+HAS_REGEX = ENGINES["regex"].available()
+
+
+@override_settings(REGEX_ENGINE="auto")
+class SelectEngineTests(SimpleTestCase):
+    def test_plain_patterns_use_re(self):
+        self.assertEqual(select_engine(r"\d{4}").name, "re")
+        self.assertEqual(select_engine(re.compile("a")).name, "re")
+
+    def test_non_string_patterns_are_rejected(self):
+        for pattern in (None, 5, ["a"]):
+            with self.assertRaisesRegex(ValueError, "must be a string"):
+                select_engine(pattern)
+
+    @skipUnless(HAS_REGEX, "regex is not installed")
+    def test_regex_only_syntax_uses_regex(self):
+        self.assertEqual(select_engine(r"\p{Lu}+").name, "regex")
+        self.assertEqual(select_engine(compile_pattern(r"\p{Lu}+")).name, "regex")
+
+    def test_explicit_engine_must_support_the_pattern(self):
+        with self.assertRaises(ValueError):
+            select_engine(r"(?<=a)b", "re2" if HAS_RE2 else "nope")
+
+    @skipUnless(HAS_RE2, "google-re2 is not installed")
+    def test_risky_patterns_go_to_re2_only_when_it_matches_like_re(self):
+        self.assertEqual(select_engine(r"(a+)+b").name, "re2")
+        # RE2's \d, \w, \s, \b are ASCII-only and its $ ignores a trailing newline
+        for source in (r"(\d+)+x", r"(\w+\s?)+", r"(a+)+$", r"\b(a+)+", r"(a+)+\Z"):
+            self.assertEqual(select_engine(source).name, "re", source)
+        # Asking for RE2 explicitly is allowed when it compiles
+        self.assertEqual(select_engine(r"(\d+)+x", "re2").name, "re2")
+        with self.assertRaises(ValueError):
+            select_engine(r"a\Z", "re2")
+
+    @skipUnless(HAS_RE2, "google-re2 is not installed")
+    def test_auto_routing_does_not_change_replacements(self):
+        df = pd.DataFrame({"Value": ["١٢٣x", "café x", "aaa\n"]})
+        tasks = [
+            {"target": "column Value", "regex": r"(\d+)+x", "replacement": "#"},
+            {"target": "column Value", "regex": r"(\w+)+ x", "replacement": "#"},
+            {"target": "column Value", "regex": r"(a+)+$", "replacement": "#"},
+        ]
+        apply_tasks(df, tasks)
+        self.assertEqual(df["Value"].tolist(), ["#", "#", "#\n"])
+
+
+class PlanRegexValidationTests(SimpleTestCase):
+    def test_non_string_regex_is_a_task_error(self):
+        df = pd.DataFrame({"A": ["x"]})
+        for regex in (None, 5, {"a": 1}):
+            plan = plan_task(df, {"target": "all", "regex": regex, "replacement": ""})
+            self.assertEqual(plan["status"], "error")
+            self.assertIn("must be a string", plan["detail"])
+        reports = []
+        apply_tasks(df, [{"target": "all", "regex": None, "replacement": ""}], reports=reports)
+        self.assertEqual(reports[0]["status"], "error")
+        self.assertIsNone(reports[0]["engine"])
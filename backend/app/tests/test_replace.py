@@ -0,0 +1,99 @@
+# app/tests/test_replace.py
+
+import threading
+from unittest import mock
+
+import pandas as pd
+from django.test import Client, override_settings
+
+import app.views.replace as replace_view
+from app.tests.helpers import ApiTestCase, csv_file
+from app.utils.single_flight import SingleFlight
+
+TASKS = [{"target": "all", "regex": r"[\w.]+@[\w.]+", "replacement": "[email]"}]
+
+
+def _contacts() -> pd.DataFrame:
+    return pd.DataFrame({"Name": ["Ann", "Bob"], "Email": ["ann@x.com", "bob@y.org"]})
+
+
+class _CountingSingleFlight(SingleFlight):
+    def __init__(self):
+        super().__init__()
+        self.callers = 0
+
+    def run(self, key, func):
+        self.callers += 1
+        return super().run(key, func)
+
+
+class ReplaceVersionTests(ApiTestCase):
+    def test_stale_version_is_rejected(self):
+        version = self.upload(csv_file(_contacts()))["version"]
+        first = self.post_json("/api/replace", {"tasks": TASKS, "version": version})
+        self.assertEqual(first.status_code, 200)
+        self.assertNotEqual(first.json()["version"], version)
+
+        stale = self.post_json("/api/replace", {"tasks": TASKS, "version": version})
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.json()["version"], first.json()["version"])
+
+    def test_malformed_versions_are_rejected(self):
+        self.upload(csv_file(_contacts()))
+        for body in (
+            {"tasks": TASKS, "versions": ["abc"]},
+            {"tasks": TASKS, "versions": "abc"},
+            {"tasks": TASKS, "versions": {"": 3}},
+            {"tasks": TASKS, "version": 3},
+        ):
+            response = self.post_json("/api/replace", body)
+            self.assertEqual(response.status_code, 400, body)
+
+
+# Signed-cookie sessions need no database, so concurrent requests can run in threads
+@override_settings(SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies")
+class ReplaceDeduplicationTests(ApiTestCase):
+    def test_identical_requests_in_flight_share_one_apply(self):
+        version = self.upload(csv_file(_contacts()))["version"]
+        flight = _CountingSingleFlight()
+        entered, release = threading.Event(), threading.Event()
+        original = replace_view.apply_tasks_to_payload
+
+        def blocking_apply(*args, **kwargs):
+            entered.set()
+            release.wait(10)
+            return original(*args, **kwargs)
+
+        responses = []
+
+        def post():
+            client = Client()
+            client.cookies = self.client.cookies
+            responses.append(
+                client.post(
+                    "/api/replace",
+                    {"tasks": TASKS, "version": version},
+                    content_type="application/json",
+                )
+            )
+
+        with mock.patch.object(replace_view, "_applies", flight), mock.patch.object(
+            replace_view, "apply_tasks_to_payload", side_effect=blocking_apply
+        ) as apply:
+            leader = threading.Thread(target=post)
+            leader.start()
+            self.assertTrue(entered.wait(10))
+            follower = threading.Thread(target=post)
+            follower.start()
+            while flight.callers < 2 and follower.is_alive():
+                follower.join(0.01)
+            release.set()
+            leader.join(10)
+            follower.join(10)
+
+        self.assertEqual(apply.call_count, 1)
+        self.assertEqual([r.status_code for r in responses], [200, 200])
+        bodies = [r.json() for r in responses]
+        self.assertEqual(sorted(bool(b.get("deduplicated")) for b in bodies), [False, True])
+        self.assertEqual(bodies[0]["version"], bodies[1]["version"])
+        self.assertEqual(bodies[0]["total_replacements"], 2)
@@ -0,0 +1,60 @@
+# app/tests/test_scan.py
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from app.services.scan_service import scan_dataframe
+from app.tests.helpers import ApiTestCase, csv_file
+
+
+def _contacts() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Name": ["Ann", "Bob", "Cy"],
+            "Email": ["ann@example.com", "bob@example.org", None],
+            "Notes": ["call +61 412 345 678", "ABN 12 345 678 901, joined 31/12/2024", "NSW 2000"],
+        }
+    )
+
+
+class ScanDataFrameTests(SimpleTestCase):
+    def test_detects_each_class(self):
+        result = scan_dataframe(_contacts())
+        self.assertEqual(
+            result["counts"], {"email": 2, "phone": 1, "abn": 1, "date": 1, "postcode": 1}
+        )
+        self.assertEqual(result["by_column"]["Email"], {"email": 2})
+        self.assertNotIn("Name", result["by_column"])
+        location = result["locations"]["phone"][0]
+        self.assertEqual((location["row"], location["column"]), (1, "Notes"))
+        self.assertEqual(location["match"], "+61 412 345 678")
+        self.assertEqual(result["cells_scanned"], 8)
+
+    def test_types_subset_and_limits(self):
+        result = scan_dataframe(_contacts(), types=["email"], max_locations=1)
+        self.assertEqual(result["counts"], {"email": 2})
+        self.assertEqual(len(result["locations"]["email"]), 1)
+        self.assertTrue(result["truncated"]["email"])
+
+    def test_rejects_empty_and_unknown_types(self):
+        for types in ([], ["ssn"], [["email"]], [{"a": 1}]):
+            with self.assertRaises(ValueError):
+                scan_dataframe(_contacts(), types=types)
+
+
+class ScanViewTests(ApiTestCase):
+    def test_scan(self):
+        self.upload(csv_file(_contacts()))
+        response = self.post_json("/api/scan", {"types": ["email", "phone"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["counts"], {"email": 2, "phone": 1})
+
+    def test_invalid_types_are_rejected(self):
+        self.upload(csv_file(_contacts()))
+        # Also without a stored profile, which used to reach the scan loop
+        session = self.client.session
+        session.pop("column_profiles", None)
+        session.save()
+        for types in ([], "email", ["ssn"], [["email"]], [{"a": 1}], [None]):
+            response = self.post_json("/api/scan", {"types": types})
+            self.assertEqual(response.status_code, 400, types)
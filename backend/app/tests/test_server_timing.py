@@ -0,0 +1,74 @@
+# app/tests/test_server_timing.py
+
+import asyncio
+
+import pandas as pd
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, override_settings
+
+from app.middleware import ServerTimingMiddleware
+from app.tests.helpers import ApiTestCase, csv_file
+from app.utils.stage_timer import server_timing_header, stage
+
+
+def _view(request):
+    with stage("parse"):
+        pass
+    with stage("regex"):
+        pass
+    with stage("regex"):
+        pass
+    return HttpResponse("ok")
+
+
+async def _async_view(request):
+    with stage("llm"):
+        await asyncio.sleep(0)
+    return HttpResponse("ok")
+
+
+def _stage_names(header: str):
+    return [part.split(";")[0] for part in header.split(", ")]
+
+
+class ServerTimingMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/api/preview_data")
+
+    def test_sampled_request_gets_its_stages(self):
+        with override_settings(SERVER_TIMING_SAMPLE_RATE=1.0):
+            response = ServerTimingMiddleware(_view)(self.request)
+        self.assertEqual(_stage_names(response["Server-Timing"]), ["parse", "regex", "total"])
+
+    def test_rate_zero_adds_nothing(self):
+        with override_settings(SERVER_TIMING_SAMPLE_RATE=0.0):
+            response = ServerTimingMiddleware(_view)(self.request)
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    def test_async_path(self):
+        with override_settings(SERVER_TIMING_SAMPLE_RATE=1.0):
+            middleware = ServerTimingMiddleware(_async_view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        response = asyncio.run(middleware(self.request))
+        self.assertEqual(_stage_names(response["Server-Timing"]), ["llm", "total"])
+
+        with override_settings(SERVER_TIMING_SAMPLE_RATE=0.0):
+            middleware = ServerTimingMiddleware(_async_view)
+        response = asyncio.run(middleware(self.request))
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    def test_header_tokens_are_sanitized(self):
+        self.assertEqual(
+            server_timing_header({"dataset load": 1.5, "total": 2}),
+            "dataset_load;dur=1.5, total;dur=2",
+        )
+
+
+class ServerTimingRequestTests(ApiTestCase):
+    def test_upload_reports_its_stages(self):
+        with override_settings(SERVER_TIMING_SAMPLE_RATE=1.0):
+            client = Client()
+            response = client.post("/api/upload", {"file": csv_file(pd.DataFrame({"A": [1]}))})
+        names = _stage_names(response["Server-Timing"])
+        for name in ("parse", "profile", "dataset_save", "session_save", "total"):
+            self.assertIn(name, names)
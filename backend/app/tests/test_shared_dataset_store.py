@@ -0,0 +1,106 @@
+# app/tests/test_shared_dataset_store.py
+
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+import app.utils.shared_dataset_store as shared_dataset_store
+from app.utils.dataset_store import DatasetQuotaError, DatasetVersionConflict
+from app.utils.shared_dataset_store import SharedFileStore
+
+
+class SharedFileStoreTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.dir = self._tmp.name
+
+    def _store(self, **overrides) -> SharedFileStore:
+        options = dict(
+            directory=self.dir,
+            memory_max_bytes=10_000,
+            session_quota=1000,
+            global_quota=100_000,
+            ttl=3600,
+            spill_after=600,
+        )
+        options.update(overrides)
+        return SharedFileStore(**options)
+
+    def test_conditional_put(self):
+        store = self._store()
+        version = store.put("a", "working", "one")
+        store.put("a", "working", "two", expected=version)
+        with self.assertRaises(DatasetVersionConflict) as raised:
+            store.put("a", "working", "three", expected=version)
+        self.assertEqual(raised.exception.current, store.get_versioned("a", "working")[1])
+        with self.assertRaises(DatasetVersionConflict) as raised:
+            store.put("a", "original", "x", expected="stale")
+        self.assertIsNone(raised.exception.current)
+        self.assertEqual(store.get("a", "working"), "two")
+
+    def test_put_from_another_process_invalidates_the_hot_cache(self):
+        first, second = self._store(), self._store()
+        first.put("a", "working", "one")
+        self.assertEqual(first.get("a", "working"), "one")
+        self.assertEqual(first.usage()["memory_bytes"], 3)
+
+        version = second.put("a", "working", "two")
+        self.assertEqual(first.get_versioned("a", "working"), ("two", version))
+
+    def test_read_racing_a_replaced_file_retries(self):
+        first, second = self._store(), self._store()
+        first.put("a", "working", "one")
+        read = shared_dataset_store._read_mapped
+        calls = []
+
+        def replaced_meanwhile(path, compressor):
+            calls.append(path)
+            if len(calls) == 1:
+                # A put lands between reading the manifest and opening its file
+                second.put("a", "working", "two")
+            return read(path, compressor)
+
+        reader = self._store()
+        with mock.patch.object(shared_dataset_store, "_read_mapped", side_effect=replaced_meanwhile):
+            self.assertEqual(reader.get("a", "working"), "two")
+        self.assertEqual(len(calls), 2)
+        self.assertNotEqual(calls[0], calls[1])
+
+    def test_quotas(self):
+        store = self._store()
+        store.put("a", "working", "x" * 800)
+        with self.assertRaisesRegex(DatasetQuotaError, "per session"):
+            store.put("a", "original", "x" * 300)
+        # Replacing a dataset only counts the difference
+        store.put("a", "working", "y" * 900)
+        self.assertEqual(store.get("a", "working"), "y" * 900)
+
+        full = self._store(global_quota=store.usage()["disk_bytes"] + 100)
+        with self.assertRaisesRegex(DatasetQuotaError, "full"):
+            full.put("b", "working", "z" * 500)
+
+    def test_sweep(self):
+        store = self._store(spill_after=0)
+        store.put("old", "working", "x")
+        store.put("fresh", "working", "y")
+        old_dir = store._owner_dir("old")
+        stale = time.time() - 7200
+        os.utime(os.path.join(old_dir, "manifest.json"), (stale, stale))
+        orphan = os.path.join(store._owner_dir("fresh"), "left-behind.json")
+        with open(orphan, "w") as f:
+            f.write("{}")
+        os.utime(orphan, (stale, stale))
+
+        result = store.sweep()
+        self.assertEqual(result["evicted"], 1)
+        self.assertEqual(result["orphans"], 1)
+        self.assertFalse(os.path.exists(old_dir))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertIsNone(store.get("old", "working"))
+        # Idle entries leave the hot cache but stay on disk
+        self.assertEqual(store.usage()["datasets"], 0)
+        self.assertEqual(store.get("fresh", "working"), "y")
@@ -0,0 +1,89 @@
+# app/tests/test_trigram_index.py
+
+import random
+import re
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from app.utils.trigram_index import TrigramIndex
+
+
+def _dataset(rows: int = 300) -> pd.DataFrame:
+    rng = random.Random(7)
+    words = ["alpha", "beta", "gamma", "delta", "mail", "phone", "order"]
+    return pd.DataFrame(
+        {
+            "Email": [f"{rng.choice(words)}{i}@{rng.choice(['x.com', 'y.org'])}" for i in range(rows)],
+            "Note": [" ".join(rng.choices(words, k=3)) if i % 5 else None for i in range(rows)],
+            "Amount": [rng.randint(0, 5000) for _ in range(rows)],
+        }
+    )
+
+
+def _matching_rows(df: pd.DataFrame, column, pattern) -> set:
+    return {
+        r for r, value in enumerate(df[column].tolist())
+        if pd.notnull(value) and pattern.search(str(value))
+    }
+
+
+class TrigramIndexTests(SimpleTestCase):
+    patterns = [r"alpha\d+", r"@x\.com", r"mail phone", r"gamma|beta", r"12\d", r"zzz+"]
+
+    def assertCandidatesCover(self, index, df):
+        for column in df.columns:
+            for source in self.patterns:
+                pattern = re.compile(source)
+                expected = _matching_rows(df, column, pattern)
+                candidates = index.candidate_rows(df, column, pattern)
+                if candidates is None:
+                    continue  # no usable trigrams: the caller scans every row
+                self.assertTrue(
+                    expected <= candidates,
+                    f"{source} on {column}: rows {sorted(expected - candidates)} missed",
+                )
+
+    def test_candidates_cover_full_scan(self):
+        df = _dataset()
+        self.assertCandidatesCover(TrigramIndex(), df)
+
+    def test_candidates_narrow_rows(self):
+        df = _dataset()
+        candidates = TrigramIndex().candidate_rows(df, "Email", re.compile(r"@x\.com"))
+        self.assertEqual(candidates, _matching_rows(df, "Email", re.compile(r"@x\.com")))
+        self.assertIsNone(TrigramIndex().candidate_rows(df, "Email", re.compile(r"\d+")))
+
+    def test_updates_keep_candidates_covering(self):
+        df = _dataset()
+        index = TrigramIndex()
+        self.assertCandidatesCover(index, df)
+        rng = random.Random(3)
+        for row in rng.sample(range(len(df)), 60):
+            for column, new in (("Email", f"zzzz{row}@x.com"), ("Note", "mail phone 125")):
+                original = df.at[row, column]
+                if pd.isnull(original):
+                    continue  # replacements never rewrite empty cells
+                df.at[row, column] = new
+                index.update_cell(row, column, str(original), new)
+        self.assertCandidatesCover(index, df)
+
+    def test_copy_does_not_change_the_shared_index(self):
+        df = _dataset()
+        base = TrigramIndex()
+        self.assertCandidatesCover(base, df)
+        preview = base.fork(df)
+
+        # A replace updates its copy while a preview reads the base
+        modified = df.copy()
+        copy = base.copy()
+        for row in range(0, len(df), 3):
+            original = modified.at[row, "Email"]
+            modified.at[row, "Email"] = "gone"
+            copy.update_cell(row, "Email", original, "gone")
+
+        self.assertCandidatesCover(base, df)
+        self.assertCandidatesCover(preview, df)
+        self.assertCandidatesCover(copy, modified)
+        pattern = re.compile(r"@x\.com")
+        self.assertEqual(base.candidate_rows(df, "Email", pattern), _matching_rows(df, "Email", pattern))
@@ -0,0 +1,70 @@
+# app/tests/test_workbook.py
+
+import io
+
+import pandas as pd
+
+from app.tests.helpers import ApiTestCase, xlsx_file
+
+PHONE = r"\d{4} \d{3} \d{3}"
+
+
+def _book() -> dict:
+    return {
+        "Contacts": pd.DataFrame({"Name": ["a", "b"], "Email": ["a@x.com", "b@y.org"]}),
+        "Order List": pd.DataFrame({"id": [1, 2, 3], "Note": ["call 0412 345 678", "x", "y 0499 111 222"]}),
+        "Third": pd.DataFrame({"z": [1]}),
+    }
+
+
+class WorkbookRoundTripTests(ApiTestCase):
+    def _download(self) -> dict:
+        response = self.client.get("/api/download")
+        self.assertEqual(response.status_code, 200)
+        content = (
+            b"".join(response.streaming_content)
+            if hasattr(response, "streaming_content")
+            else response.content
+        )
+        return pd.read_excel(io.BytesIO(content), sheet_name=None)
+
+    def test_upload_replace_download(self):
+        body = self.upload(xlsx_file(_book()))
+        self.assertEqual([s["name"] for s in body["sheets"]], ["Contacts", "Order List", "Third"])
+
+        tasks = [
+            {"target": "sheet 'Order List' column Note", "regex": PHONE, "replacement": "[phone]"},
+            {"target": "column Email", "regex": r"[@][a-z.]+", "replacement": "@redacted"},
+        ]
+        preview = self.post_json("/api/preview_replace", {"tasks": tasks}).json()
+        self.assertEqual(preview["total_matches"], 4)
+
+        response = self.post_json(
+            "/api/replace",
+            {"tasks": tasks, "version": preview["version"], "versions": preview["versions"]},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        result = response.json()
+        self.assertEqual(result["total_replacements"], 4)
+        self.assertEqual(set(result["versions"]), {"Contacts", "Order List"})
+        self.assertEqual({r["sheet"] for r in result["preview"]}, {"Contacts", "Order List"})
+
+        sheets = self._download()
+        self.assertEqual(list(sheets), ["Contacts", "Order List", "Third"])
+        self.assertEqual(sheets["Contacts"]["Email"].tolist(), ["a@redacted", "b@redacted"])
+        self.assertEqual(sheets["Order List"]["Note"].tolist(), ["call [phone]", "x", "y [phone]"])
+        self.assertEqual(sheets["Third"]["z"].tolist(), [1])
+
+    def test_unknown_sheet_is_rejected(self):
+        self.upload(xlsx_file(_book()))
+        response = self.post_json(
+            "/api/replace", {"tasks": [{"target": "sheet Nope column x", "regex": "a", "replacement": "b"}]}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Unknown sheet", response.json()["error"])
+
+    def test_tasks_that_are_not_objects_are_rejected(self):
+        self.upload(xlsx_file(_book()))
+        for url in ("/api/replace", "/api/preview_replace", "/api/explain"):
+            response = self.post_json(url, {"tasks": ["foo"]})
+            self.assertEqual(response.status_code, 400, url)
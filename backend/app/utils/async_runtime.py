@@ -0,0 +1,214 @@
+# app/utils/async_runtime.py
+
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Coroutine, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_process_executor: Optional[ProcessPoolExecutor] = None
+_process_executor_lock = threading.Lock()
+# True in the workers of the process pool, which never start a pool of their own
+_in_worker = False
+# Imported once by the fork server, so each worker it forks starts with them loaded
+_FORKSERVER_PRELOAD = ["pandas"]
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return a long-lived event loop running in a daemon thread.
+
+    Work that must outlive a request (LLM calls shared between requests,
+    background jobs) runs here: under WSGI, or when async views are served
+    through async_to_sync, the request's own loop is torn down afterwards.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="app-background-loop", daemon=True
+            ).start()
+        return _loop
+
+
+def submit(coro: Coroutine) -> Future:
+    """
+    Schedule a coroutine on the background loop and return a concurrent Future.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop())
+
+
+async def run_in_background(coro: Coroutine) -> Any:
+    """
+    Await a coroutine that runs on the background loop, from any event loop.
+    """
+    return await asyncio.wrap_future(submit(coro))
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """
+    Return the shared pool used for CPU-bound work (pandas, regex) called from async views.
+    """
+    from django.conf import settings
+
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "CPU_EXECUTOR_WORKERS", None),
+                thread_name_prefix="app-cpu",
+            )
+        return _executor
+
+
+async def run_cpu(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking function in the CPU executor without blocking the event loop.
+    Context variables (e.g. the request's stage timer) are carried over.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_cpu_executor(), partial(context.run, func, *args, **kwargs)
+    )
+
+
+def get_process_executor() -> ProcessPoolExecutor:
+    """
+    Return the shared pool of worker processes, for CPU-bound work that must
+    run in parallel (the GIL serializes it in threads): parsing workbook
+    sheets, applying tasks to several sheets or files.
+
+    Workers are started from process_context().
+    """
+    global _process_executor
+    with _process_executor_lock:
+        if _process_executor is None:
+            _process_executor = _new_process_executor(process_workers())
+        return _process_executor
+
+
+def process_context():
+    """
+    The multiprocessing context every worker process is started with:
+    forkserver (or spawn), never fork, since forking a server process
+    copies locks held by its other threads (store sweeper, background loop,
+    executors) and the child can deadlock on them. Arguments and results
+    are pickled. The fork server preloads pandas, so starting a worker
+    costs tens of milliseconds.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        # Only used when the fork server starts (on first use)
+        context.set_forkserver_preload(_FORKSERVER_PRELOAD)
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def process_workers() -> int:
+    """
+    Size of the process pool: PROCESS_POOL_WORKERS, or one worker per CPU.
+    """
+    from django.conf import settings
+
+    return getattr(settings, "PROCESS_POOL_WORKERS", None) or os.cpu_count() or 1
+
+
+def map_in_processes(func: Callable, items: Iterable) -> List[Any]:
+    """
+    Return [func(item) for item in items], computed in the process pool.
+    `func` and the items must be picklable. With a single item or a single
+    worker the work runs in this process (the pool would only add copying),
+    as it does inside a worker of the pool.
+    If the pool broke (a worker was killed), it is replaced and the work
+    runs in this process instead.
+    """
+    items = list(items)
+    if not _use_processes(items):
+        return [func(item) for item in items]
+    executor = get_process_executor()
+    try:
+        return list(executor.map(func, items))
+    except BrokenProcessPool:
+        logger.error("Process pool broke; running the work in this process")
+        _discard_process_executor(executor)
+        return [func(item) for item in items]
+
+
+def iter_in_processes(
+    func: Callable, items: Iterable, workers: Optional[int] = None
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Like map_in_processes, but yield (position of the item, result) as each
+    result is ready, so the caller can use the first results while the pool
+    computes the others. If the pool broke, the items still pending run in
+    this process.
+    With `workers`, the items run in a pool of that size of their own (shut
+    down once they are done) instead of the shared pool.
+    """
+    items = list(items)
+    if not _use_processes(items, workers):
+        for position, item in enumerate(items):
+            yield position, func(item)
+        return
+    own_executor = workers is not None
+    executor = _new_process_executor(workers) if own_executor else get_process_executor()
+    futures = {executor.submit(func, item): position for position, item in enumerate(items)}
+    pending = set(futures.values())
+    try:
+        for future in as_completed(futures):
+            result = future.result()
+            pending.discard(futures[future])
+            yield futures[future], result
+    except BrokenProcessPool:
+        logger.error("Process pool broke; running the work in this process")
+        if not own_executor:
+            _discard_process_executor(executor)
+        for position in sorted(pending):
+            yield position, func(items[position])
+    finally:
+        # The caller stopped early (e.g. the client went away): drop queued work
+        for future in futures:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=False)
+
+
+def _use_processes(items: List, workers: Optional[int] = None) -> bool:
+    return len(items) >= 2 and (workers or process_workers()) >= 2 and not _in_worker
+
+
+def _new_process_executor(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=process_context(), initializer=_init_worker
+    )
+
+
+def _discard_process_executor(executor: ProcessPoolExecutor):
+    global _process_executor
+    with _process_executor_lock:
+        if _process_executor is executor:
+            _process_executor = None
+    executor.shutdown(wait=False)
+
+
+def _init_worker():
+    global _in_worker
+    _in_worker = True
+    # Tasks read settings (regex engine, budgets); set Django up once per worker
+    if os.environ.get("DJANGO_SETTINGS_MODULE"):
+        import django
+
+        django.setup()
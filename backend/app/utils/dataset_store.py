@@ -0,0 +1,587 @@
+# app/utils/dataset_store.py
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.utils import metrics
+from app.utils.payload_codec import PayloadCompressor, get_compressor
+
+logger = logging.getLogger(__name__)
+
+# Dataset names within a session
+WORKING = "working"  # the DataFrame tasks are applied to (df.to_json())
+ORIGINAL = "original"  # the upload as records, for downloads before any edit
+
+# Session key holding the id the session's datasets are stored under
+OWNER_KEY = "dataset_owner"
+# Session key listing the sheets of the upload, in workbook order
+SHEETS_KEY = "sheets"
+# Session key of the column profiles of the upload, {sheet name: profile}
+PROFILES_KEY = "column_profiles"
+
+MB = 1024 * 1024
+
+
+class DatasetQuotaError(ValueError):
+    """
+    A dataset does not fit in the per-session or global quota; views answer 413.
+    """
+
+
+class DatasetVersionConflict(ValueError):
+    """
+    A dataset was changed by another request since the version the caller
+    read; views answer 409 with the `current` version.
+    """
+
+    def __init__(self, current: Optional[str]):
+        super().__init__(
+            "The data was changed by another request. Reload it and try again."
+        )
+        self.current = current
+
+
+class _Entry:
+    __slots__ = ("id", "owner", "name", "size", "payload", "path", "last_access", "spilling")
+
+    def __init__(self, owner: str, name: str, payload: str):
+        self.id = uuid.uuid4().hex  # also the version token of the dataset
+        self.owner = owner
+        self.name = name
+        # Payloads are ASCII-escaped JSON, so characters == bytes
+        self.size = len(payload)
+        self.payload: Optional[str] = payload  # None once spilled to disk
+        self.path: Optional[str] = None  # set while spilled
+        self.last_access = time.monotonic()
+        # Set while a spill of this entry is being written, so no other spill picks it
+        self.spilling = False
+
+
+class DatasetStore:
+    """
+    Serialized datasets of all sessions, kept out of the session table.
+
+    Recently used datasets stay in memory; once memory holds more than
+    `memory_max_bytes`, or a dataset has been idle for `spill_after` seconds,
+    it is written to `directory`, compressed by `compressor`, and read back on
+    its next use. Datasets idle for `ttl` seconds are deleted. Each session may hold `session_quota` bytes
+    and the whole store `global_quota` bytes (uncompressed); puts beyond that
+    raise DatasetQuotaError.
+
+    The store lives in process memory: every request of a session must reach
+    the same worker process. With several workers or nodes, use the shared
+    file backend instead (DATASET_STORE_BACKEND = "file", see
+    app.utils.shared_dataset_store).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        memory_max_bytes: int,
+        session_quota: int,
+        global_quota: int,
+        ttl: float,
+        spill_after: float,
+        compressor: Optional[PayloadCompressor] = None,
+    ):
+        self.directory = directory
+        self.memory_max_bytes = memory_max_bytes
+        self.session_quota = session_quota
+        self.global_quota = global_quota
+        self.ttl = ttl
+        self.spill_after = spill_after
+        self.compressor = compressor or PayloadCompressor()
+        # (owner, name) → entry, least recently used first
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._owner_bytes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def put(self, owner: str, name: str, payload: str, expected: Optional[str] = None) -> str:
+        """
+        Store a dataset and return its new version token. See put_many.
+        """
+        versions = self.put_many(
+            owner, {name: payload}, None if expected is None else {name: expected}
+        )
+        return versions[name]
+
+    def put_many(
+        self,
+        owner: str,
+        payloads: Dict[str, str],
+        expected: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, str]:
+        """
+        Store several datasets of one session at once: either all or none are stored.
+        Returns {name: new version token}.
+
+        `expected` ({name: version}) makes the put conditional: it raises
+        DatasetVersionConflict unless those datasets are still at that version.
+        Raises DatasetQuotaError if they do not fit.
+        """
+        entries = [_Entry(owner, name, payload) for name, payload in payloads.items()]
+        with self._lock:
+            stale = [e.path for e in self._evict_expired_locked() if e.path]
+            replaced = [self._entries.get((owner, e.name)) for e in entries]
+            delta = sum(e.size for e in entries) - sum(r.size for r in replaced if r)
+            try:
+                for name, version in (expected or {}).items():
+                    current = self._entries.get((owner, name))
+                    if current is None or current.id != version:
+                        raise DatasetVersionConflict(current.id if current else None)
+                self._check_quota_locked(owner, delta)
+            except ValueError:
+                self._delete_files(stale)
+                raise
+            for entry, old in zip(entries, replaced):
+                if old is not None:
+                    self._remove_locked(old)
+                    if old.path:
+                        stale.append(old.path)
+                self._add_locked(entry)
+            victims = self._pick_victims_locked(protect={e.name for e in entries}, owner=owner)
+        self._delete_files(stale)
+        self._spill(victims)
+        self._publish()
+        return {e.name: e.id for e in entries}
+
+    def get(self, owner: str, name: str) -> Optional[str]:
+        """
+        Return a dataset, reading it back from disk if it was spilled.
+        Returns None if it does not exist or has expired.
+        """
+        found = self.get_versioned(owner, name)
+        return found[0] if found else None
+
+    def get_versioned(self, owner: str, name: str) -> Optional[Tuple[str, str]]:
+        """
+        Return (payload, version token) of a dataset; see get.
+        """
+        with self._lock:
+            entry = self._entries.get((owner, name))
+            if entry is None:
+                return None
+            if self._expired(entry, time.monotonic()):
+                self._remove_locked(entry)
+                metrics.inc("dataset_evictions_total", labels={"reason": "ttl"})
+                stale = [entry.path] if entry.path else []
+                entry = None
+            else:
+                entry.last_access = time.monotonic()
+                self._entries.move_to_end((owner, name))
+                payload, path = entry.payload, entry.path
+        if entry is None:
+            self._delete_files(stale)
+            self._publish()
+            return None
+        if payload is not None:
+            return payload, entry.id
+
+        try:
+            with open(path, "rb") as f:
+                payload = self.compressor.decode(f.read())
+        except (OSError, ValueError) as e:
+            # A concurrent read may have promoted it (and deleted the file) first
+            with self._lock:
+                if entry.payload is not None:
+                    return entry.payload, entry.id
+            logger.error(f"Spilled dataset {entry.id} could not be read: {e}")
+            return None
+
+        with self._lock:
+            # Promote it back to memory unless it was replaced meanwhile
+            victims = []
+            if self._entries.get((owner, name)) is entry and entry.payload is None:
+                entry.payload = payload
+                entry.path = None
+                self._memory_bytes += entry.size
+                victims = self._pick_victims_locked(protect={name}, owner=owner)
+        self._delete_files([path])
+        self._spill(victims)
+        self._publish()
+        return payload, entry.id
+
+    def delete(self, owner: str, name: Optional[str] = None):
+        """
+        Delete one dataset of a session, or all of them.
+        """
+        with self._lock:
+            doomed = [
+                e for (o, n), e in self._entries.items()
+                if o == owner and (name is None or n == name)
+            ]
+            for entry in doomed:
+                self._remove_locked(entry)
+        self._delete_files([e.path for e in doomed if e.path])
+        self._publish()
+
+    def sweep(self) -> Dict[str, int]:
+        """
+        Delete expired datasets and orphaned files, and spill idle datasets to disk.
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = self._evict_expired_locked()
+            victims = [
+                (e, e.payload)
+                for e in self._entries.values()
+                if e.payload is not None
+                and not e.spilling
+                and now - e.last_access >= self.spill_after
+            ]
+            for entry, _ in victims:
+                entry.spilling = True
+            stale = [e.path for e in expired if e.path]
+            known = {e.path for e in self._entries.values() if e.path}.union(stale)
+        orphans = self._orphaned_files(known)
+        self._delete_files(stale + orphans)
+        self._spill(victims)
+        self._publish()
+        return {"evicted": len(expired), "orphans": len(orphans), "spilled": len(victims)}
+
+    def usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "datasets": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._total_bytes - self._memory_bytes,
+            }
+
+    # -- internals (the *_locked methods expect self._lock to be held) -------
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return now - entry.last_access >= self.ttl
+
+    def _check_quota_locked(self, owner: str, delta: int):
+        owner_bytes = self._owner_bytes.get(owner, 0) + delta
+        if delta > 0 and owner_bytes > self.session_quota:
+            metrics.inc("dataset_quota_rejections_total", labels={"scope": "session"})
+            raise DatasetQuotaError(
+                f"Dataset too large: {owner_bytes / MB:.1f} MB exceeds the "
+                f"{self.session_quota / MB:.1f} MB limit per session."
+            )
+        if delta > 0 and self._total_bytes + delta > self.global_quota:
+            metrics.inc("dataset_quota_rejections_total", labels={"scope": "global"})
+            raise DatasetQuotaError(
+                "Server storage for datasets is full. Please try again later."
+            )
+
+    def _add_locked(self, entry: _Entry):
+        self._entries[(entry.owner, entry.name)] = entry
+        self._owner_bytes[entry.owner] = self._owner_bytes.get(entry.owner, 0) + entry.size
+        self._total_bytes += entry.size
+        self._memory_bytes += entry.size
+
+    def _remove_locked(self, entry: _Entry):
+        del self._entries[(entry.owner, entry.name)]
+        remaining = self._owner_bytes[entry.owner] - entry.size
+        if remaining:
+            self._owner_bytes[entry.owner] = remaining
+        else:
+            del self._owner_bytes[entry.owner]
+        self._total_bytes -= entry.size
+        if entry.payload is not None:
+            self._memory_bytes -= entry.size
+
+    def _evict_expired_locked(self) -> List[_Entry]:
+        now = time.monotonic()
+        expired = [e for e in self._entries.values() if self._expired(e, now)]
+        for entry in expired:
+            self._remove_locked(entry)
+        if expired:
+            metrics.inc("dataset_evictions_total", len(expired), labels={"reason": "ttl"})
+            logger.info(f"Evicted {len(expired)} expired datasets")
+        return expired
+
+    def _pick_victims_locked(self, protect, owner: str) -> List[Tuple[_Entry, str]]:
+        """
+        Least recently used in-memory datasets to spill until memory fits again.
+        The datasets of `owner` named in `protect` (the ones in use) stay.
+        Datasets already being spilled count as freed and are not picked again.
+        """
+        excess = self._memory_bytes - self.memory_max_bytes
+        victims = []
+        for (o, n), entry in self._entries.items():
+            if excess <= 0:
+                break
+            if entry.payload is None or (o == owner and n in protect):
+                continue
+            excess -= entry.size
+            if entry.spilling:
+                continue
+            entry.spilling = True
+            victims.append((entry, entry.payload))
+        return victims
+
+    def _spill(self, victims: List[Tuple[_Entry, str]]):
+        """
+        Write datasets picked by _pick_victims_locked or sweep to disk and
+        drop them from memory. Every attempt writes its own file, so a file
+        deleted here is never one another attempt registered.
+        """
+        for entry, payload in victims:
+            path = os.path.join(
+                self.directory,
+                f"{entry.id}.{uuid.uuid4().hex[:8]}.json{self.compressor.codec.extension}",
+            )
+            tmp = f"{path}.tmp"
+            try:
+                data = self.compressor.encode(payload)
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not spill dataset {entry.id}: {e}")
+                with self._lock:
+                    entry.spilling = False
+                self._delete_files([tmp])
+                continue
+            with self._lock:
+                entry.spilling = False
+                # Skip datasets replaced or read back while they were being written
+                current = self._entries.get((entry.owner, entry.name))
+                if current is entry and entry.payload is payload:
+                    entry.payload = None
+                    entry.path = path
+                    self._memory_bytes -= entry.size
+                    path = None
+            if path is None:
+                metrics.inc("dataset_spills_total")
+            else:
+                self._delete_files([path])
+
+    def _orphaned_files(self, known) -> List[str]:
+        """
+        Files no entry refers to (e.g. left by a restarted process) older than the TTL.
+        """
+        cutoff = time.time() - self.ttl
+        orphans = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        for filename in names:
+            path = os.path.join(self.directory, filename)
+            try:
+                if path not in known and os.path.getmtime(path) < cutoff:
+                    orphans.append(path)
+            except OSError:
+                continue
+        return orphans
+
+    def _delete_files(self, paths: List[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not delete dataset file {path}: {e}")
+
+    def _publish(self):
+        usage = self.usage()
+        metrics.set_gauge("dataset_store_bytes", usage["memory_bytes"], labels={"tier": "memory"})
+        metrics.set_gauge("dataset_store_bytes", usage["disk_bytes"], labels={"tier": "disk"})
+
+
+# ---------------------------------------------------------------------------
+# Process-wide store and its sweeper
+# ---------------------------------------------------------------------------
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Return the process-wide store, creating it (and its sweeper thread) on first use.
+    DATASET_STORE_BACKEND selects DatasetStore ("memory") or SharedFileStore ("file").
+    """
+    from django.conf import settings
+
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = getattr(settings, "DATASET_STORE_BACKEND", "memory")
+            if backend == "file":
+                from app.utils.shared_dataset_store import SharedFileStore as store_class
+            elif backend == "memory":
+                store_class = DatasetStore
+            else:
+                raise ValueError(f"Unknown DATASET_STORE_BACKEND: '{backend}'")
+            _store = store_class(
+                directory=str(settings.DATASET_STORE_DIR),
+                memory_max_bytes=int(settings.DATASET_MEMORY_MAX_BYTES),
+                session_quota=int(settings.DATASET_SESSION_QUOTA),
+                global_quota=int(settings.DATASET_STORE_MAX_BYTES),
+                ttl=float(settings.DATASET_TTL),
+                spill_after=float(settings.DATASET_SPILL_AFTER),
+                compressor=get_compressor(),
+            )
+            interval = float(settings.DATASET_SWEEP_INTERVAL)
+            if interval > 0:
+                threading.Thread(
+                    target=_sweep_forever,
+                    args=(_store, interval),
+                    name="dataset-sweeper",
+                    daemon=True,
+                ).start()
+        return _store
+
+
+def _sweep_forever(store, interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            result = store.sweep()
+            if any(result.values()):
+                logger.info(f"Dataset sweep: {result}")
+        except Exception:
+            logger.exception("Dataset sweep failed")
+
+
+# ---------------------------------------------------------------------------
+# Session helpers: the session only keeps the owner id of its datasets
+# ---------------------------------------------------------------------------
+
+
+def session_owner(session) -> str:
+    """
+    Return the id the session's datasets are stored under, creating it if needed.
+    (Not the session key: that changes on login and is unset for new sessions.)
+    """
+    owner = session.get(OWNER_KEY)
+    if owner is None:
+        owner = uuid.uuid4().hex
+        session[OWNER_KEY] = owner
+    return owner
+
+
+def sheet_dataset_name(name: str, index: int) -> str:
+    """
+    Dataset name of `name` (WORKING or ORIGINAL) for the sheet at `index`.
+    The first sheet (the only one of a CSV upload) uses the plain name, so
+    views that do not deal with sheets see it.
+    """
+    return name if index == 0 else f"{name}:{index}"
+
+
+def sheet_dataset(session, name: str, sheet: Optional[str] = None) -> str:
+    """
+    Dataset name of `name` for a sheet of the session's upload (None: the first).
+    Raises ValueError if the upload has no such sheet.
+    """
+    if sheet is None:
+        return name
+    sheets = session_sheets(session)
+    if sheet not in sheets:
+        raise ValueError(f"Unknown sheet '{sheet}' (sheets: {', '.join(sheets)}).")
+    return sheet_dataset_name(name, sheets.index(sheet))
+
+
+def session_sheets(session) -> List[str]:
+    """
+    Sheet names of the session's upload, in workbook order. Sessions from
+    before sheets were stored have a single, unnamed sheet.
+    """
+    return session.get(SHEETS_KEY) or [""]
+
+
+def session_profile(session, sheet: Optional[str] = None) -> Optional[Dict[str, Dict]]:
+    """
+    Column profile of a sheet of the session's upload (None: the first), or
+    None if there is none. Returns a copy, which callers may update and
+    store with save_session_profiles. Sessions from before profiles were
+    kept per sheet only have the first sheet's.
+    """
+    sheets = session_sheets(session)
+    sheet = sheets[0] if sheet is None else sheet
+    profiles = session.get(PROFILES_KEY)
+    if profiles is None:
+        profile = session.get("column_profile") if sheet == sheets[0] else None
+    else:
+        profile = profiles.get(sheet)
+    return dict(profile) if profile is not None else None
+
+
+def save_session_profiles(session, profiles: Dict[str, Dict]):
+    """
+    Store refreshed column profiles of some sheets, {sheet: profile}.
+    """
+    stored = dict(session.get(PROFILES_KEY) or {})
+    stored.update(profiles)
+    session[PROFILES_KEY] = stored
+
+
+def load_dataset(session, name: str = WORKING) -> Optional[str]:
+    owner = session.get(OWNER_KEY)
+    if owner is None:
+        return None
+    return get_store().get(owner, name)
+
+
+def load_versioned_dataset(session, name: str = WORKING) -> Optional[Tuple[str, str]]:
+    """
+    Return (payload, version token), or None if the session has no such dataset.
+    """
+    owner = session.get(OWNER_KEY)
+    if owner is None:
+        return None
+    return get_store().get_versioned(owner, name)
+
+
+async def aload_dataset(session, name: str = WORKING) -> Optional[str]:
+    """
+    load_dataset for async views; reading a spilled dataset runs in the CPU executor.
+    """
+    from app.utils.async_runtime import run_cpu
+
+    owner = await session.aget(OWNER_KEY)
+    if owner is None:
+        return None
+    return await run_cpu(get_store().get, owner, name)
+
+
+def save_dataset(
+    session, payload: str, name: str = WORKING, expected_version: Optional[str] = None
+) -> str:
+    """
+    Store a dataset and return its new version token.
+    With `expected_version`, raises DatasetVersionConflict if the dataset has
+    changed since that version was read.
+    Raises DatasetQuotaError if the dataset does not fit.
+    """
+    return get_store().put(session_owner(session), name, payload, expected_version)
+
+
+def save_datasets(
+    session, payloads: Dict[str, str], expected_versions: Optional[Dict[str, str]] = None
+) -> Dict[str, str]:
+    """
+    Store several datasets of the session at once (all or none).
+    Returns {name: version token}. With `expected_versions` ({name: version}),
+    raises DatasetVersionConflict if any of them changed since it was read.
+    Raises DatasetQuotaError if they do not fit.
+    """
+    return get_store().put_many(session_owner(session), payloads, expected_versions)
+
+
+def delete_datasets(session, names: List[str]):
+    """
+    Delete datasets of the session (e.g. the sheets of an earlier upload).
+    """
+    owner = session.get(OWNER_KEY)
+    if owner is None:
+        return
+    store = get_store()
+    for name in names:
+        store.delete(owner, name)
@@ -2,33 +2,189 @@
 
 import pandas as pd
 import logging
+import posixpath
+import zipfile
+from io import BytesIO
+from xml.etree import ElementTree
+from typing import Dict, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Optional native XLSX reader (Rust), several times faster than openpyxl
+try:
+    import python_calamine as calamine_module
+except ImportError:  # pragma: no cover - depends on the deployment
+    calamine_module = None
+
+# Sheet name given to CSV uploads (what DataFrame.to_excel names a sheet)
+CSV_SHEET = "Sheet1"
+
+# XML namespaces of the workbook part and its relationships
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
 
 def parse_file(file):
     """
-    Parses an uploaded file (.csv or .xlsx) and returns a Pandas DataFrame.
+    Parses an uploaded file (.csv or .xlsx) and returns a Pandas DataFrame
+    of its first sheet. See parse_sheets for every sheet of a workbook.
 
     Raises:
         ValueError: If the file format is unsupported or parsing fails.
     """
+    return next(iter(parse_sheets(file).values()))
+
+
+def parse_sheets(file) -> Dict[str, pd.DataFrame]:
+    """
+    Parses an uploaded file (.csv or .xlsx) into {sheet name: DataFrame}, in
+    workbook order. A CSV file is a single sheet named CSV_SHEET.
+
+    Raises:
+        ValueError: If the file format is unsupported, the workbook has no
+        sheets, or parsing fails.
+    """
     try:
         logger.debug(f"Attempting to parse file: {file.name}")
 
         if file.name.endswith(".csv"):
-            df = pd.read_csv(file)
+            sheets = {CSV_SHEET: pd.read_csv(file)}
         elif file.name.endswith(".xlsx"):
-            df = pd.read_excel(file, engine="openpyxl")
+            sheets = read_workbook(file.read())
         else:
             raise ValueError("Unsupported file format. Please upload .csv or .xlsx.")
+        if not sheets:
+            raise ValueError("The workbook has no sheets.")
 
-        logger.info(
-            f"File parsed successfully: {file.name}, rows: {len(df)}, columns: {list(df.columns)}"
-        )
-        return df
+        for name, df in sheets.items():
+            logger.info(
+                f"File parsed successfully: {file.name} [{name}], rows: {len(df)}, "
+                f"columns: {list(df.columns)}"
+            )
+        return sheets
 
     except Exception as e:
         logger.error(f"Failed to parse file: {file.name}")
         logger.exception(e)
         raise ValueError(f"Failed to parse file: {e}")
+
+
+# ---------------------------------------------------------------------------
+# XLSX readers
+# ---------------------------------------------------------------------------
+
+
+def xlsx_reader() -> str:
+    """
+    The reader selected by XLSX_READER: "calamine" (python-calamine, when
+    installed) or "openpyxl" (streaming, pure Python). "auto" prefers calamine.
+    """
+    from django.conf import settings
+
+    requested = getattr(settings, "XLSX_READER", "auto")
+    if requested == "auto":
+        return "calamine" if calamine_module is not None else "openpyxl"
+    if requested == "calamine" and calamine_module is None:
+        raise ValueError("XLSX reader 'calamine' is not installed")
+    if requested not in ("calamine", "openpyxl"):
+        raise ValueError(f"Unknown XLSX_READER: '{requested}'")
+    return requested
+
+
+def read_workbook(data: bytes) -> Dict[str, pd.DataFrame]:
+    """
+    Read every sheet of an XLSX workbook into {sheet name: DataFrame}.
+
+    Sheets are parsed in the process pool when there are several and the
+    workbook is at least XLSX_PARALLEL_MIN_BYTES (smaller ones are faster
+    to parse than to ship to a worker).
+    """
+    from django.conf import settings
+    from app.utils.async_runtime import map_in_processes
+
+    reader = xlsx_reader()
+    names = sheet_names(data, reader)
+    jobs = [(data, name, reader) for name in names]
+    if len(names) > 1 and len(data) >= int(getattr(settings, "XLSX_PARALLEL_MIN_BYTES", 0)):
+        logger.info(f"Parsing {len(names)} sheets in parallel with {reader}")
+        frames = map_in_processes(_read_sheet_job, jobs)
+    else:
+        frames = [_read_sheet_job(job) for job in jobs]
+    return dict(zip(names, frames))
+
+
+def sheet_names(data: bytes, reader: str = "openpyxl") -> List[str]:
+    """
+    Names of the worksheets of a workbook, in order (chart sheets hold no
+    cells and are left out).
+    """
+    if reader == "calamine":
+        workbook = calamine_module.CalamineWorkbook.from_filelike(BytesIO(data))
+        return list(workbook.sheet_names)
+
+    # Read the sheet list from xl/workbook.xml: loading the workbook with
+    # openpyxl would parse every shared string just to list the sheets
+    try:
+        with zipfile.ZipFile(BytesIO(data)) as archive:
+            workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+            rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    except KeyError:
+        # Workbook part stored elsewhere: let openpyxl resolve the package
+        from openpyxl import load_workbook
+
+        book = load_workbook(BytesIO(data), read_only=True, keep_links=False)
+        try:
+            return [sheet.title for sheet in book.worksheets]
+        finally:
+            book.close()
+    worksheets = {
+        rel.get("Id")
+        for rel in rels.iter(f"{_PKG_REL_NS}Relationship")
+        if posixpath.basename(rel.get("Type", "")) == "worksheet"
+    }
+    return [
+        sheet.get("name")
+        for sheet in workbook.iter(f"{_MAIN_NS}sheet")
+        if sheet.get(f"{_REL_NS}id") in worksheets
+    ]
+
+
+def _read_sheet_job(job: Tuple[bytes, str, str]) -> pd.DataFrame:
+    data, name, reader = job
+    if reader == "calamine":
+        return pd.read_excel(BytesIO(data), sheet_name=name, engine="calamine")
+    return read_sheet_streaming(data, name)
+
+
+def read_sheet_streaming(data: bytes, sheet: str) -> pd.DataFrame:
+    """
+    Read one sheet with openpyxl in read-only mode, iterating plain row
+    values instead of the cell objects pd.read_excel builds and converts.
+
+    Rows go through the same TextParser as pd.read_excel, so the result is
+    the same: the first row is the header ("Unnamed: <i>" for blanks,
+    "<name>.<n>" for repeats) and column dtypes are inferred.
+    """
+    from openpyxl import load_workbook
+    from pandas.io.parsers import TextParser
+
+    workbook = load_workbook(BytesIO(data), read_only=True, data_only=True, keep_links=False)
+    try:
+        worksheet = workbook[sheet]
+        # Some writers store a wrong sheet size; read whatever rows exist
+        worksheet.reset_dimensions()
+        rows = [list(row) for row in worksheet.iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+    # Rows only hold cells up to their last value; drop trailing empty rows, pad the rest
+    while rows and all(value is None for value in rows[-1]):
+        rows.pop()
+    if not rows:
+        return pd.DataFrame()
+    width = max(len(row) for row in rows)
+    for row in rows:
+        row.extend([None] * (width - len(row)))
+    rows[0] = ["" if value is None else value for value in rows[0]]
+    return TextParser(rows, header=0).read()
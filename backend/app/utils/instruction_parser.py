@@ -0,0 +1,205 @@
+# app/utils/instruction_parser.py
+
+import re
+import logging
+from typing import List, Dict, Optional, Sequence
+
+from app.utils.target_resolver import column_letter_to_index
+
+logger = logging.getLogger(__name__)
+
+# Verb → default replacement ("{label}" is filled with the pattern label)
+VERBS = {
+    "redact": "[{label}]",
+    "hide": "[{label}]",
+    "mask": "[{label}]",
+    "anonymise": "[{label}]",
+    "anonymize": "[{label}]",
+    "remove": "",
+    "delete": "",
+    "strip": "",
+    "clear": "",
+    "replace": None,  # needs an explicit "with ..."
+}
+
+# Phrase → (library reference, label used in default replacements)
+FAMILIES = [
+    (r"e-?mail(?:\s+address(?:es)?|s)?", "@email", "email"),
+    (r"mobile(?:\s+phone)?(?:\s+numbers?|s)?", "@au_mobile", "phone"),
+    (r"landline(?:\s+numbers?|s)?", "@au_landline", "phone"),
+    (r"(?:tele)?phone(?:\s+numbers?|s)?|contact\s+numbers?", "@au_phone", "phone"),
+    (r"dates?", "@date", "date"),
+    (r"abns?|australian\s+business\s+numbers?", "@abn", "abn"),
+    (r"post(?:al\s+)?codes?", "@postcode", "postcode"),
+]
+
+_VERB_ALT = "|".join(VERBS)
+_FAMILY_RE = re.compile(
+    "|".join(f"(?P<f{i}>{phrase})" for i, (phrase, _, _) in enumerate(FAMILIES)),
+    re.IGNORECASE,
+)
+_SEPARATOR_RE = re.compile(r"\s*(?:,|&|\band\b|\bor\b)\s*", re.IGNORECASE)
+
+_CLAUSE_RE = re.compile(
+    rf"(?:please\s+)?(?P<verb>{_VERB_ALT})\s+"
+    r"(?:(?:all|any|every|the)\s+)*"
+    r"(?P<families>.+?)"
+    r"(?:\s+(?:(?:in|from|of|on|across|within)\s+(?P<target>.+?)|everywhere))?"
+    r"(?:\s+with\s+(?P<replacement>\"[^\"]*\"|'[^']*'|\S+))?",
+    re.IGNORECASE,
+)
+
+# Splits "redact emails and hide phones, then remove dates" into clauses
+_CLAUSE_SPLIT_RE = re.compile(
+    rf"\s*(?:[,;]|\band\b|\bthen\b|\balso\b)+\s*(?=(?:please\s+)?(?:{_VERB_ALT})\b)",
+    re.IGNORECASE,
+)
+
+_WHOLE_SHEET_RE = re.compile(
+    r"(?:all|every|each|any)\s+(?:rows?|columns?|cells?)"
+    r"|(?:the\s+)?(?:whole|entire)\s+(?:sheet|file|table|spreadsheet|dataset)"
+    r"|all|everything|everywhere",
+    re.IGNORECASE,
+)
+_EMPTY_WORDS = {"nothing", "blank", "empty", "blanks"}
+
+
+def parse_instruction(
+    description: str, columns: Sequence[str]
+) -> Optional[List[Dict[str, str]]]:
+    """
+    Deterministically parse formulaic instructions into high-level tasks.
+
+    Understands "<verb> <pattern families> [in <target>] [with <replacement>]"
+    clauses, e.g. "redact emails in column Email" or
+    "hide phone numbers in all rows and remove dates from columns B and C".
+    Tasks reference built-in library patterns and use the target formats
+    accepted by expand_task.
+
+    Returns None unless every clause was understood, so that anything
+    ambiguous is left to the LLM.
+    """
+    tasks = []
+    for sentence in re.split(r"[.;\n]+", description):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        for clause in _CLAUSE_SPLIT_RE.split(sentence):
+            clause_tasks = _parse_clause(clause.strip(), columns)
+            if clause_tasks is None:
+                logger.debug(f"Rule parser could not interpret clause: {clause}")
+                return None
+            tasks.extend(clause_tasks)
+    return tasks or None
+
+
+def _parse_clause(clause: str, columns: Sequence[str]) -> Optional[List[Dict[str, str]]]:
+    m = _CLAUSE_RE.fullmatch(clause)
+    if not m:
+        return None
+
+    families = _parse_families(m.group("families"))
+    if not families:
+        return None
+
+    targets = _parse_target(m.group("target"), columns)
+    if targets is None:
+        return None
+
+    replacement = _parse_replacement(m.group("replacement"))
+    default = VERBS[m.group("verb").lower()]
+    if replacement is None and default is None:
+        return None
+
+    return [
+        {
+            "target": target,
+            "regex": reference,
+            "replacement": replacement if replacement is not None else default.format(label=label),
+        }
+        for reference, label in families
+        for target in targets
+    ]
+
+
+def _parse_families(text: str):
+    """
+    Parse "emails, phone numbers and dates" into (reference, label) pairs.
+    Returns None if any part is not a known pattern family.
+    """
+    families = []
+    for part in _SEPARATOR_RE.split(text.strip()):
+        if not part:
+            continue
+        part = re.sub(r"^(?:all|any|every|the)\s+", "", part, flags=re.IGNORECASE)
+        m = _FAMILY_RE.fullmatch(part)
+        if not m:
+            return None
+        _, reference, label = FAMILIES[int(m.lastgroup[1:])]
+        if (reference, label) not in families:
+            families.append((reference, label))
+    return families
+
+
+def _parse_target(text: Optional[str], columns: Sequence[str]) -> Optional[List[str]]:
+    """
+    Parse the target phrase into expand_task targets.
+    Returns None when the phrase is not understood or names unknown columns.
+    """
+    if text is None or _WHOLE_SHEET_RE.fullmatch(text.strip()):
+        return ["all"]
+    text = re.sub(r"^the\s+", "", text.strip(), flags=re.IGNORECASE)
+
+    if m := re.fullmatch(r"(?i)first\s+(\d+)\s+rows", text):
+        return [f"row 1 to {int(m.group(1))}"] if int(m.group(1)) > 0 else None
+
+    if m := re.fullmatch(r"(?i)rows?\s+(\d+)(?:\s*(?:to|-|through)\s*(\d+))?", text):
+        # Rows are numbered from 1; leave row 0 and reversed ranges to the LLM
+        first = int(m.group(1))
+        last = int(m.group(2)) if m.group(2) else first
+        if first < 1 or last < first:
+            return None
+        if m.group(2):
+            return [f"row {first} to {last}"]
+        return [f"row {first}"]
+
+    if m := re.fullmatch(r"(?i)columns?\s+(.+)", text):
+        refs = m.group(1)
+    elif m := re.fullmatch(r"(?i)(.+?)\s+columns?", text):
+        refs = m.group(1)
+    else:
+        return None
+
+    targets = []
+    for ref in re.split(r"\s*(?:,|\band\b|&)\s*", refs):
+        if not ref:
+            continue
+        index = _column_index(ref.strip("\"'"), columns)
+        if index is None:
+            return None
+        targets.append(f"column {index}")
+    return targets or None
+
+
+def _column_index(ref: str, columns: Sequence[str]) -> Optional[int]:
+    """
+    Resolve a column name (case-insensitive) or Excel letter to a zero-based index.
+    """
+    lower = [str(c).lower() for c in columns]
+    if ref.lower() in lower:
+        return lower.index(ref.lower())
+    if re.fullmatch(r"[A-Za-z]{1,3}", ref):
+        index = column_letter_to_index(ref.upper())
+        if index < len(columns):
+            return index
+    return None
+
+
+def _parse_replacement(text: Optional[str]) -> Optional[str]:
+    if text is None:
+        return None
+    if text[:1] in "\"'" and text[-1:] == text[:1]:
+        return text[1:-1]
+    if text.lower() in _EMPTY_WORDS:
+        return ""
+    return text
@@ -0,0 +1,44 @@
+# app/utils/lazy_view.py
+
+import threading
+from importlib import import_module
+
+
+def lazy_view(dotted_path: str, is_async: bool = False, csrf_exempt: bool = False):
+    """
+    Return a view that imports "package.module.view_name" on its first call.
+
+    Keeps heavy dependencies (pandas, numpy, openpyxl, openai) out of URL
+    loading, so `manage.py` commands and worker boot stay fast.
+
+    Django inspects a view before calling it, so what it would read from
+    the real view must be declared here:
+      - is_async: the view is a coroutine function (served without a thread)
+      - csrf_exempt: the view handles CSRF itself (every DRF @api_view does)
+    """
+    module_path, _, view_name = dotted_path.rpartition(".")
+    lock = threading.Lock()
+    loaded = []
+
+    def load():
+        if not loaded:
+            with lock:
+                if not loaded:
+                    loaded.append(getattr(import_module(module_path), view_name))
+        return loaded[0]
+
+    if is_async:
+
+        async def view(request, *args, **kwargs):
+            return await load()(request, *args, **kwargs)
+
+    else:
+
+        def view(request, *args, **kwargs):
+            return load()(request, *args, **kwargs)
+
+    view.__name__ = view_name
+    view.__qualname__ = view_name
+    view.__module__ = module_path
+    view.csrf_exempt = csrf_exempt
+    return view
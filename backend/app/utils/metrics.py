@@ -0,0 +1,392 @@
+# app/utils/metrics.py
+
+import atexit
+import fcntl
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+COUNT_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+# name → (type, help, histogram buckets)
+METRICS: Dict[str, Tuple[str, str, Tuple]] = {
+    "http_request_duration_seconds": (HISTOGRAM, "Request latency per endpoint", LATENCY_BUCKETS),
+    "regex_cells_scanned_total": (COUNTER, "Cells a regex task was run against", ()),
+    "regex_task_seconds_total": (COUNTER, "Time spent running regex tasks", ()),
+    "regex_replacements_per_task": (HISTOGRAM, "Cells rewritten per task", COUNT_BUCKETS),
+    "regex_task_failures_total": (COUNTER, "Tasks or simple tasks that could not be applied", ()),
+    "scan_cells_scanned_total": (COUNTER, "Cells checked by PII scans", ()),
+    "dataset_rows": (HISTOGRAM, "Rows per uploaded dataset", COUNT_BUCKETS),
+    "dataset_cells": (HISTOGRAM, "Cells per uploaded dataset", COUNT_BUCKETS),
+    "llm_request_duration_seconds": (HISTOGRAM, "LLM round-trip latency (cache misses only)", LATENCY_BUCKETS),
+    "llm_requests_total": (COUNTER, "Descriptions sent towards the LLM client", ()),
+    "llm_coalesced_requests_total": (COUNTER, "LLM requests that joined an identical in-flight call", ()),
+    "llm_cache_hits_total": (COUNTER, "LLM response cache hits", ()),
+    "llm_cache_misses_total": (COUNTER, "LLM response cache misses", ()),
+    "rule_parser_requests_total": (COUNTER, "Descriptions offered to the local rule parser", ()),
+    "rule_parser_hits_total": (COUNTER, "Descriptions answered by the local rule parser", ()),
+    "jobs_in_progress": (GAUGE, "Background jobs queued or running", ()),
+    "dataset_store_bytes": (GAUGE, "Bytes of stored datasets, per tier (memory/disk)", ()),
+    "dataset_spills_total": (COUNTER, "Datasets written from memory to disk", ()),
+    "dataset_evictions_total": (COUNTER, "Datasets deleted by the store", ()),
+    "dataset_quota_rejections_total": (COUNTER, "Uploads or edits rejected by a size limit", ()),
+    "dataset_version_conflicts_total": (COUNTER, "Replace requests rejected because the dataset changed", ()),
+    "replace_deduplicated_total": (COUNTER, "Replace requests answered by an identical one in flight", ()),
+    "batch_files_total": (COUNTER, "Files processed by /api/batch, per status", ()),
+    "batch_size_files": (HISTOGRAM, "Files per /api/batch request", COUNT_BUCKETS),
+}
+
+# Derived at render time from the aggregated counters
+_RATIOS = [
+    ("llm_cache_hit_ratio", "LLM response cache hit ratio", "llm_cache_hits_total", ("llm_cache_hits_total", "llm_cache_misses_total")),
+    ("llm_coalesce_ratio", "Share of LLM requests served by single-flight", "llm_coalesced_requests_total", ("llm_requests_total",)),
+    ("rule_parser_hit_ratio", "Share of descriptions answered without the LLM", "rule_parser_hits_total", ("rule_parser_requests_total",)),
+]
+
+_lock = threading.Lock()
+# (name, sorted label items) → value (counter/gauge) or [bucket counts..., sum, count]
+_values: Dict[Tuple[str, Tuple], object] = {}
+_enabled = True
+
+
+def _settings():
+    from django.conf import settings
+
+    return settings
+
+
+def metrics_dir() -> str:
+    return str(_settings().METRICS_DIR)
+
+
+def _key(name: str, labels: Optional[Dict]) -> Tuple[str, Tuple]:
+    if name not in METRICS:
+        raise ValueError(f"Unknown metric: '{name}'")
+    return name, tuple(sorted((labels or {}).items()))
+
+
+def inc(name: str, value: float = 1, labels: Optional[Dict] = None):
+    """
+    Increase a counter.
+    """
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _values[key] = _values.get(key, 0) + value
+    _mark_dirty()
+
+
+def set_gauge(name: str, value: float, labels: Optional[Dict] = None):
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _values[key] = value
+    _mark_dirty()
+
+
+def observe(name: str, value: float, labels: Optional[Dict] = None):
+    """
+    Record one observation in a histogram.
+    """
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    buckets = METRICS[name][2]
+    with _lock:
+        data = _values.get(key)
+        if data is None:
+            data = _values[key] = [0] * (len(buckets) + 2)
+        for i, upper in enumerate(buckets):
+            if value <= upper:
+                data[i] += 1
+        data[-2] += value
+        data[-1] += 1
+    _mark_dirty()
+
+
+# ---------------------------------------------------------------------------
+# Multi-process registry: every process writes its values to its own file,
+# from a background thread, and the collector folds the files of exited
+# processes into one retired file
+# ---------------------------------------------------------------------------
+
+_RETIRED_FILE = "metrics_retired.json"
+_LOCK_FILE = "metrics.lock"
+_FILE_RE = re.compile(r"^metrics_(\d+)_(\d+)\.json$")
+
+_dirty = False
+_flusher: Optional[threading.Thread] = None
+_identity: Optional[Tuple[int, int]] = None
+
+
+def _process_start(pid: int) -> Optional[int]:
+    """
+    Start time of a process in clock ticks since boot, or None where
+    /proc is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    try:
+        # The command name may contain spaces: fields resume after its ")"
+        return int(stat.rsplit(")", 1)[1].split()[19])
+    except (IndexError, ValueError):
+        return None
+
+
+def _own_identity() -> Tuple[int, int]:
+    """
+    (pid, start time) of this process. The start time tells a reused pid
+    apart from the process that held it before.
+    """
+    global _identity
+    pid = os.getpid()
+    if _identity is None or _identity[0] != pid:
+        start = _process_start(pid)
+        _identity = (pid, start if start is not None else int(time.time() * 1000))
+    return _identity
+
+
+def _own_path() -> str:
+    pid, start = _own_identity()
+    return os.path.join(metrics_dir(), f"metrics_{pid}_{start}.json")
+
+
+def _flush_interval() -> float:
+    return float(getattr(_settings(), "METRICS_FLUSH_INTERVAL", 1.0))
+
+
+def _mark_dirty():
+    global _dirty, _flusher
+    _dirty = True
+    if _flusher is None:
+        with _lock:
+            if _flusher is None:
+                _flusher = threading.Thread(
+                    target=_flush_loop, name="metrics-flush", daemon=True
+                )
+                _flusher.start()
+
+
+def _flush_loop():
+    while True:
+        try:
+            time.sleep(max(_flush_interval(), 0.05))
+            if _dirty:
+                flush()
+        except Exception:
+            logger.exception("Metrics flush failed.")
+
+
+def flush():
+    """
+    Write this process's values to <METRICS_DIR>/metrics_<pid>_<start>.json
+    (write-then-rename, so readers never see a partial file).
+    """
+    global _dirty
+    if not _enabled:
+        return
+    with _lock:
+        _dirty = False
+        payload = [
+            [name, list(labels), value] for (name, labels), value in _values.items()
+        ]
+    try:
+        os.makedirs(metrics_dir(), exist_ok=True)
+        _write_json(_own_path(), payload)
+    except OSError as e:
+        logger.warning(f"Could not write metrics file: {e}")
+
+
+def _write_json(path: str, payload):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> List:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _disable_in_child():
+    # Isolated regex workers are forked copies: they must not publish the
+    # parent's values under their own pid (the parent records their results)
+    global _enabled, _flusher
+    _enabled = False
+    _flusher = None
+
+
+os.register_at_fork(after_in_child=_disable_in_child)
+atexit.register(flush)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _is_live(pid: int, start: int) -> bool:
+    if not _pid_alive(pid):
+        return False
+    current = _process_start(pid)
+    # Without /proc a live pid is taken at its word
+    return current is None or current == start
+
+
+def _merge(merged: Dict[Tuple[str, Tuple], object], entries: List, gauges: bool = True):
+    for name, labels, value in entries:
+        if name not in METRICS:
+            continue
+        kind = METRICS[name][0]
+        if kind == GAUGE and not gauges:
+            continue
+        key = (name, tuple(tuple(item) for item in labels))
+        if kind == HISTOGRAM:
+            current = merged.setdefault(key, [0] * len(value))
+            for i, v in enumerate(value):
+                current[i] += v
+        else:
+            merged[key] = merged.get(key, 0) + value
+
+
+def _retire_dead(directory: str) -> List[str]:
+    """
+    Fold the counters and histograms of exited processes into the retired
+    file and delete their files, so totals stay monotonic while the
+    directory only holds one file per live process. Returns the live files.
+    """
+    live: List[str] = []
+    dead: List[str] = []
+    for entry in os.listdir(directory):
+        match = _FILE_RE.match(entry)
+        if not match:
+            continue
+        path = os.path.join(directory, entry)
+        if _is_live(int(match.group(1)), int(match.group(2))):
+            live.append(path)
+        else:
+            dead.append(path)
+    if not dead:
+        return live
+
+    retired_path = os.path.join(directory, _RETIRED_FILE)
+    retired: Dict[Tuple[str, Tuple], object] = {}
+    _merge(retired, _read_json(retired_path), gauges=False)
+    for path in dead:
+        _merge(retired, _read_json(path), gauges=False)
+    _write_json(
+        retired_path,
+        [[name, list(labels), value] for (name, labels), value in retired.items()],
+    )
+    for path in dead:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    logger.info(f"Retired metrics of {len(dead)} exited process(es).")
+    return live
+
+
+def collect() -> Dict[Tuple[str, Tuple], object]:
+    """
+    Merge the files of all processes. Counters and histograms include
+    those of exited processes (through the retired file); gauges only
+    count live processes.
+    """
+    flush()
+    directory = metrics_dir()
+    merged: Dict[Tuple[str, Tuple], object] = {}
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # Collectors in other workers must not retire the same file twice
+        with open(os.path.join(directory, _LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            live = _retire_dead(directory)
+            _merge(merged, _read_json(os.path.join(directory, _RETIRED_FILE)))
+    except OSError as e:
+        logger.warning(f"Could not read metrics files: {e}")
+        return merged
+    for path in live:
+        _merge(merged, _read_json(path))
+    return merged
+
+
+# ---------------------------------------------------------------------------
+# Prometheus text exposition format
+# ---------------------------------------------------------------------------
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    items = [f'{k}="{_escape(v)}"' for k, v in labels]
+    return "{" + ",".join(items) + "}" if items else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def render() -> str:
+    """
+    Render the merged metrics of all processes in Prometheus text format.
+    """
+    merged = collect()
+    lines: List[str] = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((labels, v) for (n, labels), v in merged.items() if n == name)
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in series:
+            if kind == HISTOGRAM:
+                for upper, count in zip(buckets, value):
+                    le = _format_labels(labels + (("le", _format_value(float(upper))),))
+                    lines.append(f"{name}_bucket{le} {count}")
+                inf = _format_labels(labels + (("le", "+Inf"),))
+                lines.append(f"{name}_bucket{inf} {value[-1]}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(float(value[-2]))}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value[-1]}")
+            else:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(float(value))}")
+
+    totals: Dict[str, float] = {}
+    for (name, _), value in merged.items():
+        if METRICS[name][0] == COUNTER:
+            totals[name] = totals.get(name, 0) + value
+    for name, help_text, numerator, denominator in _RATIOS:
+        total = sum(totals.get(d, 0) for d in denominator)
+        ratio = totals.get(numerator, 0) / total if total else 0.0
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {_format_value(round(ratio, 6))}")
+
+    return "\n".join(lines) + "\n"
@@ -1,55 +1,33 @@
 # app/utils/openai_client.py
 
-from openai import OpenAI
+import asyncio
+import copy
 import os
 import logging
 import json
-from typing import List, Dict
+import re
+import threading
+import time
+from typing import List, Dict, Optional, Sequence
+from app.utils.pattern_library import describe_library
+from app.utils.llm_cache import LLMResponseCache
+from app.utils.async_runtime import run_in_background, submit
+from app.utils import metrics
 
 logger = logging.getLogger(__name__)
 
-# Retrieve OpenAI API key from environment variables
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise EnvironmentError("OPENAI_API_KEY is not set in the environment.")
-
-client = OpenAI(api_key=api_key)
-
 MODEL_NAME = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
+# Bump whenever build_prompt() changes so cached answers are not reused
+PROMPT_VERSION = "3"
 
-def get_regex_tasks_from_nl(description: str) -> List[Dict[str, str]]:
-    """
-    Parse a natural language instruction and extract regex-based editing tasks for Excel data.
-
-    Each task includes:
-    - "target": A semantic description of the region to edit (e.g., "row 2", "column Email", "first 3 columns of row 1").
-                Use a helper like `resolve_target()` to convert it into exact DataFrame locations.
-    - "regex": A raw regex pattern to match.
-    - "replacement": The string to replace matches with (can be empty).
-
-    Args:
-        description (str): English instruction with one or more edit requests.
-
-    Returns:
-        List[Dict[str, str]]: A list of edit tasks.
 
-    Example:
-    [
-        {
-            "target": "column Contact",
-            "regex": "\\b\\d{3}[-.]?\\d{3}[-.]?\\d{4}\\b",
-            "replacement": "[hidden]"
-        },
-        {
-            "target": "first 2 rows of column Email",
-            "regex": "\\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\\.[A-Z|a-z]{2,}\\b",
-            "replacement": "[redacted]"
-        }
-    ]
+def build_prompt(description: str, columns: Optional[Sequence[str]] = None) -> str:
     """
-    # Construct a prompt to request a JSON array of edits
-    prompt = f"""
+    Construct the prompt requesting a JSON array of edits.
+    """
+    column_list = ", ".join(str(c) for c in columns) if columns else "unknown"
+    return f"""
 You are a smart assistant.
 
 Your task is to extract regex-based edit instructions from the following Excel-related description.
@@ -78,6 +56,12 @@ Email Addresses:
 ABNs (Australian Business Numbers):
 - Are 11-digit numbers, with or without spaces (e.g., "12 345 678 901")
 
+Built-in patterns:
+- Instead of writing a regex for the formats above, set "regex" to one of these references:
+{describe_library()}
+- Append ":anchored" (e.g., "@au_mobile:anchored") to match only cells that contain nothing else
+- Prefer a reference whenever the request targets one of these formats
+
 For each edit, return a JSON object with:
 - target: where to apply the change. Valid formats include:
     - "all"
@@ -106,30 +90,313 @@ Replacements must be plain strings (e.g., [email], [phone], "", etc.)
 
 Only return a raw JSON array. Do not include Markdown formatting, comments, or explanations.
 
+Columns: {column_list}
+
 Description: {description}  
 JSON:
 
 
 """
 
-    try:
-        logger.debug(f"Sending prompt: {description}")
 
-        # Send prompt to OpenAI API
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
+class OpenAIBackend:
+    """
+    Sends prompts to the OpenAI chat completions API.
+    One AsyncOpenAI client (and its HTTP connection pool) is reused for every call.
+    """
+
+    def __init__(self, api_key: str, model: str = MODEL_NAME):
+        # Imported here: the openai package is slow to import and only needed
+        # once a description actually has to be sent to the model
+        from openai import AsyncOpenAI
+
+        self.model = model
+        self._client = AsyncOpenAI(api_key=api_key)
+
+    async def complete(self, prompt: str, description: str) -> str:
+        response = await self._client.chat.completions.create(
+            model=self.model,
             messages=[{"role": "user", "content": prompt}],
             max_tokens=500,  # Allow enough room for multiple edits
             temperature=0,  # Deterministic output
         )
+        return response.choices[0].message.content.strip()
+
+
+class FakeBackend:
+    """
+    Offline stand-in for tests, benchmarks and load tests.
+
+    Answers deterministically with one "all" task per pattern family named in
+    the description (e.g. "email", "phone"), using built-in library references.
+    """
+
+    model = "fake"
+
+    KEYWORDS = {
+        "email": ("@email", "[email]"),
+        "phone": ("@au_phone", "[phone]"),
+        "mobile": ("@au_mobile", "[phone]"),
+        "date": ("@date", "[date]"),
+        "postcode": ("@postcode", "[postcode]"),
+        "abn": ("@abn", "[abn]"),
+    }
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    async def complete(self, prompt: str, description: str) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        words = set(re.findall(r"[a-z]+", description.lower()))
+        tasks = [
+            {"target": "all", "regex": regex, "replacement": replacement}
+            for keyword, (regex, replacement) in self.KEYWORDS.items()
+            if keyword in words or keyword + "s" in words
+        ]
+        return json.dumps(tasks)
+
+
+def _create_backend():
+    """
+    Build the backend selected by LLM_BACKEND ("openai" or "fake").
+    Raises EnvironmentError if the OpenAI backend is selected without a key.
+    """
+    if os.getenv("LLM_BACKEND", "openai") == "fake":
+        return FakeBackend(latency=float(os.getenv("FAKE_LLM_LATENCY", "0")))
 
-        content = response.choices[0].message.content.strip()
+    # Retrieve OpenAI API key from environment variables
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise EnvironmentError("OPENAI_API_KEY is not set in the environment.")
+    return OpenAIBackend(api_key=api_key)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """
+    Return the LLM backend, creating it on first use.
+    The API key is only required once a description reaches the LLM, so
+    management commands and other endpoints work without one.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _create_backend()
+        return _backend
+
+
+def set_backend(new_backend):
+    """
+    Replace the LLM backend (e.g. with FakeBackend in tests or benchmarks).
+    """
+    global _backend
+    with _backend_lock:
+        _backend = new_backend
+
+
+# ---------------------------------------------------------------------------
+# Response cache
+# ---------------------------------------------------------------------------
+
+_cache: Optional[LLMResponseCache] = None
+
+
+def get_cache() -> Optional[LLMResponseCache]:
+    from django.conf import settings
+
+    global _cache
+    if not getattr(settings, "LLM_CACHE_ENABLED", True):
+        return None
+    if _cache is None:
+        _cache = LLMResponseCache(
+            path=getattr(settings, "LLM_CACHE_PATH", "llm_cache.sqlite3"),
+            ttl=float(getattr(settings, "LLM_CACHE_TTL", 86400)),
+            max_entries=int(getattr(settings, "LLM_CACHE_MAX_ENTRIES", 1000)),
+        )
+    return _cache
+
+
+def normalize_description(description: str) -> str:
+    """
+    Normalize whitespace and trailing punctuation so trivially different
+    phrasings share a cache entry. Case is kept: replacements are case-sensitive.
+    """
+    return re.sub(r"\s+", " ", description).strip().rstrip(".!;, ")
+
+
+def configured_model() -> str:
+    """
+    Model name of the backend in use or, before one is created, of the
+    configured one. Does not create the backend, so cache hits need no API key.
+    """
+    backend = _backend
+    if backend is not None:
+        return backend.model
+    return FakeBackend.model if os.getenv("LLM_BACKEND", "openai") == "fake" else MODEL_NAME
+
+
+def cache_key(description: str, columns: Optional[Sequence[str]] = None) -> str:
+    return LLMResponseCache.make_key(
+        configured_model(),
+        PROMPT_VERSION,
+        normalize_description(description),
+        [str(c) for c in columns or []],
+    )
+
+
+async def aget_regex_tasks_from_nl(
+    description: str, columns: Optional[Sequence[str]] = None
+) -> List[Dict[str, str]]:
+    """
+    Async version of get_regex_tasks_from_nl, usable from any event loop.
+    Identical (normalized) requests are answered from the persistent cache.
+    """
+    # LLM calls always run on the shared background loop, where the client's
+    # connections and the single-flight registry live
+    return await run_in_background(_generate(description, columns))
+
+
+def get_regex_tasks_from_nl(
+    description: str, columns: Optional[Sequence[str]] = None
+) -> List[Dict[str, str]]:
+    """
+    Parse a natural language instruction and extract regex-based editing tasks for Excel data.
+
+    Each task includes:
+    - "target": A semantic description of the region to edit (e.g., "row 2", "column Email", "first 3 columns of row 1").
+                Use a helper like `resolve_target()` to convert it into exact DataFrame locations.
+    - "regex": A raw regex pattern to match.
+    - "replacement": The string to replace matches with (can be empty).
+
+    Args:
+        description (str): English instruction with one or more edit requests.
+        columns (Sequence[str], optional): Column names of the working sheet, given to the model as context.
+
+    Returns:
+        List[Dict[str, str]]: A list of edit tasks.
+
+    Example:
+    [
+        {
+            "target": "column Contact",
+            "regex": "\\b\\d{3}[-.]?\\d{3}[-.]?\\d{4}\\b",
+            "replacement": "[hidden]"
+        },
+        {
+            "target": "first 2 rows of column Email",
+            "regex": "\\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\\.[A-Z|a-z]{2,}\\b",
+            "replacement": "[redacted]"
+        }
+    ]
+    """
+    return submit(_generate(description, columns)).result()
+
+
+# ---------------------------------------------------------------------------
+# Single-flight: concurrent identical requests share one LLM call
+# ---------------------------------------------------------------------------
+
+# In-flight generations by cache key; only touched from the background loop thread
+_inflight: Dict[str, asyncio.Future] = {}
+_counters = {"requests": 0, "coalesced": 0}
+
+
+def get_llm_stats() -> Dict:
+    """
+    Return LLM request counters, the single-flight coalesce rate and cache stats.
+    """
+    requests = _counters["requests"]
+    cache = get_cache()
+    return {
+        "requests": requests,
+        "coalesced": _counters["coalesced"],
+        "coalesce_rate": round(_counters["coalesced"] / requests, 4) if requests else 0.0,
+        "inflight": len(_inflight),
+        "cache": cache.stats() if cache is not None else None,
+    }
+
+
+async def _generate(
+    description: str, columns: Optional[Sequence[str]]
+) -> List[Dict[str, str]]:
+    key = cache_key(description, columns)
+    _counters["requests"] += 1
+    metrics.inc("llm_requests_total")
+
+    pending = _inflight.get(key)
+    if pending is not None:
+        _counters["coalesced"] += 1
+        metrics.inc("llm_coalesced_requests_total")
+        logger.info(f"Joining in-flight LLM request for description: {description}")
+    else:
+        pending = asyncio.ensure_future(_generate_once(key, description, columns))
+        _inflight[key] = pending
+        pending.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    # shield: one caller giving up must not cancel the call the others wait on
+    tasks = await asyncio.shield(pending)
+    # Every caller gets its own copy, since tasks are expanded in place downstream
+    return copy.deepcopy(tasks)
+
+
+async def _generate_once(
+    key: str, description: str, columns: Optional[Sequence[str]]
+) -> List[Dict[str, str]]:
+    cache = get_cache()
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            metrics.inc("llm_cache_hits_total")
+            logger.info(f"LLM cache hit for description: {description}")
+            return cached
+        metrics.inc("llm_cache_misses_total")
+
+    prompt = build_prompt(description, columns)
+    # Outside the try: a missing API key is reported as such
+    backend = get_backend()
+
+    try:
+        logger.debug(f"Sending prompt: {description}")
+
+        start = time.perf_counter()
+        content = await backend.complete(prompt, description)
+        metrics.observe("llm_request_duration_seconds", time.perf_counter() - start)
         logger.info(f"Parsed tasks: {content}")
 
-        return json.loads(content)
+        tasks = json.loads(content)
 
     except Exception as e:
         logger.exception("Failed to parse multiple instructions")
         raise ValueError(
             "Could not interpret the description into multiple edit tasks."
         )
+
+    # Only well-formed answers are cached: a malformed one would be served
+    # for every retry of the description until it expires
+    _check_tasks(tasks)
+    if cache is not None:
+        await asyncio.to_thread(cache.set, key, tasks)
+    return tasks
+
+
+def _check_tasks(tasks):
+    """
+    Raise ValueError unless the model answered a non-empty list of
+    {"target", "regex", "replacement"} objects with string values.
+    """
+    if not isinstance(tasks, list) or not tasks:
+        logger.warning(f"LLM answer is not a non-empty task array: {tasks!r}")
+        raise ValueError("Could not interpret the description into edit tasks.")
+    for task in tasks:
+        if not isinstance(task, dict) or not all(
+            isinstance(task.get(key), str) for key in ("target", "regex", "replacement")
+        ):
+            logger.warning(f"LLM answered a malformed task: {task!r}")
+            raise ValueError(
+                "Could not interpret the description into edit tasks "
+                "(each needs a target, regex and replacement)."
+            )
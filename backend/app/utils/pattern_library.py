@@ -0,0 +1,211 @@
+# app/utils/pattern_library.py
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+# Prefix used by tasks to reference a library pattern, e.g. "@au_mobile"
+REFERENCE_PREFIX = "@"
+# Suffix selecting the full-cell variant, e.g. "@au_mobile:anchored"
+ANCHORED_SUFFIX = ":anchored"
+
+
+@dataclass(frozen=True)
+class LibraryPattern:
+    """
+    A curated, precompiled pattern.
+
+    `pattern` is unanchored (it finds the value inside a cell) and only uses
+    non-capturing groups, so it can be embedded in larger alternations.
+    Every match of a pattern is also a match of its `family` pattern, which
+    lets column profiles computed per family be reused for narrower entries.
+    """
+
+    name: str
+    family: str
+    pattern: str
+    description: str
+    examples: Tuple[str, ...] = ()
+
+    @property
+    def anchored(self) -> str:
+        return f"^(?:{self.pattern})$"
+
+
+# Patterns start with a consumed character and check the preceding context
+# with a lookbehind afterwards, so the engine can still skip ahead to
+# candidate start characters instead of trying every position.
+_PHONE_TAIL = r"[ -]?\d" * 8 + r"(?!\d)"
+
+
+def _phone_pattern(first_digit: str, area_code: bool = False) -> str:
+    """
+    An AU number whose national part starts with `first_digit` (a class),
+    after +61, 61 or 0; `area_code` also accepts "(0X)". Every branch starts
+    with its own literal: a shared prefix group in front of `first_digit`
+    hides them from the engine, which then tries every position.
+    """
+    branches = [
+        rf"\+61[ -]?{first_digit}",
+        rf"6(?<![\d+]6)1[ -]?{first_digit}",
+        rf"0(?<![\d+]0){first_digit}",
+    ]
+    if area_code:
+        branches.append(r"\(0[2378]\)")
+    return f"(?:{'|'.join(branches)}){_PHONE_TAIL}"
+
+
+LIBRARY: Dict[str, LibraryPattern] = {
+    p.name: p
+    for p in [
+        LibraryPattern(
+            name="au_phone",
+            family="phone",
+            pattern=_phone_pattern("[2-478]", area_code=True),
+            description="Any Australian mobile or landline number",
+            examples=("+61 412 345 678", "0412345678", "(02) 9876 5432"),
+        ),
+        LibraryPattern(
+            name="au_mobile",
+            family="phone",
+            pattern=_phone_pattern("4"),
+            description="Australian mobile number (+61 / 61 / 04 prefix, spaces or dashes)",
+            examples=("+61 412 345 678", "+61412345678", "0412345678", "+61-412-345-678", "04 12 345 678"),
+        ),
+        LibraryPattern(
+            name="au_landline",
+            family="phone",
+            pattern=_phone_pattern("[2378]", area_code=True),
+            description="Australian landline number with area code",
+            examples=("02 9876 5432", "(03) 9876 5432", "+61 7 3123 4567"),
+        ),
+        LibraryPattern(
+            name="email",
+            family="email",
+            pattern=r"(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}",
+            description="Email address (user@domain.tld)",
+            examples=("jane.doe@example.com.au",),
+        ),
+        LibraryPattern(
+            name="date",
+            family="date",
+            pattern=r"\d(?<!\d\d)(?:\d?/\d{1,2}/\d{4}|\d{3}-\d{2}-\d{2})(?!\d)",
+            description="Date as DD/MM/YYYY or YYYY-MM-DD",
+            examples=("31/12/2024", "2024-12-31"),
+        ),
+        LibraryPattern(
+            name="date_dmy",
+            family="date",
+            pattern=r"\d(?<!\d\d)\d?/\d{1,2}/\d{4}(?!\d)",
+            description="Date as DD/MM/YYYY",
+            examples=("31/12/2024", "1/2/2024"),
+        ),
+        LibraryPattern(
+            name="date_iso",
+            family="date",
+            pattern=r"\d(?<!\d\d)\d{3}-\d{2}-\d{2}(?!\d)",
+            description="Date as YYYY-MM-DD",
+            examples=("2024-12-31",),
+        ),
+        LibraryPattern(
+            name="abn",
+            family="abn",
+            pattern=r"\d(?<![\d+]\d)\d ?\d{3} ?\d{3} ?\d{3}(?!\d)",
+            description="Australian Business Number, 11 digits with optional spaces",
+            examples=("12 345 678 901", "12345678901"),
+        ),
+        LibraryPattern(
+            name="postcode",
+            family="postcode",
+            pattern=r"\d(?<![\d/-]\d)\d{3}(?![\d/-])",
+            description="Standalone 4-digit postcode",
+            examples=("2000", "0800"),
+        ),
+    ]
+}
+
+# Built-in pattern classes used by column profiling and PII scans,
+# mapped to the library entry that defines each class
+CLASS_ENTRIES: Dict[str, str] = {
+    "phone": "au_phone",
+    "email": "email",
+    "date": "date",
+    "abn": "abn",
+    "postcode": "postcode",
+}
+
+PATTERN_CLASSES: Dict[str, str] = {
+    class_name: LIBRARY[entry].pattern for class_name, entry in CLASS_ENTRIES.items()
+}
+
+# Compiled once per process and shared by every request
+_compiled: Dict[Tuple[str, bool], re.Pattern] = {}
+for _entry in LIBRARY.values():
+    _compiled[(_entry.name, False)] = re.compile(_entry.pattern)
+    _compiled[(_entry.name, True)] = re.compile(_entry.anchored)
+
+_family_by_source: Dict[str, str] = {}
+for _entry in LIBRARY.values():
+    _family_by_source[_entry.pattern] = _entry.family
+    _family_by_source[_entry.anchored] = _entry.family
+
+
+def get_pattern(name: str, anchored: bool = False) -> re.Pattern:
+    """
+    Return the precompiled regex for a library entry.
+    Raises ValueError if the entry does not exist.
+    """
+    try:
+        return _compiled[(name, anchored)]
+    except KeyError:
+        raise ValueError(f"Unknown library pattern: '{name}'")
+
+
+def get_class_regex(name: str) -> re.Pattern:
+    """
+    Return the precompiled regex for a built-in pattern class.
+    Raises ValueError if the class does not exist.
+    """
+    if name not in CLASS_ENTRIES:
+        raise ValueError(f"Unknown pattern class: '{name}'")
+    return _compiled[(CLASS_ENTRIES[name], False)]
+
+
+def is_reference(regex) -> bool:
+    return isinstance(regex, str) and regex.strip().startswith(REFERENCE_PREFIX)
+
+
+def resolve_pattern(regex):
+    """
+    Resolve a task regex to something re.compile/re.sub accept.
+
+    "@name" and "@name:anchored" are replaced by the shared precompiled
+    library pattern; anything else is returned unchanged.
+    Raises ValueError for references to unknown entries.
+    """
+    if not is_reference(regex):
+        return regex
+
+    name = regex.strip()[len(REFERENCE_PREFIX) :]
+    anchored = name.endswith(ANCHORED_SUFFIX)
+    if anchored:
+        name = name[: -len(ANCHORED_SUFFIX)]
+    return get_pattern(name, anchored)
+
+
+def pattern_class_of(pattern) -> Optional[str]:
+    """
+    Return the built-in class (family) of `pattern` if it is a library pattern.
+    """
+    source = getattr(pattern, "pattern", pattern)
+    return _family_by_source.get(source)
+
+
+def describe_library() -> str:
+    """
+    Return a bullet list of library references, for use in LLM prompts.
+    """
+    return "\n".join(
+        f"- {REFERENCE_PREFIX}{entry.name}: {entry.description}"
+        for entry in LIBRARY.values()
+    )
@@ -0,0 +1,198 @@
+# app/utils/payload_codec.py
+
+import logging
+import zlib
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Optional third-party codecs
+try:
+    import zstandard as zstd_module
+except ImportError:  # pragma: no cover - depends on the deployment
+    zstd_module = None
+
+try:
+    import lz4.frame as lz4_module
+except ImportError:  # pragma: no cover - depends on the deployment
+    lz4_module = None
+
+
+class PayloadCodec:
+    """
+    A compression format for stored dataset payloads (ASCII JSON).
+
+    Every format is recognised by the first bytes of its output (the frame
+    magic of zstd and lz4, the zlib header byte), so decode() reads any
+    stored payload whatever codec is configured now, including the plain
+    JSON written before compression existed.
+    """
+
+    name = ""
+    default_level = 0
+    extension = ""  # appended to the names of stored files
+
+    def available(self) -> bool:
+        return True
+
+    def matches(self, data: bytes) -> bool:
+        raise NotImplementedError
+
+    def compress(self, data: bytes, level: int) -> bytes:
+        raise NotImplementedError
+
+    def decompress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+
+class PlainCodec(PayloadCodec):
+    name = "none"
+
+    def matches(self, data: bytes) -> bool:
+        return True
+
+    def compress(self, data: bytes, level: int) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+
+class ZlibCodec(PayloadCodec):
+    """
+    Standard library zlib: always available, but slower than zstd at a
+    similar ratio.
+    """
+
+    name = "zlib"
+    default_level = 1
+    extension = ".zz"
+
+    def matches(self, data: bytes) -> bool:
+        # CMF byte of a 32 KiB deflate window; JSON never starts with "x"
+        return data[:1] == b"\x78"
+
+    def compress(self, data: bytes, level: int) -> bytes:
+        return zlib.compress(data, level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdCodec(PayloadCodec):
+    """
+    Zstandard through the `zstandard` package: the best ratio per CPU second.
+    """
+
+    name = "zstd"
+    default_level = 3
+    extension = ".zst"
+    MAGIC = b"\x28\xb5\x2f\xfd"
+
+    def available(self) -> bool:
+        return zstd_module is not None
+
+    def matches(self, data: bytes) -> bool:
+        return data[:4] == self.MAGIC
+
+    def compress(self, data: bytes, level: int) -> bytes:
+        # The frame records the content size, so decompress() allocates once
+        return zstd_module.ZstdCompressor(level=level).compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zstd_module.ZstdDecompressor().decompress(data)
+
+
+class Lz4Codec(PayloadCodec):
+    """
+    LZ4 frames through the `lz4` package: the fastest to decode, with a
+    lower ratio than zstd.
+    """
+
+    name = "lz4"
+    default_level = 0
+    extension = ".lz4"
+    MAGIC = b"\x04\x22\x4d\x18"
+
+    def available(self) -> bool:
+        return lz4_module is not None
+
+    def matches(self, data: bytes) -> bool:
+        return data[:4] == self.MAGIC
+
+    def compress(self, data: bytes, level: int) -> bytes:
+        return lz4_module.compress(data, compression_level=level, store_size=True)
+
+    def decompress(self, data: bytes) -> bytes:
+        return lz4_module.decompress(data)
+
+
+CODECS: Dict[str, PayloadCodec] = {
+    codec.name: codec for codec in (ZstdCodec(), Lz4Codec(), ZlibCodec(), PlainCodec())
+}
+
+# "auto" picks the first installed codec in this order
+AUTO_ORDER = ("zstd", "lz4", "zlib")
+
+
+def get_codec(name: str = "auto") -> PayloadCodec:
+    """
+    Return an installed codec by name ("zstd", "lz4", "zlib" or "none"), or
+    the best installed one for "auto".
+    Raises ValueError if the codec is unknown or not installed.
+    """
+    if name == "auto":
+        return next(CODECS[n] for n in AUTO_ORDER if CODECS[n].available())
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Unknown payload codec: '{name}'")
+    if not codec.available():
+        raise ValueError(f"Payload codec '{name}' is not installed")
+    return codec
+
+
+def detect_codec(data: bytes) -> PayloadCodec:
+    """
+    Return the codec a stored payload was written with.
+    """
+    for name in AUTO_ORDER:
+        codec = CODECS[name]
+        if codec.matches(data):
+            if not codec.available():
+                raise ValueError(f"Payload was stored with '{name}', which is not installed")
+            return codec
+    return CODECS["none"]
+
+
+class PayloadCompressor:
+    """
+    Encodes payloads with one codec and level, and decodes payloads of any codec.
+    """
+
+    def __init__(self, codec: str = "auto", level: Optional[int] = None):
+        self.codec = get_codec(codec)
+        self.level = self.codec.default_level if level is None else level
+
+    def encode(self, payload: str) -> bytes:
+        # Payloads are ASCII-escaped JSON (DataFrame.to_json's default)
+        return self.codec.compress(payload.encode("ascii"), self.level)
+
+    def decode(self, data) -> str:
+        """
+        Decode stored bytes (or a memory map of them) back to the payload.
+        """
+        codec = detect_codec(data[:4])
+        return str(codec.decompress(data), "ascii")
+
+
+def get_compressor() -> PayloadCompressor:
+    """
+    Return a compressor configured by DATASET_COMPRESSION and DATASET_COMPRESSION_LEVEL.
+    """
+    from django.conf import settings
+
+    level = getattr(settings, "DATASET_COMPRESSION_LEVEL", None)
+    return PayloadCompressor(
+        getattr(settings, "DATASET_COMPRESSION", "auto"),
+        None if level in (None, "") else int(level),
+    )
@@ -0,0 +1,272 @@
+# app/utils/redos_guard.py
+
+import logging
+from typing import Any, Callable, List, Tuple
+
+try:  # Python 3.11+
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+    import sre_constants
+
+logger = logging.getLogger(__name__)
+
+_REPEAT_OPS = {
+    sre_constants.MAX_REPEAT,
+    sre_constants.MIN_REPEAT,
+    getattr(sre_constants, "POSSESSIVE_REPEAT", sre_constants.MAX_REPEAT),
+}
+
+
+class TaskTimeoutError(Exception):
+    """
+    Raised when an isolated regex task exceeds its time budget.
+    """
+
+
+def analyze_pattern(pattern) -> List[str]:
+    """
+    Statically look for constructs prone to catastrophic backtracking.
+
+    Returns a list of human-readable warnings (empty if nothing was found):
+      - nested quantifiers, e.g. "(a+)+" or "(\\w+\\s?)*"
+      - quantified alternations whose branches can match the same text:
+        branches that can start with the same character (classes such as
+        \\w and \\d included) or can match the empty string, e.g. "(a|ab)*",
+        "(?:a|a)*" or "(\\w|\\d)+"
+    Accepts a pattern string or a compiled pattern. Unparseable patterns
+    return no warnings; compiling them will report the error.
+    """
+    source = getattr(pattern, "pattern", pattern)
+    if not isinstance(source, str):
+        return []
+    try:
+        parsed = sre_parse.parse(source, getattr(pattern, "flags", 0))
+    except Exception:
+        return []
+
+    warnings: List[str] = []
+    ignore_case = bool(parsed.state.flags & sre_constants.SRE_FLAG_IGNORECASE)
+    _walk(parsed, warnings, inside_repeat=False, ignore_case=ignore_case)
+    return warnings
+
+
+def _walk(items, warnings: List[str], inside_repeat: bool, ignore_case: bool):
+    for op, av in items:
+        if op in _REPEAT_OPS:
+            _min, max_count, sub = av
+            unbounded = max_count == sre_constants.MAXREPEAT
+            if inside_repeat and unbounded:
+                warnings.append("nested quantifier: unbounded repeat inside a repeat")
+            repeats = max_count > 1
+            if repeats and _has_overlapping_alternation(sub, ignore_case):
+                warnings.append("quantified alternation with overlapping branches")
+            _walk(sub, warnings, inside_repeat or repeats, ignore_case)
+        elif op == sre_constants.SUBPATTERN:
+            _walk(av[-1], warnings, inside_repeat, ignore_case)
+        elif op == sre_constants.BRANCH:
+            for branch in av[1]:
+                _walk(branch, warnings, inside_repeat, ignore_case)
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            _walk(av[1], warnings, inside_repeat, ignore_case)
+
+
+# ---------------------------------------------------------------------------
+# Overlapping alternations
+#
+# sre_parse factors common prefixes out of alternations: "(a|ab)" becomes
+# "a" followed by BRANCH(["", "b"]) and "(a|a)" becomes "a" followed by
+# BRANCH(["", ""]); alternations of single characters such as "(\w|\d)"
+# become one character class. So a repeated body is flagged when one of its
+# alternations has a branch that can match the empty string, two branches
+# whose first characters can be the same, or a class whose members overlap.
+# ---------------------------------------------------------------------------
+
+_CHAR_OPS = (
+    sre_constants.LITERAL,
+    sre_constants.NOT_LITERAL,
+    sre_constants.IN,
+    sre_constants.ANY,
+)
+_ANY_CHAR = (sre_constants.ANY, None)
+_ATOMIC_GROUP = getattr(sre_constants, "ATOMIC_GROUP", None)
+
+# Characters tried when comparing first-character sets, besides the
+# literals and range bounds of the sets themselves
+_SAMPLE_CHARS = [chr(i) for i in range(128)] + ["\u00e9", "\u00a0", "\u0663", "\u4e00"]
+
+_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: str.isdecimal,
+    sre_constants.CATEGORY_NOT_DIGIT: lambda ch: not ch.isdecimal(),
+    sre_constants.CATEGORY_SPACE: str.isspace,
+    sre_constants.CATEGORY_NOT_SPACE: lambda ch: not ch.isspace(),
+    sre_constants.CATEGORY_WORD: lambda ch: ch.isalnum() or ch == "_",
+    sre_constants.CATEGORY_NOT_WORD: lambda ch: not (ch.isalnum() or ch == "_"),
+}
+
+
+def _has_overlapping_alternation(items, ignore_case: bool) -> bool:
+    for op, av in items:
+        if op == sre_constants.SUBPATTERN:
+            if _has_overlapping_alternation(av[-1], ignore_case):
+                return True
+        elif op == sre_constants.BRANCH:
+            firsts = [_first_chars(branch) for branch in av[1]]
+            if any(nullable for _, nullable in firsts):
+                return True
+            for i, (left, _) in enumerate(firsts):
+                for right, _ in firsts[i + 1:]:
+                    if _overlap(left, right, ignore_case):
+                        return True
+        elif op == sre_constants.IN:
+            members = [m for m in av if m[0] != sre_constants.NEGATE]
+            if len(members) == len(av):
+                for i, left in enumerate(members):
+                    for right in members[i + 1:]:
+                        if _overlap([(sre_constants.IN, [left])], [(sre_constants.IN, [right])], ignore_case):
+                            return True
+    return False
+
+
+def _first_chars(items) -> Tuple[List, bool]:
+    """
+    Single-character items (LITERAL, IN, ...) a match of `items` can start
+    with, and whether `items` can match the empty string.
+    """
+    atoms: List = []
+    for op, av in items:
+        if op in _CHAR_OPS:
+            atoms.append((op, av))
+            return atoms, False
+        if op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            continue  # zero-width
+        if op == sre_constants.SUBPATTERN:
+            sub, nullable = _first_chars(av[-1])
+        elif op == _ATOMIC_GROUP:
+            sub, nullable = _first_chars(av)
+        elif op == sre_constants.BRANCH:
+            sub, nullable = [], False
+            for branch in av[1]:
+                branch_atoms, branch_nullable = _first_chars(branch)
+                sub += branch_atoms
+                nullable = nullable or branch_nullable
+        elif op in _REPEAT_OPS:
+            sub, nullable = _first_chars(av[2])
+            nullable = nullable or av[0] == 0
+        else:  # back references, conditionals: could start with anything
+            sub, nullable = [_ANY_CHAR], True
+        atoms += sub
+        if not nullable:
+            return atoms, False
+    return atoms, True
+
+
+def _overlap(left: List, right: List, ignore_case: bool) -> bool:
+    """
+    Whether a character matched by one of `left` is matched by one of `right`.
+    """
+    candidates = set(_SAMPLE_CHARS)
+    for atom in left + right:
+        candidates.update(_mentioned_chars(atom))
+    return any(
+        any(_matches(a, ch, ignore_case) for a in left)
+        and any(_matches(b, ch, ignore_case) for b in right)
+        for ch in candidates
+    )
+
+
+def _mentioned_chars(atom) -> List[str]:
+    op, av = atom
+    if op in (sre_constants.LITERAL, sre_constants.NOT_LITERAL):
+        return [chr(av)]
+    chars = []
+    if op == sre_constants.IN:
+        for member_op, member_av in av:
+            if member_op == sre_constants.LITERAL:
+                chars.append(chr(member_av))
+            elif member_op == sre_constants.RANGE:
+                chars += [chr(member_av[0]), chr(member_av[1])]
+    return chars
+
+
+def _matches(atom, ch: str, ignore_case: bool) -> bool:
+    op, av = atom
+    if op == sre_constants.ANY:
+        return True
+    if op == sre_constants.LITERAL:
+        return _same_char(ch, av, ignore_case)
+    if op == sre_constants.NOT_LITERAL:
+        return not _same_char(ch, av, ignore_case)
+    negate = False
+    found = False
+    for member_op, member_av in av:
+        if member_op == sre_constants.NEGATE:
+            negate = True
+        elif member_op == sre_constants.LITERAL:
+            found = found or _same_char(ch, member_av, ignore_case)
+        elif member_op == sre_constants.RANGE:
+            lo, hi = member_av
+            variants = {ch, ch.lower(), ch.upper()} if ignore_case else {ch}
+            found = found or any(len(v) == 1 and lo <= ord(v) <= hi for v in variants)
+        elif member_op == sre_constants.CATEGORY:
+            found = found or _CATEGORIES.get(member_av, lambda _: True)(ch)
+        else:
+            found = True  # unknown member: assume it matches
+    return found != negate
+
+
+def _same_char(ch: str, code: int, ignore_case: bool) -> bool:
+    other = chr(code)
+    if ignore_case:
+        return ch.lower() == other.lower() or ch.upper() == other.upper()
+    return ch == other
+
+
+def _isolated_entry(conn, func: Callable, args: Tuple):
+    try:
+        conn.send(("ok", func(*args)))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def run_with_time_budget(func: Callable, args: Tuple, budget_seconds: float) -> Any:
+    """
+    Run func(*args) in a separate process and return its result.
+
+    The worker is killed if it does not answer within `budget_seconds`,
+    which is the only reliable way to stop a regex stuck in backtracking.
+    It is started from async_runtime.process_context() (never forked from
+    this process), so `func`, `args` and the result must be picklable; pass
+    the data the work reads, not objects shared with other requests.
+    Raises TaskTimeoutError on timeout and RuntimeError if the worker fails.
+    """
+    from app.utils.async_runtime import process_context
+
+    ctx = process_context()
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(
+        target=_isolated_entry, args=(child_conn, func, args), daemon=True
+    )
+    process.start()
+    child_conn.close()
+
+    try:
+        if not parent_conn.poll(budget_seconds):
+            raise TaskTimeoutError(
+                f"Task exceeded its time budget of {budget_seconds:g}s"
+            )
+        status, payload = parent_conn.recv()
+    except EOFError:
+        raise RuntimeError("Task worker exited without a result")
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        parent_conn.close()
+
+    if status != "ok":
+        raise RuntimeError(payload)
+    return payload
@@ -1,10 +1,342 @@
 # app/utils/regex_utils.py
 
 import re
+import logging
+from functools import lru_cache
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+try:  # Python 3.11+
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+    import sre_constants
+
+# Optional third-party engines
+try:
+    import regex as regex_module
+except ImportError:  # pragma: no cover - depends on the deployment
+    regex_module = None
+
+try:
+    import re2 as re2_module
+except ImportError:  # pragma: no cover - depends on the deployment
+    re2_module = None
 
 
 def convert_dollar_groups_to_python(replacement: str) -> str:
     """
-    Convert $1, $2, ... to \g<1>, \g<2> for Python's re.sub.
+    Convert $1, $2, ... to \\g<1>, \\g<2> for Python's re.sub.
     """
     return re.sub(r"\$(\d+)", r"\\g<\1>", replacement)
+
+
+# ---------------------------------------------------------------------------
+# Engine backends
+# ---------------------------------------------------------------------------
+
+
+class RegexEngine:
+    """
+    A regex backend. compile() returns an object exposing the stdlib
+    Pattern API used by the replace utilities: pattern, sub, subn, search,
+    finditer. Replacement templates use Python syntax (\\g<1>).
+    """
+
+    name = ""
+    linear_time = False
+
+    def available(self) -> bool:
+        return True
+
+    def supports(self, source: str) -> bool:
+        return True
+
+    def compile(self, source: str, flags: int = 0):
+        raise NotImplementedError
+
+
+class StdlibEngine(RegexEngine):
+    name = "re"
+
+    def supports(self, source: str) -> bool:
+        try:
+            re.compile(source)
+            return True
+        except re.error:
+            return False
+
+    def compile(self, source: str, flags: int = 0):
+        return re.compile(source, flags)
+
+
+class RegexModuleEngine(RegexEngine):
+    """
+    The third-party `regex` module: a superset of `re` (\\p{...} classes,
+    variable-length lookbehind, atomic groups, possessive quantifiers).
+    """
+
+    name = "regex"
+
+    def available(self) -> bool:
+        return regex_module is not None
+
+    def supports(self, source: str) -> bool:
+        try:
+            regex_module.compile(source)
+            return True
+        except Exception:
+            return False
+
+    def compile(self, source: str, flags: int = 0):
+        # V0 keeps `re`-compatible semantics; flag values are shared with `re`
+        return regex_module.compile(source, flags | regex_module.V0)
+
+
+# Constructs RE2 cannot execute (it guarantees linear time by omitting them)
+_RE2_UNSUPPORTED_OPS = {
+    sre_constants.ASSERT,
+    sre_constants.ASSERT_NOT,
+    sre_constants.GROUPREF,
+    sre_constants.GROUPREF_EXISTS,
+} | {
+    getattr(sre_constants, name)
+    for name in ("ATOMIC_GROUP", "POSSESSIVE_REPEAT")
+    if hasattr(sre_constants, name)
+}
+
+
+# Constructs RE2 accepts but matches differently from `re`: its \d, \w, \s
+# and \b are ASCII-only (re's are Unicode-aware), and its $ does not match
+# before a trailing newline
+_RE2_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT,
+    sre_constants.CATEGORY_NOT_DIGIT,
+    sre_constants.CATEGORY_WORD,
+    sre_constants.CATEGORY_NOT_WORD,
+    sre_constants.CATEGORY_SPACE,
+    sre_constants.CATEGORY_NOT_SPACE,
+}
+_RE2_ASCII_ANCHORS = {sre_constants.AT_BOUNDARY, sre_constants.AT_NON_BOUNDARY}
+
+
+class RE2Engine(RegexEngine):
+    """
+    Google RE2 through the `google-re2` package: linear-time matching,
+    immune to catastrophic backtracking, but without lookarounds or
+    backreferences. Some patterns it accepts match differently than with
+    `re` (see matches_like_re); those only run on RE2 when asked for.
+    """
+
+    name = "re2"
+    linear_time = True
+
+    def available(self) -> bool:
+        return re2_module is not None
+
+    def supports(self, source: str) -> bool:
+        try:
+            parsed = sre_parse.parse(source)
+        except Exception:
+            return False
+        # Checked first: RE2 logs every pattern it fails to compile
+        if _uses_ops(parsed, _RE2_UNSUPPORTED_OPS):
+            return False
+        try:
+            re2_module.compile(source)
+            return True
+        except Exception:
+            return False
+
+    def matches_like_re(self, source: str) -> bool:
+        """
+        True if RE2 finds the same matches as `re` for this pattern: it uses
+        none of \\d \\w \\s \\b and no $. (RE2 rejects the (?a) flag
+        that would make them ASCII-only in `re` too.)
+        """
+        try:
+            parsed = sre_parse.parse(source)
+        except Exception:
+            return False
+        return not _differs_in_re2(parsed)
+
+    def compile(self, source: str, flags: int = 0):
+        options = None
+        if flags & re.IGNORECASE:
+            options = re2_module.Options()
+            options.case_sensitive = False
+        return _RE2Pattern(re2_module.compile(source, options))
+
+
+class _RE2Pattern:
+    """
+    Adapter giving RE2 patterns Python replacement-template semantics.
+    """
+
+    def __init__(self, compiled):
+        self._compiled = compiled
+        self.pattern = compiled.pattern
+        self.flags = getattr(compiled, "flags", 0)
+
+    def search(self, string, *args):
+        return self._compiled.search(string, *args)
+
+    def finditer(self, string, *args):
+        return self._compiled.finditer(string, *args)
+
+    def subn(self, repl, string, count=0):
+        if isinstance(repl, str):
+            template = repl
+            repl = lambda m: _expand_template(template, m)  # noqa: E731
+        return self._compiled.subn(repl, string, count)
+
+    def sub(self, repl, string, count=0):
+        return self.subn(repl, string, count)[0]
+
+
+_TEMPLATE_TOKEN = re.compile(r"\\g<([^>]+)>|\\(\d{1,2})|\\(.)", re.S)
+_TEMPLATE_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\"}
+
+
+def _expand_template(template: str, match) -> str:
+    """
+    Expand \\g<n>, \\g<name>, \\n and standard escapes against a match object.
+    """
+
+    def token(m):
+        group = m.group(1) or m.group(2)
+        if group is not None:
+            key = int(group) if group.isdigit() else group
+            return match.group(key) or ""
+        return _TEMPLATE_ESCAPES.get(m.group(3), m.group(0))
+
+    return _TEMPLATE_TOKEN.sub(token, template)
+
+
+def _differs_in_re2(items) -> bool:
+    for op, av in items:
+        if op == sre_constants.AT and (
+            av in _RE2_ASCII_ANCHORS
+            or av in (sre_constants.AT_END, sre_constants.AT_END_STRING)
+        ):
+            return True
+        if op == sre_constants.IN and any(
+            kind == sre_constants.CATEGORY and value in _RE2_CATEGORIES for kind, value in av
+        ):
+            return True
+        if op == sre_constants.SUBPATTERN and _differs_in_re2(av[-1]):
+            return True
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and _differs_in_re2(av[2]):
+            return True
+        if op == sre_constants.BRANCH and any(_differs_in_re2(b) for b in av[1]):
+            return True
+    return False
+
+
+def _uses_ops(items, ops) -> bool:
+    for op, av in items:
+        if op in ops:
+            return True
+        if op == sre_constants.SUBPATTERN and _uses_ops(av[-1], ops):
+            return True
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and _uses_ops(
+            av[2], ops
+        ):
+            return True
+        if op == sre_constants.BRANCH and any(_uses_ops(b, ops) for b in av[1]):
+            return True
+    return False
+
+
+ENGINES: Dict[str, RegexEngine] = {
+    engine.name: engine for engine in (StdlibEngine(), RegexModuleEngine(), RE2Engine())
+}
+
+
+def get_engine(name: str) -> RegexEngine:
+    """
+    Return an installed engine by name ("re", "regex" or "re2").
+    Raises ValueError if the engine is unknown or not installed.
+    """
+    engine = ENGINES.get(name)
+    if engine is None:
+        raise ValueError(f"Unknown regex engine: '{name}'")
+    if not engine.available():
+        raise ValueError(f"Regex engine '{name}' is not installed")
+    return engine
+
+
+def select_engine(pattern, requested: Optional[str] = None) -> RegexEngine:
+    """
+    Pick the engine for a pattern.
+
+    `requested` (per task) overrides the REGEX_ENGINE setting. With "auto":
+      1) patterns flagged by the ReDoS analysis go to RE2 when it is installed,
+         supports them and finds the same matches as `re` would, since it
+         runs in linear time;
+      2) patterns only the `regex` module can compile go to `regex`;
+      3) everything else uses `re`.
+    Already-compiled patterns report the engine that compiled them.
+    Raises ValueError for anything else that is not a pattern string.
+    """
+    if isinstance(pattern, re.Pattern):
+        return ENGINES["re"]
+    if isinstance(pattern, _RE2Pattern):
+        return ENGINES["re2"]
+    if regex_module is not None and isinstance(pattern, regex_module.Pattern):
+        return ENGINES["regex"]
+    if not isinstance(pattern, str):
+        raise ValueError(f"Regex must be a string, not {type(pattern).__name__}")
+    return _select_cached(pattern, requested or _default_engine())
+
+
+def _default_engine() -> str:
+    from django.conf import settings
+
+    return getattr(settings, "REGEX_ENGINE", "auto")
+
+
+@lru_cache(maxsize=512)
+def _select_cached(source: str, requested: str) -> RegexEngine:
+    from app.utils.redos_guard import analyze_pattern
+
+    if requested != "auto":
+        engine = get_engine(requested)
+        if not engine.supports(source):
+            raise ValueError(f"Pattern is not supported by engine '{requested}'")
+        return engine
+
+    re2 = ENGINES["re2"]
+    if (
+        re2.available()
+        and analyze_pattern(source)
+        and re2.matches_like_re(source)
+        and re2.supports(source)
+    ):
+        return re2
+
+    stdlib = ENGINES["re"]
+    if not stdlib.supports(source):
+        alt = ENGINES["regex"]
+        if alt.available() and alt.supports(source):
+            return alt
+    return stdlib
+
+
+def compile_pattern(pattern, engine: Optional[str] = None):
+    """
+    Compile a pattern string with the selected engine (cached per process).
+    Already-compiled patterns are returned unchanged.
+    """
+    if not isinstance(pattern, str):
+        return pattern
+    return _compile_cached(pattern, engine or _default_engine())
+
+
+@lru_cache(maxsize=512)
+def _compile_cached(source: str, requested: str):
+    engine = _select_cached(source, requested)
+    logger.debug(f"Compiling pattern with engine '{engine.name}': {source}")
+    return engine.compile(source)
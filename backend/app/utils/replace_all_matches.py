@@ -1,46 +1,77 @@
 # app/utils/replace_all_matches.py
 
-import re
 import pandas as pd
 import logging
-from typing import List, Dict
-from app.utils.regex_utils import convert_dollar_groups_to_python
+from typing import List, Dict, Optional, Collection
+from app.utils.regex_utils import convert_dollar_groups_to_python, compile_pattern
 
 
 logger = logging.getLogger(__name__)
 
 
 def replace_all_matches(
-    df: pd.DataFrame, pattern: str, replacement: str, inplace: bool = False
+    df: pd.DataFrame,
+    pattern: str,
+    replacement: str,
+    inplace: bool = False,
+    candidates: Optional[Dict[str, Collection[int]]] = None,
+    dedup: bool = False,
 ) -> Dict:
     """
     Replace regex matches across the entire DataFrame. Returns:
       {
         "updated_df": df,
-        "replacements": [ { "row": r, "column": c_name, "original": o, "modified": m }, ... ]
+        "replacements": [ { "row": r, "column": c_name, "original": o, "modified": m }, ... ],
+        "cells_scanned": n,  # non-null cells the regex was run against
+        "matches": m         # regex matches found in those cells
       }
+    candidates: optional {column: row ids} restricting which cells of a column are
+                scanned (e.g. from a trigram index); columns not listed are scanned fully.
+    dedup: run the regex once per distinct value and reuse the result for
+           repeated values (for tables with few distinct values).
     Raises ValueError if no matches found.
     """
     if not inplace:
         df = df.copy()
 
     replacements: List[Dict] = []
-    regex = re.compile(pattern)
+    cells_scanned = 0
+    matches = 0
+    regex = compile_pattern(pattern)
     replacement = convert_dollar_groups_to_python(replacement)
+    results = {} if dedup else None
 
-    for r in range(len(df)):
+    candidates = candidates or {}
+    if candidates and all(c in candidates for c in df.columns):
+        rows = sorted(set().union(*candidates.values()))
+    else:
+        rows = range(len(df))
+
+    for r in rows:
         for c in df.columns:
+            if c in candidates and r not in candidates[c]:
+                continue
             original = df.at[r, c]
             if pd.isnull(original):
                 continue
+            cells_scanned += 1
             orig_str = str(original)
-            new_str = regex.sub(replacement, orig_str)
+            if results is None:
+                new_str, found = regex.subn(replacement, orig_str)
+            else:
+                if orig_str not in results:
+                    results[orig_str] = regex.subn(replacement, orig_str)
+                new_str, found = results[orig_str]
+            matches += found
             if new_str != orig_str:
                 df.at[r, c] = new_str
                 replacements.append(
                     {"row": r, "column": c, "original": orig_str, "modified": new_str}
                 )
 
-    if not replacements:
-        return {"updated_df": df, "replacements": []}
-    return {"updated_df": df, "replacements": replacements}
+    return {
+        "updated_df": df,
+        "replacements": replacements,
+        "cells_scanned": cells_scanned,
+        "matches": matches,
+    }
@@ -7,7 +7,7 @@ from typing import Dict
 
 # Import the helper that converts Excel-style letters to zero-based index
 from app.utils.target_resolver import column_letter_to_index
-from app.utils.regex_utils import convert_dollar_groups_to_python
+from app.utils.regex_utils import convert_dollar_groups_to_python, compile_pattern
 
 
 logger = logging.getLogger(__name__)
@@ -25,7 +25,9 @@ def replace_cell_match(
     Returns:
       {
         "updated_df": df,
-        "replacements": [ { "row": r, "column": c_name, "original": o, "modified": m } ]
+        "replacements": [ { "row": r, "column": c_name, "original": o, "modified": m } ],
+        "cells_scanned": 0 or 1,  # 0 when the cell is empty
+        "matches": m              # regex matches found in the cell
       }
     """
     if not inplace:
@@ -48,11 +50,11 @@ def replace_cell_match(
     column_name = df.columns[col_index]
     original = df.at[row_number, column_name]
     if pd.isnull(original):
-        return {"updated_df": df, "replacements": []}
+        return {"updated_df": df, "replacements": [], "cells_scanned": 0, "matches": 0}
 
     orig_str = str(original)
     replacement_python = convert_dollar_groups_to_python(replacement)
-    new_str = re.sub(pattern, replacement_python, orig_str)
+    new_str, matches = compile_pattern(pattern).subn(replacement_python, orig_str)
     if new_str != orig_str:
         df.at[row_number, column_name] = new_str
         return {
@@ -65,6 +67,8 @@ def replace_cell_match(
                     "modified": new_str,
                 }
             ],
+            "cells_scanned": 1,
+            "matches": matches,
         }
 
-    return {"updated_df": df, "replacements": []}
+    return {"updated_df": df, "replacements": [], "cells_scanned": 1, "matches": matches}
@@ -1,10 +1,9 @@
 # app/utils/replace_column_matches.py
 
-import re
 import pandas as pd
 import logging
-from typing import List, Dict
-from app.utils.regex_utils import convert_dollar_groups_to_python
+from typing import List, Dict, Optional, Collection
+from app.utils.regex_utils import convert_dollar_groups_to_python, compile_pattern
 
 
 logger = logging.getLogger(__name__)
@@ -16,13 +15,21 @@ def replace_column_matches(
     pattern: str,
     replacement: str,
     inplace: bool = False,
+    rows: Optional[Collection[int]] = None,
+    dedup: bool = False,
 ) -> Dict:
     """
     Replace regex matches in a specific column. Returns:
       {
         "updated_df": df,
-        "replacements": [ { "row": r, "column": column_name, "original": o, "modified": m }, ... ]
+        "replacements": [ { "row": r, "column": column_name, "original": o, "modified": m }, ... ],
+        "cells_scanned": n,  # non-null cells the regex was run against
+        "matches": m         # regex matches found in those cells
       }
+    rows: optional row ids to scan (e.g. candidates from a trigram index);
+          all rows are scanned when omitted.
+    dedup: run the regex once per distinct value and reuse the result for
+           repeated values (for columns with few distinct values).
     """
     if not inplace:
         df = df.copy()
@@ -31,15 +38,25 @@ def replace_column_matches(
         raise ValueError(f"Column '{column_name}' does not exist.")
 
     replacements: List[Dict] = []
-    regex = re.compile(pattern)
+    cells_scanned = 0
+    matches = 0
+    regex = compile_pattern(pattern)
     replacement = convert_dollar_groups_to_python(replacement)
+    results = {} if dedup else None
 
-    for r in range(len(df)):
+    for r in sorted(rows) if rows is not None else range(len(df)):
         original = df.at[r, column_name]
         if pd.isnull(original):
             continue
+        cells_scanned += 1
         orig_str = str(original)
-        new_str = regex.sub(replacement, orig_str)
+        if results is None:
+            new_str, found = regex.subn(replacement, orig_str)
+        else:
+            if orig_str not in results:
+                results[orig_str] = regex.subn(replacement, orig_str)
+            new_str, found = results[orig_str]
+        matches += found
         if new_str != orig_str:
             df.at[r, column_name] = new_str
             replacements.append(
@@ -51,4 +68,9 @@ def replace_column_matches(
                 }
             )
 
-    return {"updated_df": df, "replacements": replacements}
+    return {
+        "updated_df": df,
+        "replacements": replacements,
+        "cells_scanned": cells_scanned,
+        "matches": matches,
+    }
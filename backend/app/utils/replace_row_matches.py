@@ -1,10 +1,9 @@
 # app/utils/replace_row_matches.py
 
-import re
 import pandas as pd
 import logging
 from typing import List, Dict
-from app.utils.regex_utils import convert_dollar_groups_to_python
+from app.utils.regex_utils import convert_dollar_groups_to_python, compile_pattern
 
 
 logger = logging.getLogger(__name__)
@@ -21,7 +20,9 @@ def replace_row_matches(
     Replace regex matches in all columns of a specific row. Returns:
       {
         "updated_df": df,
-        "replacements": [ { "row": row_index, "column": c_name, "original": o, "modified": m }, ... ]
+        "replacements": [ { "row": row_index, "column": c_name, "original": o, "modified": m }, ... ],
+        "cells_scanned": n,  # non-null cells the regex was run against
+        "matches": m         # regex matches found in those cells
       }
     """
     if not inplace:
@@ -31,15 +32,19 @@ def replace_row_matches(
         raise ValueError(f"Row index {row_index} is out of range.")
 
     replacements: List[Dict] = []
-    regex = re.compile(pattern)
+    cells_scanned = 0
+    matches = 0
+    regex = compile_pattern(pattern)
     replacement = convert_dollar_groups_to_python(replacement)
 
     for c in df.columns:
         original = df.at[row_index, c]
         if pd.isnull(original):
             continue
+        cells_scanned += 1
         orig_str = str(original)
-        new_str = regex.sub(replacement, orig_str)
+        new_str, found = regex.subn(replacement, orig_str)
+        matches += found
         if new_str != orig_str:
             df.at[row_index, c] = new_str
             replacements.append(
@@ -51,4 +56,9 @@ def replace_row_matches(
                 }
             )
 
-    return {"updated_df": df, "replacements": replacements}
+    return {
+        "updated_df": df,
+        "replacements": replacements,
+        "cells_scanned": cells_scanned,
+        "matches": matches,
+    }
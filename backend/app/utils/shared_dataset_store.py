@@ -0,0 +1,427 @@
+# app/utils/shared_dataset_store.py
+
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from app.utils import metrics
+from app.utils.dataset_store import MB, DatasetQuotaError, DatasetVersionConflict
+from app.utils.payload_codec import PayloadCompressor
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+LOCK_FILE = ".lock"
+
+# Touch a manifest (its mtime is the last access) at most this often
+TOUCH_INTERVAL = 60.0
+# Unreferenced data files younger than this may still be in the middle of a put
+ORPHAN_GRACE = 300.0
+
+
+class SharedFileStore:
+    """
+    Dataset store on a directory shared by every worker process (and node).
+
+    Layout: <directory>/<owner>/manifest.json lists the current version of
+    each dataset of a session ({name: {"version", "token", "file", "size",
+    "stored"}}) and the data files next to it are never modified once
+    written. The random token is the version handed to clients (see
+    DatasetStore). Data files are compressed by `compressor`: "size" is the
+    payload's length, "stored" the file's.
+
+    - Writers hold an exclusive flock on <owner>/.lock, write new data files,
+      then publish them by writing a new manifest and renaming it over the
+      old one, so readers see either all of a put or none of it.
+    - Readers take no lock: they read the manifest and mmap the data file it
+      names (retrying if a concurrent put deleted it in between).
+    - Each process keeps recently read payloads in a hot cache of up to
+      `memory_max_bytes`; an entry is used only while the manifest still names
+      the same file, so a put from any process invalidates it.
+    - The manifest's mtime is the last access: sessions idle for `ttl` seconds
+      are deleted by the sweeper, and cache entries idle for `spill_after`
+      seconds are dropped (they remain on disk).
+    - `session_quota` limits a session's uncompressed payloads (what it costs
+      to load them); `global_quota` limits the bytes on disk.
+
+    Requires POSIX file locking (fcntl).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        memory_max_bytes: int,
+        session_quota: int,
+        global_quota: int,
+        ttl: float,
+        spill_after: float,
+        compressor: Optional[PayloadCompressor] = None,
+    ):
+        import fcntl  # POSIX only; the memory backend works everywhere
+
+        self._fcntl = fcntl
+        self.directory = directory
+        self.memory_max_bytes = memory_max_bytes
+        self.session_quota = session_quota
+        self.global_quota = global_quota
+        self.ttl = ttl
+        self.spill_after = spill_after
+        self.compressor = compressor or PayloadCompressor()
+        # (owner, name) → (file, payload, last access), least recently used first
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[str, str, float]]" = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        # Bytes on disk across all sessions: rescanned by sweep(), adjusted by puts
+        self._disk_bytes: Optional[int] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def put(self, owner: str, name: str, payload: str, expected: Optional[str] = None) -> str:
+        versions = self.put_many(
+            owner, {name: payload}, None if expected is None else {name: expected}
+        )
+        return versions[name]
+
+    def put_many(
+        self,
+        owner: str,
+        payloads: Dict[str, str],
+        expected: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, str]:
+        """
+        Store several datasets of one session in one manifest update (all or none).
+        Returns {name: version token}; `expected` makes the put conditional,
+        as in DatasetStore.put_many. Raises DatasetQuotaError if they do not fit.
+        """
+        directory = self._owner_dir(owner)
+        # Compress before taking the lock: it is the slow part of a put
+        encoded = {name: self.compressor.encode(p) for name, p in payloads.items()}
+        extension = self.compressor.codec.extension
+        with self._owner_lock(owner):
+            manifest = self._read_manifest(owner)
+            for name, token in (expected or {}).items():
+                current = _token(manifest[name]) if name in manifest else None
+                if current != token:
+                    raise DatasetVersionConflict(current)
+            previous = [manifest[n] for n in payloads if n in manifest]
+            delta = sum(len(p) for p in payloads.values()) - sum(i["size"] for i in previous)
+            stored_delta = sum(len(d) for d in encoded.values()) - sum(
+                _stored(i) for i in previous
+            )
+            self._check_quota(manifest, delta, stored_delta)
+
+            stale = []
+            for name, payload in payloads.items():
+                previous = manifest.get(name)
+                version = previous["version"] + 1 if previous else 1
+                token = uuid.uuid4().hex
+                filename = f"{quote(name, safe='')}.{token[:12]}.json{extension}"
+                _write_atomic(os.path.join(directory, filename), encoded[name])
+                manifest[name] = {
+                    "version": version,
+                    "token": token,
+                    "file": filename,
+                    "size": len(payload),
+                    "stored": len(encoded[name]),
+                }
+                if previous:
+                    stale.append(os.path.join(directory, previous["file"]))
+            _write_manifest(directory, manifest)
+
+            # Readers holding the old files keep their mapping; new readers see the manifest
+            for path in stale:
+                _remove(path)
+
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += stored_delta
+            for name, payload in payloads.items():
+                self._cache_locked(owner, name, manifest[name]["file"], payload)
+            self._shrink_cache_locked()
+        self._publish()
+        return {name: manifest[name]["token"] for name in payloads}
+
+    def get(self, owner: str, name: str) -> Optional[str]:
+        """
+        Return a dataset, from the hot cache if its version is still current.
+        Returns None if it does not exist or has expired.
+        """
+        found = self.get_versioned(owner, name)
+        return found[0] if found else None
+
+    def get_versioned(self, owner: str, name: str) -> Optional[Tuple[str, str]]:
+        """
+        Return (payload, version token) of a dataset; see get.
+        """
+        for _ in range(3):
+            manifest_path = os.path.join(self._owner_dir(owner), MANIFEST)
+            try:
+                mtime = os.path.getmtime(manifest_path)
+            except FileNotFoundError:
+                return None
+            if time.time() - mtime >= self.ttl:
+                return None
+            info = self._read_manifest(owner).get(name)
+            if info is None:
+                return None
+
+            with self._lock:
+                cached = self._cache.get((owner, name))
+                if cached is not None and cached[0] == info["file"]:
+                    self._cache_locked(owner, name, info["file"], cached[1])
+                    payload = cached[1]
+                else:
+                    payload = None
+            if payload is None:
+                try:
+                    payload = _read_mapped(
+                        os.path.join(self._owner_dir(owner), info["file"]),
+                        self.compressor,
+                    )
+                except FileNotFoundError:
+                    continue  # replaced by a concurrent put: read the new manifest
+                with self._lock:
+                    self._cache_locked(owner, name, info["file"], payload)
+                    self._shrink_cache_locked()
+                self._publish()
+
+            if time.time() - mtime >= TOUCH_INTERVAL:
+                _touch(manifest_path)
+            return payload, _token(info)
+
+        logger.warning(f"Dataset {owner}/{name} kept changing while being read")
+        return None
+
+    def delete(self, owner: str, name: Optional[str] = None):
+        """
+        Delete one dataset of a session, or all of them.
+        """
+        directory = self._owner_dir(owner)
+        with self._owner_lock(owner):
+            manifest = self._read_manifest(owner)
+            doomed = [n for n in manifest if name is None or n == name]
+            for n in doomed:
+                info = manifest.pop(n)
+                _remove(os.path.join(directory, info["file"]))
+            if doomed:
+                _write_manifest(directory, manifest)
+        with self._lock:
+            for n in doomed:
+                self._uncache_locked(owner, n)
+            self._disk_bytes = None
+        self._publish()
+
+    def sweep(self) -> Dict[str, int]:
+        """
+        Delete sessions idle for the TTL and orphaned data files, recount the
+        bytes on disk, and drop idle entries from this process's hot cache.
+        """
+        now = time.time()
+        evicted = set()
+        orphans = 0
+        disk_bytes = 0
+        try:
+            owners = os.listdir(self.directory)
+        except OSError:
+            owners = []
+        for entry in owners:
+            directory = os.path.join(self.directory, entry)
+            owner = unquote(entry)
+            if not os.path.isdir(directory):
+                continue
+            manifest_path = os.path.join(directory, MANIFEST)
+            try:
+                idle = now - os.path.getmtime(manifest_path)
+            except FileNotFoundError:
+                idle = now - os.path.getmtime(directory)
+            if idle >= self.ttl:
+                with self._owner_lock(owner):
+                    shutil.rmtree(directory, ignore_errors=True)
+                evicted.add(owner)
+                continue
+            referenced = {info["file"] for info in self._read_manifest(owner).values()}
+            for filename in os.listdir(directory):
+                if filename in (MANIFEST, LOCK_FILE):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if filename in referenced:
+                    disk_bytes += stat.st_size
+                elif now - stat.st_mtime >= ORPHAN_GRACE:
+                    _remove(path)
+                    orphans += 1
+
+        with self._lock:
+            self._disk_bytes = disk_bytes
+            cutoff = time.monotonic() - self.spill_after
+            idle_keys = [
+                key for key, (_, _, used) in self._cache.items()
+                if used < cutoff or key[0] in evicted
+            ]
+            for owner, name in idle_keys:
+                self._uncache_locked(owner, name)
+        if evicted:
+            metrics.inc("dataset_evictions_total", len(evicted), labels={"reason": "ttl"})
+            logger.info(f"Evicted the datasets of {len(evicted)} expired sessions")
+        self._publish()
+        return {"evicted": len(evicted), "orphans": orphans, "spilled": len(idle_keys)}
+
+    def usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "datasets": len(self._cache),
+                "memory_bytes": self._cache_bytes,
+                "disk_bytes": self._disk_bytes or 0,
+            }
+
+    # -- internals ------------------------------------------------------------
+
+    def _owner_dir(self, owner: str) -> str:
+        return os.path.join(self.directory, quote(owner, safe=""))
+
+    @contextmanager
+    def _owner_lock(self, owner: str):
+        """
+        Hold the exclusive lock of a session's directory, recreating it if the
+        sweeper removed it while we were waiting.
+        """
+        directory = self._owner_dir(owner)
+        path = os.path.join(directory, LOCK_FILE)
+        while True:
+            os.makedirs(directory, exist_ok=True)
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._fcntl.flock(fd, self._fcntl.LOCK_EX)
+            try:
+                if os.stat(path).st_ino == os.fstat(fd).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+        try:
+            yield
+        finally:
+            self._fcntl.flock(fd, self._fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _read_manifest(self, owner: str) -> Dict[str, Dict]:
+        try:
+            with open(os.path.join(self._owner_dir(owner), MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _check_quota(self, manifest: Dict[str, Dict], delta: int, stored_delta: int):
+        """
+        `delta` is the change of the session's payload bytes, `stored_delta`
+        the change of the bytes on disk.
+        """
+        owner_bytes = sum(info["size"] for info in manifest.values()) + delta
+        if delta > 0 and owner_bytes > self.session_quota:
+            metrics.inc("dataset_quota_rejections_total", labels={"scope": "session"})
+            raise DatasetQuotaError(
+                f"Dataset too large: {owner_bytes / MB:.1f} MB exceeds the "
+                f"{self.session_quota / MB:.1f} MB limit per session."
+            )
+        if stored_delta <= 0:
+            return
+        with self._lock:
+            disk_bytes = self._disk_bytes
+        if disk_bytes is None:
+            disk_bytes = self._scan_disk_bytes()
+            with self._lock:
+                self._disk_bytes = disk_bytes
+        if disk_bytes + stored_delta > self.global_quota:
+            metrics.inc("dataset_quota_rejections_total", labels={"scope": "global"})
+            raise DatasetQuotaError(
+                "Server storage for datasets is full. Please try again later."
+            )
+
+    def _scan_disk_bytes(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, filename))
+                except OSError:
+                    continue
+        return total
+
+    def _cache_locked(self, owner: str, name: str, filename: str, payload: str):
+        self._uncache_locked(owner, name)
+        self._cache[(owner, name)] = (filename, payload, time.monotonic())
+        self._cache_bytes += len(payload)
+
+    def _uncache_locked(self, owner: str, name: str):
+        entry = self._cache.pop((owner, name), None)
+        if entry is not None:
+            self._cache_bytes -= len(entry[1])
+
+    def _shrink_cache_locked(self):
+        while self._cache_bytes > self.memory_max_bytes and len(self._cache) > 1:
+            (owner, name), _ = next(iter(self._cache.items()))
+            self._uncache_locked(owner, name)
+            metrics.inc("dataset_spills_total")
+
+    def _publish(self):
+        # Only this process's cache: the shared disk usage would be counted once per worker
+        metrics.set_gauge(
+            "dataset_store_bytes", self.usage()["memory_bytes"], labels={"tier": "memory"}
+        )
+
+
+def _token(info: Dict) -> str:
+    # Manifests written before version tokens existed: the file name is unique too
+    return info.get("token") or info["file"]
+
+
+def _stored(info: Dict) -> int:
+    # Manifests written before compression: the file holds the plain payload
+    return info.get("stored", info["size"])
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _write_manifest(directory: str, manifest: Dict[str, Dict]):
+    _write_atomic(os.path.join(directory, MANIFEST), json.dumps(manifest).encode("ascii"))
+
+
+def _read_mapped(path: str, compressor: PayloadCompressor) -> str:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return compressor.decode(mapped)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not delete dataset file {path}: {e}")
+
+
+def _touch(path: str):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
@@ -0,0 +1,42 @@
+# app/utils/single_flight.py
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Runs a function once per key among concurrent callers (threads).
+
+    The first caller for a key runs it; callers arriving while it runs wait
+    and receive the same result (or exception) instead of repeating the work.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Return (result, shared): `shared` is True if another caller did the work.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
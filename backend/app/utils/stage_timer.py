@@ -0,0 +1,75 @@
+# app/utils/stage_timer.py
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# Timer of the request being handled; None when the request is not sampled
+_current: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """
+    Accumulates wall time per named stage for one request.
+    A stage entered several times (e.g. "regex" once per task) is summed.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def as_milliseconds(self) -> Dict[str, float]:
+        with self._lock:
+            return {name: round(s * 1000, 2) for name, s in self.stages.items()}
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time the enclosed block as `name` if the current request is sampled.
+    Costs one context variable lookup otherwise.
+    """
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - start)
+
+
+def start_timer() -> tuple:
+    """
+    Install a new timer for the current context; returns (timer, reset token).
+    """
+    timer = StageTimer()
+    return timer, _current.set(timer)
+
+
+def stop_timer(token):
+    _current.reset(token)
+
+
+def current_timer() -> Optional[StageTimer]:
+    return _current.get()
+
+
+_INVALID_TOKEN_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def server_timing_header(stages: Dict[str, float]) -> str:
+    """
+    Format {stage: milliseconds} as a Server-Timing header value.
+    """
+    return ", ".join(
+        f"{_INVALID_TOKEN_CHARS.sub('_', name)};dur={ms}" for name, ms in stages.items()
+    )
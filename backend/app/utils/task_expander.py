@@ -1,6 +1,6 @@
 # app/utils/task_expander.py
 
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import pandas as pd
 import re
 import logging
@@ -10,6 +10,9 @@ from app.utils.normalize_column_reference import normalize_column_reference
 
 logger = logging.getLogger(__name__)
 
+# Keywords a target starts with once its sheet qualifier is removed
+_TARGET_KEYWORDS = r"(?:all|cell|row|column|range)\b"
+
 
 def expand_task(df: pd.DataFrame, task: Dict[str, str]) -> List[Dict[str, str]]:
     """
@@ -18,8 +21,50 @@ def expand_task(df: pd.DataFrame, task: Dict[str, str]) -> List[Dict[str, str]]:
       - "target": one of "all", "column <idx>", "row <idx>", or "cell <r>,<c>"
       - "regex"
       - "replacement"
+      - any extra options of the original task (e.g. "engine"), copied unchanged
+    A target may name the sheet of a workbook it applies to, e.g.
+    "sheet Contacts column Email" (see split_sheet); `df` must then be that
+    sheet, and every expanded task carries it as "sheet".
     Raises ValueError if the target format cannot be parsed.
     """
+    sheet, target = split_sheet(task["target"])
+    if sheet is not None:
+        task = {**task, "target": target, "sheet": sheet}
+    expanded = _expand_target(df, task)
+    extras = {
+        k: v for k, v in task.items() if k not in ("target", "regex", "replacement")
+    }
+    if extras:
+        expanded = [{**t, **extras} for t in expanded]
+    return expanded
+
+
+def split_sheet(target: str) -> Tuple[Optional[str], str]:
+    """
+    Split a sheet qualifier off a target:
+      "sheet Contacts column Email"  -> ("Contacts", "column Email")
+      "sheet 'Q1 Sales' row 2 to 5"  -> ("Q1 Sales", "row 2 to 5")
+      "sheet Orders"                 -> ("Orders", "all")
+      "column Email"                 -> (None, "column Email")
+    Unquoted names end before the first target keyword (all, cell, row,
+    column, range); quote names that contain one.
+    """
+    raw = target.strip()
+    m = re.fullmatch(r"(?is)sheet\s+(.+)", raw)
+    if not m:
+        return None, raw
+    rest = m.group(1).strip()
+    if quoted := re.fullmatch(r"(?s)([\"'])(.+?)\1(?:\s+(.*))?", rest):
+        return quoted.group(2), (quoted.group(3) or "all").strip()
+    if named := re.fullmatch(rf"(?is)(.+?)\s+({_TARGET_KEYWORDS}.*)", rest):
+        return named.group(1).strip(), named.group(2).strip()
+    return rest, "all"
+
+
+def _expand_target(df: pd.DataFrame, task: Dict[str, str]) -> List[Dict[str, str]]:
+    """
+    Expand the target of a task; see expand_task.
+    """
     raw = task["target"].strip()
     regex = task["regex"]
     replacement = task["replacement"]
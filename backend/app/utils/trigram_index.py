@@ -0,0 +1,316 @@
+# app/utils/trigram_index.py
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+import pandas as pd
+
+try:  # Python 3.11+
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+    import sre_constants
+
+logger = logging.getLogger(__name__)
+
+NGRAM_SIZE = 3
+
+_REPEAT_OPS = {
+    sre_constants.MAX_REPEAT,
+    sre_constants.MIN_REPEAT,
+    getattr(sre_constants, "POSSESSIVE_REPEAT", sre_constants.MAX_REPEAT),
+}
+
+
+def extract_required_literals(pattern) -> List[str]:
+    """
+    Return literal substrings that every match of `pattern` must contain.
+
+    The analysis is conservative: anything it cannot reason about (alternation,
+    optional parts, case-insensitive sections, lookarounds) simply ends the
+    current literal run, so the result may be shorter than ideal but never wrong.
+    Accepts a pattern string or a compiled pattern.
+    """
+    source = getattr(pattern, "pattern", pattern)
+    flags = getattr(pattern, "flags", 0)
+    if not isinstance(source, str):
+        return []
+
+    try:
+        parsed = sre_parse.parse(source, flags)
+    except Exception:
+        return []
+
+    if (parsed.state.flags | flags) & sre_constants.SRE_FLAG_IGNORECASE:
+        return []
+
+    literals: List[str] = []
+    _collect_literals(parsed, literals)
+    return [lit for lit in literals if lit]
+
+
+def _collect_literals(items, out: List[str]):
+    """
+    Walk a parsed pattern sequence and append every maximal run of required literals.
+    """
+    run = []
+    for op, av in items:
+        if op == sre_constants.LITERAL:
+            run.append(chr(av))
+            continue
+
+        # Any other node ends the current contiguous run
+        if run:
+            out.append("".join(run))
+            run = []
+
+        if op == sre_constants.SUBPATTERN:
+            _group, add_flags, _del_flags, sub = av
+            if not add_flags & sre_constants.SRE_FLAG_IGNORECASE:
+                _collect_literals(sub, out)
+        elif op in _REPEAT_OPS:
+            min_count, _max_count, sub = av
+            if min_count >= 1:
+                _collect_literals(sub, out)
+
+    if run:
+        out.append("".join(run))
+
+
+def trigrams_of(text: str) -> Set[str]:
+    """
+    Return the set of distinct n-grams (NGRAM_SIZE characters) contained in `text`.
+    """
+    return {text[i : i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def required_trigrams(pattern) -> Set[str]:
+    """
+    Return the trigrams every match of `pattern` must contain (empty if unknown).
+    """
+    grams: Set[str] = set()
+    for literal in extract_required_literals(pattern):
+        grams |= trigrams_of(literal)
+    return grams
+
+
+class TrigramIndex:
+    """
+    Inverted index from trigrams to row ids, built lazily per column.
+
+    Postings are built from the string form of each non-null cell (the same
+    `str(value)` the replace utilities match against). Only columns of object
+    dtype are maintained incrementally; a write into any other column drops
+    its postings so they are rebuilt from the next DataFrame that is read.
+
+    An index shared through the cache is never written to: writers work on
+    a copy() and register it for the new dataset (see copy_index).
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, Set[int]]] = {}
+        self._dtypes: Dict[str, str] = {}
+        # Row sets this index may modify in place, per column: the others
+        # may be shared with the index it was copied from
+        self._owned: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def candidate_rows(self, df: pd.DataFrame, column, pattern) -> Optional[Set[int]]:
+        """
+        Return the rows of `column` that may match `pattern`,
+        or None when the pattern has no usable trigrams.
+        """
+        grams = required_trigrams(pattern)
+        if not grams:
+            return None
+
+        with self._lock:
+            postings = self._column_postings(df, column)
+            result: Optional[Set[int]] = None
+            for gram in sorted(grams, key=lambda g: len(postings.get(g, ()))):
+                rows = postings.get(gram)
+                if not rows:
+                    return set()
+                result = set(rows) if result is None else result & rows
+                if not result:
+                    return set()
+            return result
+
+    def update_cell(self, row: int, column, original: str, modified: str):
+        """
+        Reflect a cell write in the postings of an already-built column.
+        """
+        with self._lock:
+            postings = self._postings.get(column)
+            if postings is None:
+                return
+            if self._dtypes.get(column) != "object":
+                # Non-string columns may change representation on the next
+                # session round-trip, so rebuild them lazily instead.
+                del self._postings[column]
+                del self._dtypes[column]
+                self._owned.pop(column, None)
+                return
+
+            old_grams = trigrams_of(original)
+            new_grams = trigrams_of(modified)
+            owned = self._owned.setdefault(column, set())
+            for gram in old_grams - new_grams:
+                rows = postings.get(gram)
+                if rows is not None:
+                    rows = self._writable(postings, owned, gram, rows)
+                    rows.discard(row)
+                    if not rows:
+                        del postings[gram]
+            for gram in new_grams - old_grams:
+                rows = self._writable(postings, owned, gram, postings.get(gram, set()))
+                rows.add(row)
+
+    def copy(self) -> "TrigramIndex":
+        """
+        Return an index with the same postings that can be updated without
+        changing this one. Row sets are shared until the copy writes to them,
+        so copying costs one dict per built column.
+        """
+        clone = TrigramIndex()
+        with self._lock:
+            clone._postings = {col: dict(p) for col, p in self._postings.items()}
+            clone._dtypes = dict(self._dtypes)
+        return clone
+
+    def fork(self, pristine_df: pd.DataFrame) -> "TrigramIndexFork":
+        """
+        Return a throwaway view for previews that never mutates this index.
+        """
+        return TrigramIndexFork(self, pristine_df)
+
+    @staticmethod
+    def _writable(postings: Dict[str, Set[int]], owned: Set[str], gram: str, rows: Set[int]):
+        if gram not in owned:
+            rows = postings[gram] = set(rows)
+            owned.add(gram)
+        return rows
+
+    def _column_postings(self, df: pd.DataFrame, column) -> Dict[str, Set[int]]:
+        """
+        Return the postings for `column`, (re)building them if missing or stale.
+        Must be called with the lock held.
+        """
+        dtype = str(df[column].dtype)
+        if column in self._postings and self._dtypes.get(column) == dtype:
+            return self._postings[column]
+
+        postings: Dict[str, Set[int]] = {}
+        for r, value in enumerate(df[column].tolist()):
+            if pd.isnull(value):
+                continue
+            for gram in trigrams_of(str(value)):
+                postings.setdefault(gram, set()).add(r)
+
+        self._postings[column] = postings
+        self._dtypes[column] = dtype
+        self._owned[column] = set(postings)
+        logger.debug(
+            f"Built trigram postings for column '{column}': {len(postings)} trigrams"
+        )
+        return postings
+
+
+class TrigramIndexFork:
+    """
+    Copy-on-write view over a TrigramIndex used while previewing tasks.
+
+    Cells written during the preview are tracked as dirty and always returned
+    as candidates, so the shared postings stay untouched.
+    """
+
+    def __init__(self, base: TrigramIndex, pristine_df: pd.DataFrame):
+        self._base = base
+        self._pristine_df = pristine_df
+        self._dirty: Dict[str, Set[int]] = {}
+
+    def candidate_rows(self, df: pd.DataFrame, column, pattern) -> Optional[Set[int]]:
+        rows = self._base.candidate_rows(self._pristine_df, column, pattern)
+        if rows is None:
+            return None
+        return rows | self._dirty.get(column, set())
+
+    def update_cell(self, row: int, column, original: str, modified: str):
+        self._dirty.setdefault(column, set()).add(row)
+
+
+# ---------------------------------------------------------------------------
+# Per-dataset cache
+# ---------------------------------------------------------------------------
+
+_cache: "OrderedDict[str, TrigramIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _settings_value(name: str, default):
+    from django.conf import settings
+
+    return getattr(settings, name, default)
+
+
+def index_enabled() -> bool:
+    return bool(_settings_value("TRIGRAM_INDEX_ENABLED", True))
+
+
+def dataset_fingerprint(df_json: str) -> str:
+    """
+    Return a stable key for a serialized working DataFrame.
+    """
+    return hashlib.blake2b(df_json.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def get_index(df_json: str) -> Optional[TrigramIndex]:
+    """
+    Return the cached index for a dataset, creating an empty (lazy) one if needed.
+    """
+    if not index_enabled():
+        return None
+    key = dataset_fingerprint(df_json)
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is None:
+            index = TrigramIndex()
+            _cache[key] = index
+        _cache.move_to_end(key)
+        _evict_locked()
+        return index
+
+
+def copy_index(df_json: str) -> Optional[TrigramIndex]:
+    """
+    Return a copy of the index for a dataset that is about to be modified.
+    The cached index stays as it is, for previews (and other sessions with
+    the same data) reading it meanwhile and for the next request if the
+    modification is not stored; put_index registers the copy on success.
+    """
+    index = get_index(df_json)
+    return index.copy() if index is not None else None
+
+
+def put_index(df_json: str, index: Optional[TrigramIndex]):
+    """
+    Register an index under the fingerprint of a (new) serialized dataset.
+    """
+    if index is None or not index_enabled():
+        return
+    key = dataset_fingerprint(df_json)
+    with _cache_lock:
+        _cache[key] = index
+        _cache.move_to_end(key)
+        _evict_locked()
+
+
+def _evict_locked():
+    max_datasets = int(_settings_value("TRIGRAM_INDEX_MAX_DATASETS", 8))
+    while len(_cache) > max_datasets:
+        _cache.popitem(last=False)
+
@@ -0,0 +1,64 @@
+# app/views/batch.py
+
+import json
+import logging
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from app.services.batch_service import (
+    BatchError,
+    BatchTooLargeError,
+    collect_inputs,
+    stream_batch,
+)
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(["POST"])
+def batch_process(request):
+    """
+    Apply one task list to many files without touching the session's dataset.
+
+    multipart/form-data:
+        files: one or more .csv / .xlsx files, or .zip archives of them
+        tasks: JSON array of {"target", "regex", "replacement"} (targets may
+               name a sheet: "sheet Orders column Note")
+
+    The answer is a zip archive streamed while the files are processed in
+    the process pool: every output file (same name and format as its input)
+    as soon as it is done, then summary.json with per-file status,
+    replacements, failed tasks and timings.
+    """
+    try:
+        try:
+            tasks = json.loads(request.data.get("tasks") or "null")
+        except (TypeError, json.JSONDecodeError):
+            tasks = None
+        if not tasks or not isinstance(tasks, list) or not all(isinstance(t, dict) for t in tasks):
+            return Response({"error": "Missing or invalid 'tasks' array."}, status=400)
+
+        inputs, skipped = collect_inputs(request.FILES.getlist("files"))
+        logger.info(f"Batch started: {len(inputs)} files, {len(tasks)} tasks")
+        metrics.observe("batch_size_files", len(inputs))
+
+        response = StreamingHttpResponse(
+            stream_batch(inputs, tasks, skipped), content_type="application/zip"
+        )
+        response["Content-Disposition"] = 'attachment; filename="regexflow_batch.zip"'
+        response["X-Accel-Buffering"] = "no"  # send each file as soon as it is ready
+        return response
+
+    except BatchTooLargeError as e:
+        metrics.inc("dataset_quota_rejections_total", labels={"scope": "batch"})
+        logger.warning(f"Batch rejected: {e}")
+        return Response({"error": str(e)}, status=413)
+
+    except BatchError as e:
+        logger.warning(f"Batch rejected: {e}")
+        return Response({"error": str(e)}, status=400)
+
+    except Exception as e:
+        logger.exception("Unexpected error during batch processing.")
+        return Response({"error": "Unexpected error occurred."}, status=500)
@@ -0,0 +1,96 @@
+# app/views/explain.py
+
+import logging
+import pandas as pd
+from io import StringIO
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from app.services.replace_service import group_tasks_by_sheet
+from app.services.task_planner import estimate_plan, plan_task, public_plan
+from app.utils.dataset_store import (
+    WORKING,
+    load_versioned_dataset,
+    session_profile,
+    session_sheets,
+    sheet_dataset,
+)
+from app.utils.stage_timer import stage
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(["POST"])
+def explain_tasks(request):
+    """
+    POST Body:
+    {
+        "tasks": [{"target": "all", "regex": "...", "replacement": "..."}, ...],
+        "sample_rows": 200   # optional: rows sampled to time each task
+    }
+
+    Returns the plan apply_tasks would execute for each task (normalized
+    targets, cells to scan, engine, prefilter literals, distinct-value
+    dedup, isolation) with a run time estimated from a sample, and the
+    issues found (invalid or pathological patterns, likely timeouts).
+    Nothing is modified.
+    """
+    try:
+        tasks = request.data.get("tasks")
+        if not tasks or not isinstance(tasks, list) or not all(isinstance(t, dict) for t in tasks):
+            return Response({"error": "Missing or invalid 'tasks' array."}, status=400)
+        sample_rows = request.data.get("sample_rows")
+        if sample_rows is not None and (
+            isinstance(sample_rows, bool) or not isinstance(sample_rows, int) or sample_rows < 1
+        ):
+            return Response({"error": "'sample_rows' must be a positive integer."}, status=400)
+
+        session = request.session
+        sheets = session_sheets(session)
+        groups = group_tasks_by_sheet(tasks, sheets)
+
+        plans, versions = {}, {}
+        for sheet, sheet_tasks in groups.items():
+            with stage("dataset_load"):
+                name = sheet_dataset(session, WORKING, sheet or None)
+                loaded = load_versioned_dataset(session, name)
+            if loaded is None:
+                raise ValueError("No DataFrame found in session.")
+            df_json, versions[sheet] = loaded
+            with stage("read_json"):
+                df = pd.read_json(StringIO(df_json))
+            profile = session_profile(session, sheet)
+
+            for task in sheet_tasks:
+                with stage("plan"):
+                    plan = plan_task(df, task, profile=profile, count_cells=True)
+                with stage("estimate"):
+                    estimate = estimate_plan(df, plan, sample_rows)
+                plans[id(task)] = {
+                    **public_plan(plan),
+                    "estimate": estimate,
+                    **({"sheet": sheet} if len(sheets) > 1 else {}),
+                }
+
+        ordered = [plans[id(task)] for task in tasks]
+        estimates = [p["estimate"]["estimated_ms"] for p in ordered]
+        return Response(
+            {
+                "message": "Plan computed.",
+                "plans": ordered,
+                "total_cells": sum(p.get("cells", 0) for p in ordered),
+                # None when a sample could not finish (pathological pattern)
+                "estimated_ms": None if None in estimates else round(sum(estimates), 2),
+                "invalid_tasks": sum(1 for p in ordered if p["status"] != "ok"),
+                "issues": [
+                    {"task": p["task"], "issue": issue} for p in ordered for issue in p["issues"]
+                ],
+                "versions": versions,
+            }
+        )
+
+    except ValueError as e:
+        logger.warning(f"Explain validation error: {e}")
+        return Response({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.exception("Unexpected error during explain.")
+        return Response({"error": "Unexpected error occurred."}, status=500)
@@ -1,39 +1,87 @@
 # app/views/generate.py
 
+import json
 import logging
 import pandas as pd
 from io import StringIO
-from rest_framework.decorators import api_view
-from rest_framework.response import Response
-from app.services.generate_service import generate_and_expand_tasks
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from app.services.generate_service import agenerate_and_expand_tasks
+from app.services.job_service import start_job
+from app.utils.async_runtime import run_cpu
+from app.utils.dataset_store import aload_dataset
+from app.utils.stage_timer import stage
 
 logger = logging.getLogger(__name__)
 
 
-@api_view(["POST"])
-def generate_regex_tasks(request):
+@require_POST
+async def generate_regex_tasks(request):
+    """
+    Native async view: waiting on the LLM does not hold a worker thread.
+
+    With {"background": true} the generation runs as a job and the response
+    is 202 with the job id; poll /api/jobs/<id> or stream /api/jobs/<id>/events.
+    """
     try:
-        description = request.data.get("description")
+        data = _read_json(request)
+        description = data.get("description")
         if not description:
             logger.warning("Missing description in request.")
-            return Response({"error": "Missing description."}, status=400)
+            return JsonResponse({"error": "Missing description."}, status=400)
 
-        if "working_df" not in request.session:
+        with stage("dataset_load"):
+            df_json = await aload_dataset(request.session)
+        if df_json is None:
             logger.warning("No uploaded data found in session.")
-            return Response({"error": "No uploaded data found."}, status=400)
-
-        df_json = request.session["working_df"]
-        df = pd.read_json(StringIO(df_json))
+            return JsonResponse({"error": "No uploaded data found."}, status=400)
 
-        tasks = generate_and_expand_tasks(description, df)
+        if data.get("background"):
+            job = start_job(
+                "generate_tasks",
+                request.session.session_key,
+                lambda: _generate(description, df_json),
+            )
+            return JsonResponse(
+                {
+                    "job_id": job.id,
+                    "status_url": f"/api/jobs/{job.id}",
+                    "events_url": f"/api/jobs/{job.id}/events",
+                },
+                status=202,
+            )
 
-        logger.info(f"Regex tasks generated for description: {description}")
-        return Response({"tasks": tasks})
+        result = await _generate(description, df_json)
+        return JsonResponse(result)
 
     except ValueError as e:
         logger.warning(f"Regex task generation failed: {e}")
-        return Response({"error": str(e)}, status=400)
+        return JsonResponse({"error": str(e)}, status=400)
 
     except Exception as e:
         logger.exception("Unexpected error during regex task generation.")
-        return Response({"error": "Unexpected error occurred."}, status=500)
+        return JsonResponse({"error": "Unexpected error occurred."}, status=500)
+
+
+async def _generate(description: str, df_json: str):
+    with stage("read_json"):
+        df = await run_cpu(pd.read_json, StringIO(df_json))
+    tasks = await agenerate_and_expand_tasks(description, df)
+
+    logger.info(f"Regex tasks generated for description: {description}")
+    return {"tasks": tasks}
+
+
+def _read_json(request) -> dict:
+    """
+    Parse a JSON request body (form-encoded bodies are accepted as well).
+    """
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON body.")
+        if not isinstance(data, dict):
+            raise ValueError("Invalid JSON body.")
+        return data
+    return request.POST.dict()
@@ -0,0 +1,45 @@
+# app/views/jobs.py
+
+import json
+import logging
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from app.services.job_service import get_job, job_events
+
+logger = logging.getLogger(__name__)
+
+
+@require_GET
+async def job_status(request, job_id):
+    """
+    Return the state of a background job; the result is included once it succeeded.
+    """
+    job = get_job(job_id, request.session.session_key)
+    if job is None:
+        return JsonResponse({"error": "Job not found."}, status=404)
+    return JsonResponse(job.snapshot())
+
+
+@require_GET
+async def job_event_stream(request, job_id):
+    """
+    Server-Sent Events stream of job state changes.
+
+    Sends a "status" event per change and closes after the final
+    "succeeded" or "failed" state; comments keep idle connections alive.
+    """
+    job = get_job(job_id, request.session.session_key)
+    if job is None:
+        return JsonResponse({"error": "Job not found."}, status=404)
+
+    async def events():
+        async for snapshot in job_events(job):
+            if snapshot is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: status\ndata: {json.dumps(snapshot)}\n\n"
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+    return response
@@ -0,0 +1,22 @@
+# app/views/metrics.py
+
+import logging
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from app.utils.metrics import render
+
+logger = logging.getLogger(__name__)
+
+
+@require_GET
+def prometheus_metrics(request):
+    """
+    Metrics of every worker process, in Prometheus text exposition format.
+    """
+    try:
+        return HttpResponse(
+            render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+    except Exception as e:
+        logger.exception("Failed to render metrics.")
+        return HttpResponse("Internal server error.", status=500)
@@ -6,6 +6,8 @@ import numpy as np
 from io import StringIO
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from app.utils.dataset_store import load_versioned_dataset
+from app.utils.stage_timer import stage
 
 logger = logging.getLogger(__name__)
 
@@ -14,11 +16,14 @@ logger = logging.getLogger(__name__)
 def preview_data(request):
     try:
         # Get the uploaded DataFrame from session
-        df_json = request.session.get("working_df")
-        if df_json is None:
+        with stage("dataset_load"):
+            loaded = load_versioned_dataset(request.session)
+        if loaded is None:
             return Response({"error": "No working DataFrame found."}, status=400)
+        df_json, version = loaded
 
-        df = pd.read_json(StringIO(df_json))
+        with stage("read_json"):
+            df = pd.read_json(StringIO(df_json))
 
         # Get pagination parameters from query string
         page = int(request.GET.get("page", 1))
@@ -34,7 +39,8 @@ def preview_data(request):
             return Response({"error": "Page out of range."}, status=400)
 
         # Get current page data and replace NaN with None
-        page_data = df.iloc[start:end].replace({np.nan: None}).to_dict("records")
+        with stage("serialize"):
+            page_data = df.iloc[start:end].replace({np.nan: None}).to_dict("records")
 
         # Return paginated result
         return Response(
@@ -44,6 +50,7 @@ def preview_data(request):
                 "page_size": page_size,
                 "total_rows": total_rows,
                 "total_pages": total_pages,
+                "version": version,
             }
         )
 
@@ -5,7 +5,16 @@ from rest_framework.response import Response
 import logging
 import pandas as pd
 from io import StringIO
-from app.services.replace_service import preview_tasks
+from app.services.replace_service import preview_tasks, failed_tasks, group_tasks_by_sheet
+from app.utils.trigram_index import get_index
+from app.utils.dataset_store import (
+    WORKING,
+    load_versioned_dataset,
+    session_profile,
+    session_sheets,
+    sheet_dataset,
+)
+from app.utils.stage_timer import stage
 
 logger = logging.getLogger(__name__)
 
@@ -14,21 +23,48 @@ logger = logging.getLogger(__name__)
 def preview_replace_tasks(request):
     try:
         tasks = request.data.get("tasks")
-        if not tasks or not isinstance(tasks, list):
+        if not tasks or not isinstance(tasks, list) or not all(isinstance(t, dict) for t in tasks):
             return Response({"error": "Missing or invalid 'tasks' array."}, status=400)
 
-        df_json = request.session.get("working_df")
-        if df_json is None:
-            raise ValueError("No DataFrame found in session.")
+        session = request.session
+        sheets = session_sheets(session)
+        groups = group_tasks_by_sheet(tasks, sheets)
 
-        df = pd.read_json(StringIO(df_json))
-        diffs = preview_tasks(df, tasks)
+        diffs, reports, versions = [], [], {}
+        for sheet in [sheets[0]] + [s for s in groups if s != sheets[0]]:
+            with stage("dataset_load"):
+                loaded = load_versioned_dataset(session, sheet_dataset(session, WORKING, sheet or None))
+            if loaded is None:
+                raise ValueError("No DataFrame found in session.")
+            df_json, versions[sheet] = loaded
+            if sheet not in groups:
+                continue
+
+            with stage("read_json"):
+                df = pd.read_json(StringIO(df_json))
+            sheet_reports = []
+            sheet_diffs = preview_tasks(
+                df,
+                groups[sheet],
+                index=get_index(df_json),
+                profile=session_profile(session, sheet),
+                reports=sheet_reports,
+            )
+            # Name the sheet of each change once the workbook has several
+            tag = {"sheet": sheet} if len(sheets) > 1 else {}
+            diffs += [{**diff, **tag} for diff in sheet_diffs]
+            reports += [{**report, **tag} for report in sheet_reports]
 
         return Response(
             {
                 "message": "Preview completed.",
                 "total_matches": len(diffs),
                 "preview": diffs,
+                "failed_tasks": failed_tasks(reports),
+                "task_reports": reports,
+                # Send back with /api/replace to apply only if the data is unchanged
+                "version": versions[sheets[0]],
+                "versions": versions,
             }
         )
 
@@ -0,0 +1,29 @@
+# app/views/profile.py
+
+import logging
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from app.utils.dataset_store import session_profile, session_sheets
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(["GET"])
+def column_profile(request):
+    """
+    Return the cached per-column profile of the working dataset
+    (?sheet=<name> for a sheet of a workbook other than the first).
+    """
+    try:
+        sheet = request.GET.get("sheet")
+        if sheet is not None and sheet not in session_sheets(request.session):
+            return Response({"error": f"Unknown sheet '{sheet}'."}, status=400)
+        profile = session_profile(request.session, sheet)
+        if profile is None:
+            return Response({"error": "No column profile found."}, status=400)
+
+        return Response({"profile": profile})
+
+    except Exception as e:
+        logger.exception("Error occurred in column_profile.")
+        return Response({"error": "Internal server error."}, status=500)
@@ -2,14 +2,37 @@
 
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from app.services.replace_service import apply_tasks
+from app.services.replace_service import (
+    apply_tasks_to_payload,
+    apply_tasks_to_sheets,
+    failed_tasks,
+    group_tasks_by_sheet,
+)
+from app.utils.trigram_index import copy_index, put_index
+from app.utils.dataset_store import (
+    WORKING,
+    DatasetQuotaError,
+    DatasetVersionConflict,
+    load_versioned_dataset,
+    save_datasets,
+    save_session_profiles,
+    session_owner,
+    session_profile,
+    session_sheets,
+    sheet_dataset,
+)
+from app.utils.single_flight import SingleFlight
+from app.utils.stage_timer import stage
+from app.utils import metrics
+import hashlib
+import json
 import logging
-import pandas as pd
-import copy
-from io import StringIO
 
 logger = logging.getLogger(__name__)
 
+# Identical apply requests (same session, dataset versions and tasks) in flight at once
+_applies = SingleFlight()
+
 
 @api_view(["POST"])
 def replace_tasks(request):
@@ -19,42 +42,78 @@ def replace_tasks(request):
         "tasks": [
             {"target": "column Email", "regex": "...", "replacement": "..."},
             {"target": "cell B2", "regex": "...", "replacement": "..."},
+            {"target": "sheet Orders column Note", "regex": "...", "replacement": "..."},
             ...
-        ]
+        ],
+        "version": "...",   # optional: the version of the first sheet the tasks were previewed on
+        "versions": {...}   # optional: {sheet: version} for the other sheets
     }
+
+    Tasks without a "sheet <name>" qualifier edit the first sheet. The sheets
+    the tasks touch are edited independently (in parallel for several) and
+    stored together, only if nobody changed any of them meanwhile; otherwise
+    the answer is 409 with the current "version". A request identical to one
+    still running (e.g. a double-click) waits for it and returns the same
+    result, with "deduplicated": true.
     """
     try:
         data = request.data
         tasks = data.get("tasks")
+        versions = data.get("versions") or {}
+        version = data.get("version")
 
-        if not tasks or not isinstance(tasks, list):
+        if not tasks or not isinstance(tasks, list) or not all(isinstance(t, dict) for t in tasks):
             return Response({"error": "Missing or invalid 'tasks' array."}, status=400)
+        if not isinstance(versions, dict) or not all(
+            isinstance(s, str) and isinstance(v, str) for s, v in versions.items()
+        ):
+            return Response(
+                {"error": "'versions' must map sheet names to version strings."}, status=400
+            )
+        if version is not None and not isinstance(version, str):
+            return Response({"error": "'version' must be a string."}, status=400)
+        expected = dict(versions)
 
-        df_json = request.session.get("working_df")
-        if df_json is None:
-            raise ValueError("No DataFrame found in session.")
-
-        # Load the original DataFrame from session
-        df = pd.read_json(StringIO(df_json))
+        session = request.session
+        sheets = session_sheets(session)
+        groups = group_tasks_by_sheet(tasks, sheets)
+        if version is not None:
+            expected[sheets[0]] = version
 
-        # Make a deep copy to avoid modifying the original DataFrame directly
-        original_df = copy.deepcopy(df)
+        # The first sheet is always read: its version is the dataset's version
+        loaded = {}
+        with stage("dataset_load"):
+            for sheet in [sheets[0]] + [s for s in groups if s != sheets[0]]:
+                entry = load_versioned_dataset(session, sheet_dataset(session, WORKING, sheet or None))
+                if entry is None:
+                    raise ValueError("No DataFrame found in session.")
+                loaded[sheet] = entry
 
-        logger.info(f"Starting regex task application: {len(tasks)} tasks")
+        # Fail fast: the tasks were made for a version that has been replaced
+        for sheet, (_, version) in loaded.items():
+            if expected.get(sheet) is not None and expected[sheet] != version:
+                raise DatasetVersionConflict(loaded[sheets[0]][1])
 
-        # Apply regex replacements to the copied DataFrame
-        replacements = apply_tasks(original_df, tasks)
+        key = (
+            session_owner(session),
+            tuple((sheet, version) for sheet, (_, version) in loaded.items()),
+            _fingerprint(tasks),
+        )
+        result, shared = _applies.run(key, lambda: _apply(session, sheets, loaded, groups))
+        if shared:
+            metrics.inc("replace_deduplicated_total")
+            logger.info("Replace request joined an identical request in flight")
+            return Response({**result, "deduplicated": True})
+        return Response(result)
 
-        # Save the modified DataFrame back to the session
-        request.session["working_df"] = original_df.to_json()
+    except DatasetVersionConflict as e:
+        metrics.inc("dataset_version_conflicts_total")
+        logger.warning(f"Replace rejected: dataset is now at version {e.current}")
+        return Response({"error": str(e), "version": e.current}, status=409)
 
-        return Response(
-            {
-                "message": "Tasks applied successfully.",
-                "total_replacements": len(replacements),
-                "preview": replacements[:10],
-            }
-        )
+    except DatasetQuotaError as e:
+        logger.warning(f"Modified dataset rejected: {e}")
+        return Response({"error": str(e)}, status=413)
 
     except ValueError as e:
         logger.warning(f"Validation error during multi-task replacement: {e}")
@@ -63,3 +122,73 @@ def replace_tasks(request):
     except Exception as e:
         logger.exception("Unexpected error during multi-task replacement.")
         return Response({"error": "Unexpected error occurred."}, status=500)
+
+
+def _apply(session, sheets, loaded, groups) -> dict:
+    """
+    Apply each sheet's tasks to the dataset read at its version and store
+    the results together, unless another request stored a new version first.
+    """
+    first = sheets[0]
+    logger.info(
+        f"Starting regex task application: {sum(len(t) for t in groups.values())} tasks "
+        f"on {len(groups)} sheet(s)"
+    )
+
+    if len(groups) == 1:
+        (sheet, tasks), = groups.items()
+        df_json = loaded[sheet][0]
+        # Update a copy of the dataset's trigram index, registered once stored
+        index = copy_index(df_json)
+        results = {
+            sheet: apply_tasks_to_payload(
+                df_json, tasks, index=index, profile=session_profile(session, sheet)
+            )
+        }
+    else:
+        index = None
+        results = apply_tasks_to_sheets({
+            sheet: (loaded[sheet][0], tasks, session_profile(session, sheet))
+            for sheet, tasks in groups.items()
+        })
+
+    # Save the modified sheets back to the dataset store
+    names = {sheet: sheet_dataset(session, WORKING, sheet or None) for sheet in results}
+    with stage("dataset_save"):
+        saved = save_datasets(
+            session,
+            {names[sheet]: result["payload"] for sheet, result in results.items()},
+            expected_versions={names[sheet]: loaded[sheet][1] for sheet in results},
+        )
+    if index is not None:
+        (result,) = results.values()
+        put_index(result["payload"], index)
+
+    profiles = {
+        sheet: result["profile"] for sheet, result in results.items() if result["profile"] is not None
+    }
+    if profiles:
+        save_session_profiles(session, profiles)
+
+    # Name the sheet of each change once the workbook has several
+    replacements, reports = [], []
+    for sheet, result in results.items():
+        tag = {"sheet": sheet} if len(sheets) > 1 else {}
+        replacements += [{**rep, **tag} for rep in result["replacements"]]
+        reports += [{**rep, **tag} for rep in result["reports"]]
+
+    versions = {sheet: saved[names[sheet]] for sheet in results}
+    return {
+        "message": "Tasks applied successfully.",
+        "total_replacements": len(replacements),
+        "preview": replacements[:10],
+        "failed_tasks": failed_tasks(reports),
+        "task_reports": reports,
+        "version": versions.get(first, loaded[first][1]),
+        "versions": versions,
+    }
+
+
+def _fingerprint(tasks) -> str:
+    canonical = json.dumps(tasks, sort_keys=True, default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,61 @@
+# app/views/scan.py
+
+import logging
+import pandas as pd
+from io import StringIO
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from app.services.scan_service import SCAN_ORDER, scan_dataframe
+from app.utils.dataset_store import WORKING, load_dataset, session_profile, sheet_dataset
+from app.utils.stage_timer import stage
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(["POST"])
+def scan_pii(request):
+    """
+    POST Body (all fields optional):
+    {
+        "types": ["email", "phone", "date", "postcode", "abn"],
+        "max_locations": 100,
+        "sheet": "Orders"    # a sheet of a workbook upload (default: the first)
+    }
+    """
+    try:
+        types = request.data.get("types")
+        if types is not None and (
+            not isinstance(types, list)
+            or not types
+            or not all(isinstance(t, str) and t in SCAN_ORDER for t in types)
+        ):
+            return Response(
+                {"error": f"'types' must be a non-empty array of: {', '.join(SCAN_ORDER)}."},
+                status=400,
+            )
+        max_locations = int(request.data.get("max_locations", 100))
+        sheet = request.data.get("sheet")
+
+        with stage("dataset_load"):
+            df_json = load_dataset(request.session, sheet_dataset(request.session, WORKING, sheet))
+        if df_json is None:
+            raise ValueError("No DataFrame found in session.")
+
+        with stage("read_json"):
+            df = pd.read_json(StringIO(df_json))
+        with stage("scan"):
+            result = scan_dataframe(
+                df,
+                types=types,
+                max_locations=max_locations,
+                profile=session_profile(request.session, sheet),
+            )
+
+        return Response({"message": "Scan completed.", **result})
+
+    except ValueError as e:
+        logger.warning(f"Scan validation error: {e}")
+        return Response({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.exception("Unexpected error during scan.")
+        return Response({"error": "Unexpected error occurred."}, status=500)
@@ -3,9 +3,24 @@
 import logging
 import json
 import numpy as np
+from django.conf import settings
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from app.services.upload_service import handle_upload
+from app.utils.dataset_store import (
+    ORIGINAL,
+    PROFILES_KEY,
+    SHEETS_KEY,
+    WORKING,
+    MB,
+    DatasetQuotaError,
+    delete_datasets,
+    save_datasets,
+    sheet_dataset_name,
+)
+from app.utils.trigram_index import get_index
+from app.utils.stage_timer import stage
+from app.utils import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +32,47 @@ def upload_file(request):
         file = request.FILES["file"]
         logger.debug(f"Received upload request: {file.name}")
 
-        # Read the file into DataFrame, extract preview and column names
-        df, columns = handle_upload(file)
+        # Reject oversized files before parsing them into memory
+        if file.size > settings.MAX_UPLOAD_BYTES:
+            metrics.inc("dataset_quota_rejections_total", labels={"scope": "upload"})
+            logger.warning(f"Upload rejected: {file.name} is {file.size} bytes")
+            return Response(
+                {
+                    "error": f"File too large: {file.size / MB:.1f} MB "
+                    f"(limit {settings.MAX_UPLOAD_BYTES / MB:.1f} MB)."
+                },
+                status=413,
+            )
+
+        # Read the file into one DataFrame per sheet; preview and columns are the first sheet's
+        sheets, columns, working, profiles = handle_upload(file)
+        for sheet_df in sheets.values():
+            metrics.observe("dataset_rows", len(sheet_df))
+            metrics.observe("dataset_cells", sheet_df.size)
+        df = next(iter(sheets.values()))
+
+        # Store the original upload (for downloads before any edit) and the
+        # working DataFrame (used by replace and preview) of every sheet outside the session
+        payloads = {}
+        with stage("to_json"):
+            for index, (name, sheet_df) in enumerate(sheets.items()):
+                safe_data = sheet_df.replace({np.nan: None}).to_dict(orient="records")
+                payloads[sheet_dataset_name(ORIGINAL, index)] = json.dumps(safe_data, default=str)
+                payloads[sheet_dataset_name(WORKING, index)] = working[name]
+        df_json = payloads[WORKING]
+        with stage("dataset_save"):
+            versions = save_datasets(request.session, payloads)
+
+        # Drop the extra sheets of an earlier upload
+        previous_sheets = request.session.get(SHEETS_KEY) or []
+        stale = [
+            sheet_dataset_name(name, index)
+            for index in range(len(sheets), len(previous_sheets))
+            for name in (WORKING, ORIGINAL)
+        ]
+        if stale:
+            delete_datasets(request.session, stale)
+        request.session[SHEETS_KEY] = list(sheets)
 
         # Save file format
         if file.name.endswith(".xlsx"):
@@ -29,12 +83,12 @@ def upload_file(request):
         # Save original filename
         request.session["uploaded_filename"] = file.name
 
-        # Save uploaded data (for original download)
-        safe_data = df.replace({np.nan: None}).to_dict(orient="records")
-        request.session["uploaded_data"] = json.dumps(safe_data, default=str)
+        # Cache the column profiles (used to skip columns and to show where PII lives)
+        request.session[PROFILES_KEY] = profiles
+        request.session.pop("column_profile", None)
 
-        # Save working DataFrame (used by replace and preview)
-        request.session["working_df"] = df.to_json()
+        # Register a trigram index for the dataset; postings are built per column on first use
+        get_index(df_json)
 
         # Generate first-page preview (default page=1, page_size=50)
         page = 1
@@ -44,20 +98,36 @@ def upload_file(request):
         preview = df.iloc[start:end].replace({np.nan: None}).to_dict("records")
         total_rows = len(df)
 
-        logger.info(f"Upload successful: {file.name}, columns: {columns}")
+        logger.info(f"Upload successful: {file.name}, sheets: {len(sheets)}, columns: {columns}")
 
         return Response(
             {
                 "columns": columns,
+                "profile": profiles[next(iter(sheets))],
                 "preview": preview,
                 "page": page,
                 "page_size": page_size,
                 "total_rows": total_rows,
                 "total_pages": (total_rows + page_size - 1) // page_size,
                 "message": "File uploaded successfully.",
+                "version": versions[WORKING],
+                "sheets": [
+                    {
+                        "name": sheet,
+                        "columns": list(sheet_df.columns),
+                        "total_rows": len(sheet_df),
+                        "version": versions[sheet_dataset_name(WORKING, index)],
+                        "profile": profiles[sheet],
+                    }
+                    for index, (sheet, sheet_df) in enumerate(sheets.items())
+                ],
             }
         )
 
+    except DatasetQuotaError as e:
+        logger.warning(f"Upload rejected: {e}")
+        return Response({"error": str(e)}, status=413)
+
     except ValueError as e:
         logger.warning(f"Upload failed: {e}")
         return Response({"error": str(e)}, status=400)
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import os
 
 from pathlib import Path
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -50,8 +51,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "app.middleware.MetricsMiddleware",
+    "app.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "app.middleware.TimedSessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -162,3 +165,88 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 APPEND_SLASH = True
+
+# Trigram index used to narrow the rows scanned by "all"/"column" regex tasks
+TRIGRAM_INDEX_ENABLED = os.getenv("TRIGRAM_INDEX_ENABLED", "true").lower() == "true"
+TRIGRAM_INDEX_MAX_DATASETS = int(os.getenv("TRIGRAM_INDEX_MAX_DATASETS", "8"))
+
+# ReDoS protection: which tasks run in a killable worker ("risky", "always" or "never")
+# and how many seconds each of those tasks may take before it is reported as timed out.
+# "risky" only bounds patterns the static analysis flags (nested quantifiers, overlapping
+# repeated alternations); "always" also bounds the slow patterns it misses, at the cost of
+# starting a worker and copying the task's columns for every task.
+REGEX_TASK_ISOLATION = os.getenv("REGEX_TASK_ISOLATION", "risky")
+REGEX_TASK_TIME_BUDGET = float(os.getenv("REGEX_TASK_TIME_BUDGET", "5"))
+
+# Each task logs one execution report; with DEBUG logging on, this fraction of
+# its simple tasks (rows, cells, ...) is also traced individually
+REGEX_TRACE_SAMPLE_RATE = float(os.getenv("REGEX_TRACE_SAMPLE_RATE", "0.01"))
+
+# Default regex engine: "auto", "re", "regex" (pip install regex) or "re2" (pip install google-re2).
+# "auto" sends risky patterns to RE2 when installed and it matches them like `re` (no \d \w \s \b $,
+# which RE2 treats as ASCII-only / end of text), and patterns only `regex` can compile to `regex`.
+REGEX_ENGINE = os.getenv("REGEX_ENGINE", "auto")
+
+# Task plans: "all"/"column" tasks run the regex once per distinct value when the column profile
+# shows at most REGEX_DEDUP_MAX_DISTINCT_RATIO distinct values per non-null cell.
+REGEX_DEDUP_MAX_DISTINCT_RATIO = float(os.getenv("REGEX_DEDUP_MAX_DISTINCT_RATIO", "0.5"))
+# /api/explain times each task on EXPLAIN_SAMPLE_ROWS sampled rows; patterns with a backtracking
+# risk are sampled in a worker killed after EXPLAIN_SAMPLE_BUDGET seconds.
+EXPLAIN_SAMPLE_ROWS = int(os.getenv("EXPLAIN_SAMPLE_ROWS", "200"))
+EXPLAIN_SAMPLE_BUDGET = float(os.getenv("EXPLAIN_SAMPLE_BUDGET", "1.0"))
+
+# LLM answers are cached on disk, keyed by model, prompt version, description and columns.
+# LLM_BACKEND=fake (read by app.utils.openai_client) swaps in an offline deterministic model.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", str(BASE_DIR / "llm_cache.sqlite3"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+# Answer formulaic descriptions ("redact emails in column Email") locally before calling the LLM
+RULE_PARSER_ENABLED = os.getenv("RULE_PARSER_ENABLED", "true").lower() == "true"
+
+# Threads for CPU-bound work offloaded by async views (None = Python's default)
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", "0")) or None
+# Worker processes for parallel CPU-bound work (workbook sheets; None = one per CPU)
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", "0")) or None
+# Seconds a finished background job stays available at /api/jobs/<id>
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))
+
+# Fraction of requests timed stage by stage (Server-Timing header + one log line each)
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", "1.0" if DEBUG else "0.05"))
+
+# /api/metrics: each worker process writes its counters to its own file in METRICS_DIR
+# (from a background thread, every METRICS_FLUSH_INTERVAL seconds, and at exit) and the
+# endpoint merges all of them, folding the files of exited workers into one retired file.
+# Point every worker of a deployment at the same directory and empty it on deploy.
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "regexflow_metrics"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1.0"))
+
+# Datasets (the working DataFrame and the original upload) are kept out of the session, in a
+# per-process store: in memory up to DATASET_MEMORY_MAX_BYTES, then spilled to DATASET_STORE_DIR.
+# Datasets idle for DATASET_SPILL_AFTER seconds go to disk; after DATASET_TTL seconds they are deleted.
+# DATASET_STORE_BACKEND = "file" keeps them only in DATASET_STORE_DIR (with a per-process hot cache),
+# so any worker or node sharing that directory can serve any session.
+DATASET_STORE_BACKEND = os.getenv("DATASET_STORE_BACKEND", "memory")
+DATASET_STORE_DIR = os.getenv("DATASET_STORE_DIR", os.path.join(tempfile.gettempdir(), "regexflow_datasets"))
+DATASET_MEMORY_MAX_BYTES = int(os.getenv("DATASET_MEMORY_MAX_BYTES", str(512 * 1024 * 1024)))
+DATASET_SESSION_QUOTA = int(os.getenv("DATASET_SESSION_QUOTA", str(512 * 1024 * 1024)))
+DATASET_STORE_MAX_BYTES = int(os.getenv("DATASET_STORE_MAX_BYTES", str(4 * 1024 * 1024 * 1024)))
+DATASET_TTL = float(os.getenv("DATASET_TTL", "86400"))
+DATASET_SPILL_AFTER = float(os.getenv("DATASET_SPILL_AFTER", "300"))
+DATASET_SWEEP_INTERVAL = float(os.getenv("DATASET_SWEEP_INTERVAL", "60"))
+# Dataset files written to DATASET_STORE_DIR are compressed: "auto" uses zstd, else lz4 (when
+# installed), else zlib; "none" stores plain JSON. An empty level uses the codec's default.
+DATASET_COMPRESSION = os.getenv("DATASET_COMPRESSION", "auto")
+DATASET_COMPRESSION_LEVEL = os.getenv("DATASET_COMPRESSION_LEVEL", "")
+# Larger uploads are rejected with 413 before they are parsed
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+# XLSX uploads: every sheet becomes a dataset. XLSX_READER = "auto" uses python-calamine when
+# installed, else a streaming openpyxl reader; workbooks of several sheets of at least
+# XLSX_PARALLEL_MIN_BYTES are parsed one sheet per worker process.
+XLSX_READER = os.getenv("XLSX_READER", "auto")
+XLSX_PARALLEL_MIN_BYTES = int(os.getenv("XLSX_PARALLEL_MIN_BYTES", str(1024 * 1024)))
+# /api/batch: at most BATCH_MAX_FILES files (zip archives count their members) and
+# BATCH_MAX_BYTES of uncompressed input per request; each file is limited by MAX_UPLOAD_BYTES.
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "100"))
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_BYTES", str(500 * 1024 * 1024)))
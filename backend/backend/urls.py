@@ -7,21 +7,35 @@ See: https://docs.djangoproject.com/en/5.1/topics/http/urls/
 
 from django.contrib import admin
 from django.urls import path
-from app.views.upload import upload_file
-from app.views.generate import generate_regex_tasks
-from app.views.replace import replace_tasks
-from app.views.download import download_file
-from app.views.csrf import get_csrf_token
-from app.views.preview_data import preview_data
-from app.views.preview_replace import preview_replace_tasks
+from app.utils.lazy_view import lazy_view
+
+# Views are imported on first use so that management commands and worker
+# boot don't pay for pandas/openpyxl/openai. DRF views are CSRF-exempt
+# (DRF enforces CSRF itself for authenticated sessions).
+
+
+def api_view(name: str):
+    return lazy_view(f"app.views.{name}", csrf_exempt=True)
+
+
+def async_view(name: str):
+    return lazy_view(f"app.views.{name}", is_async=True)
+
 
 urlpatterns = [
     path("admin", admin.site.urls),
-    path("api/upload", upload_file),
-    path("api/preview_data", preview_data),
-    path("api/generate_tasks", generate_regex_tasks),
-    path("api/preview_replace", preview_replace_tasks),
-    path("api/replace", replace_tasks),
-    path("api/download", download_file),
-    path("api/get_csrf", get_csrf_token),
+    path("api/upload", api_view("upload.upload_file")),
+    path("api/preview_data", api_view("preview_data.preview_data")),
+    path("api/generate_tasks", async_view("generate.generate_regex_tasks")),
+    path("api/preview_replace", api_view("preview_replace.preview_replace_tasks")),
+    path("api/explain", api_view("explain.explain_tasks")),
+    path("api/profile", api_view("profile.column_profile")),
+    path("api/scan", api_view("scan.scan_pii")),
+    path("api/replace", api_view("replace.replace_tasks")),
+    path("api/download", api_view("download.download_file")),
+    path("api/batch", api_view("batch.batch_process")),
+    path("api/jobs/<str:job_id>", async_view("jobs.job_status")),
+    path("api/jobs/<str:job_id>/events", async_view("jobs.job_event_stream")),
+    path("api/get_csrf", lazy_view("app.views.csrf.get_csrf_token")),
+    path("api/metrics", lazy_view("app.views.metrics.prometheus_metrics")),
 ]
@@ -0,0 +1,121 @@
+# benchmarks/bench_compression.py
+"""
+Compare the payload codecs on the datasets an upload stores.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_compression [--sizes 10k,100k] [--repeat 3]
+                                           [--codecs zstd,lz4,zlib]
+                                           [--levels zstd=1,3,9 zlib=1,6]
+
+For each size, the two payloads an upload stores are built from
+benchmarks.datasets data: the working DataFrame (df.to_json()) and the
+original upload (records JSON). Every installed codec compresses them at
+several levels; the table shows the stored size, how many times smaller it
+is than the JSON ("x json") and than the uploaded CSV ("x csv"), and the
+best encode and decode times, i.e. the CPU a spill or a shared-store put
+and read costs per payload.
+"""
+
+import argparse
+import io
+import json
+import time
+from typing import Callable, Dict, List
+
+from app.utils.payload_codec import CODECS, PayloadCompressor
+from benchmarks.bench_pipeline import parse_size
+from benchmarks.datasets import make_dataset
+
+# Levels compared by default (each list includes the codec's default level)
+DEFAULT_LEVELS: Dict[str, List[int]] = {
+    "zstd": [1, 3, 9, 19],
+    "lz4": [0, 9],
+    "zlib": [1, 6, 9],
+}
+
+MB = 1024 * 1024
+
+
+def payloads(rows: int, seed: int) -> Dict[str, str]:
+    """
+    The working and original payloads of an upload of `rows` rows, and its CSV.
+    """
+    df = make_dataset(rows, seed=seed)
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return {
+        "working": df.to_json(),
+        "original": json.dumps(df.to_dict(orient="records"), default=str),
+        "csv": buffer.getvalue(),
+    }
+
+
+def _best(run: Callable, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def parse_levels(items: List[str]) -> Dict[str, List[int]]:
+    """
+    Parse ["zstd=1,3", "zlib=6"] into {"zstd": [1, 3], "zlib": [6]}.
+    """
+    levels = dict(DEFAULT_LEVELS)
+    for item in items:
+        name, _, values = item.partition("=")
+        levels[name.strip()] = [int(v) for v in values.split(",") if v.strip()]
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10k,100k", help="comma-separated row counts, e.g. 10k,100k")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--codecs", default="zstd,lz4,zlib", help="comma-separated codec names")
+    parser.add_argument("--levels", nargs="*", default=[], help="per codec, e.g. zstd=1,3,9")
+    args = parser.parse_args()
+
+    levels = parse_levels(args.levels)
+    names = [n.strip() for n in args.codecs.split(",") if n.strip()]
+    unknown = [n for n in names if n not in CODECS]
+    if unknown:
+        parser.error(f"unknown codecs: {', '.join(unknown)} (choose from {', '.join(CODECS)})")
+    missing = [n for n in names if not CODECS[n].available()]
+    if missing:
+        print(f"not installed, skipped: {', '.join(missing)}")
+    codecs = [n for n in names if n not in missing]
+
+    print(
+        f"{'payload':<18}{'codec':<10}{'MB':>9}{'x json':>9}{'x csv':>9}"
+        f"{'encode ms':>12}{'decode ms':>12}"
+    )
+    for rows in (parse_size(s) for s in args.sizes.split(",")):
+        data = payloads(rows, args.seed)
+        csv_bytes = len(data["csv"])
+        for kind in ("working", "original"):
+            payload = data[kind]
+            label = f"{kind}[{rows}]"
+            print(
+                f"{label:<18}{'json':<10}{len(payload) / MB:>9.2f}{1:>9.2f}"
+                f"{csv_bytes / len(payload):>9.2f}{'-':>12}{'-':>12}"
+            )
+            for name in codecs:
+                for level in levels.get(name, [CODECS[name].default_level]):
+                    compressor = PayloadCompressor(name, level)
+                    stored = compressor.encode(payload)
+                    assert compressor.decode(stored) == payload
+                    encode_s = _best(lambda: compressor.encode(payload), args.repeat)
+                    decode_s = _best(lambda: compressor.decode(stored), args.repeat)
+                    print(
+                        f"{'':<18}{f'{name}:{level}':<10}{len(stored) / MB:>9.2f}"
+                        f"{len(payload) / len(stored):>9.2f}{csv_bytes / len(stored):>9.2f}"
+                        f"{encode_s * 1000:>12.1f}{decode_s * 1000:>12.1f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
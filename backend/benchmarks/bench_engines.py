@@ -0,0 +1,57 @@
+# benchmarks/bench_engines.py
+"""
+Compare the installed regex engines on typical AU PII workloads.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_engines [--cells 50000] [--repeat 3]
+
+Each workload times `subn()` over a synthetic column with every installed
+engine (`re`, and `regex` / `re2` when available). A final pathological
+workload shows how each engine copes with catastrophic backtracking.
+"""
+
+import argparse
+import time
+
+from app.utils.regex_utils import ENGINES
+from benchmarks.bench_patterns import LLM_BASELINES, synthetic_cells
+
+# Pattern with exponential backtracking in backtracking engines
+PATHOLOGICAL = (r"(a+)+$", ["a" * n + "!" for n in range(14, 23)])
+
+
+def _time_subn(compiled, cells, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for cell in cells:
+            compiled.subn("[x]", cell)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cells", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engines = [e for e in ENGINES.values() if e.available()]
+    cells = synthetic_cells(args.cells)
+    workloads = [(name, pattern, cells) for name, pattern in LLM_BASELINES.items()]
+    workloads.append(("pathological",) + PATHOLOGICAL)
+
+    print(f"{'workload':<14}" + "".join(f"{e.name + ' ms':>12}" for e in engines))
+    for name, pattern, data in workloads:
+        row = f"{name:<14}"
+        for engine in engines:
+            if not engine.supports(pattern):
+                row += f"{'n/a':>12}"
+                continue
+            elapsed = _time_subn(engine.compile(pattern), data, args.repeat)
+            row += f"{elapsed * 1000:>12.1f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_patterns.py
+"""
+Benchmark the built-in pattern library against typical LLM-written regexes.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_patterns [--cells 50000] [--repeat 5]
+
+For every library entry the script checks its examples, then times
+`pattern.sub()` over a synthetic column of Australian-style cells and
+compares it with an ad-hoc regex of the kind the LLM tends to produce.
+Library and baseline runs alternate and the best of `--repeat` runs is
+kept, so machine noise affects both alike. The verdict is "faster" or
+"SLOWER" when the two differ by more than --tolerance, "same" otherwise;
+entries slower than their baseline are listed at the end.
+"""
+
+import argparse
+import random
+import re
+import time
+
+from app.utils.pattern_library import LIBRARY, get_pattern
+
+# Representative regexes taken from generated task lists
+LLM_BASELINES = {
+    "au_phone": r"(\+?61[\s-]?|0)?[2-478]([\s-]?\d){8}",
+    "au_mobile": r"(\+61\s?4\d{2}\s?\d{3}\s?\d{3}|\+614\d{8}|04\d{8}|\+61-4\d{2}-\d{3}-\d{3}|04\s\d{2}\s\d{3}\s\d{3})",
+    "au_landline": r"(\(0[2378]\)|0[2378]|\+61\s?[2378])[\s-]?\d{4}[\s-]?\d{4}",
+    "email": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
+    "date": r"\b(\d{2}/\d{2}/\d{4}|\d{4}-\d{2}-\d{2})\b",
+    "date_dmy": r"\b\d{1,2}/\d{1,2}/\d{4}\b",
+    "date_iso": r"\b\d{4}-\d{2}-\d{2}\b",
+    "abn": r"\b\d{2}\s?\d{3}\s?\d{3}\s?\d{3}\b",
+    "postcode": r"\b\d{4}\b",
+}
+
+WORDS = ["Sydney", "Melbourne", "Level", "Street", "Unit", "call", "ref", "NSW", "VIC"]
+
+
+def synthetic_cells(n: int, seed: int = 42) -> list:
+    """
+    Return `n` mixed free-text cells, about a third of them containing PII.
+    """
+    rng = random.Random(seed)
+    examples = [ex for entry in LIBRARY.values() for ex in entry.examples]
+    cells = []
+    for _ in range(n):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 8)))
+        if rng.random() < 0.35:
+            text += " " + rng.choice(examples)
+        cells.append(text)
+    return cells
+
+
+def _time_sub(regex: re.Pattern, cells: list) -> float:
+    start = time.perf_counter()
+    for cell in cells:
+        regex.sub("[x]", cell)
+    return time.perf_counter() - start
+
+
+def _time_pair(library: re.Pattern, baseline: re.Pattern, cells: list, repeat: int):
+    """
+    Best times of the two patterns, measured alternately.
+    """
+    library_s = baseline_s = float("inf")
+    for _ in range(repeat):
+        library_s = min(library_s, _time_sub(library, cells))
+        baseline_s = min(baseline_s, _time_sub(baseline, cells))
+    return library_s, baseline_s
+
+
+def verdict(speedup: float, tolerance: float) -> str:
+    if speedup >= 1 + tolerance:
+        return "faster"
+    if speedup <= 1 - tolerance:
+        return "SLOWER"
+    return "same"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cells", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=9)
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1, help="relative difference reported as 'same'"
+    )
+    args = parser.parse_args()
+
+    cells = synthetic_cells(args.cells)
+    print(
+        f"{'pattern':<14}{'examples':>10}{'library ms':>13}{'baseline ms':>13}"
+        f"{'speedup':>9}{'verdict':>9}"
+    )
+    regressions = []
+    for name, entry in LIBRARY.items():
+        compiled = get_pattern(name)
+        anchored = get_pattern(name, anchored=True)
+        examples_ok = all(
+            compiled.search(ex) and anchored.fullmatch(ex) for ex in entry.examples
+        )
+        library_s, baseline_s = _time_pair(
+            compiled, re.compile(LLM_BASELINES[name]), cells, args.repeat
+        )
+        speedup = baseline_s / library_s
+        result = verdict(speedup, args.tolerance)
+        if result == "SLOWER":
+            regressions.append(f"{name} ({speedup:.2f}x)")
+        print(
+            f"{name:<14}{'ok' if examples_ok else 'FAIL':>10}"
+            f"{library_s * 1000:>13.1f}{baseline_s * 1000:>13.1f}"
+            f"{speedup:>8.2f}x{result:>9}"
+        )
+    if regressions:
+        print(f"\nSlower than the LLM baseline: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
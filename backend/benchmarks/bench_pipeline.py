@@ -0,0 +1,333 @@
+# benchmarks/bench_pipeline.py
+"""
+Time the replace, expand and session pipelines on seeded synthetic datasets.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_pipeline [--sizes 10k,100k,1m] [--repeat 3]
+                                        [--cases apply_tasks,download_csv]
+                                        [--compare <commit>] [--no-save]
+
+Every case runs `--repeat` times per dataset size on benchmarks.datasets
+data; the minimum and median wall times are reported. Results are saved
+to benchmarks/results/<commit>.json (suffixed "-dirty" for uncommitted
+trees), so a run can be compared with the one of an earlier commit:
+
+    git checkout <old> && python -m benchmarks.bench_pipeline
+    git checkout <new> && python -m benchmarks.bench_pipeline --compare <old>
+
+Cases slower than `--threshold` times the baseline are flagged. Logging
+below WARNING is silenced while timing.
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse "10k", "1m" or "5000" into a row count.
+    """
+    text = text.strip().lower()
+    if text[-1:] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def git_revision() -> str:
+    """
+    Short commit hash of the working tree, suffixed "-dirty" if it has changes.
+    """
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{sha}-dirty" if dirty else sha
+
+
+def _resolve_revision(ref: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", ref],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ref
+
+
+# ---------------------------------------------------------------------------
+# Cases: each builds its inputs outside the timed region and returns the
+# callable to time
+# ---------------------------------------------------------------------------
+
+
+def _tasks() -> List[Dict[str, str]]:
+    # A typical "mask the contact details" request, as the LLM or the rule parser returns it
+    return [
+        {"target": "column Email", "regex": "@email", "replacement": "[email]"},
+        {"target": "column Notes", "regex": "@email", "replacement": "[email]"},
+        {"target": "all", "regex": "@au_mobile", "replacement": "[mobile]"},
+        {"target": "column D", "regex": "@au_landline", "replacement": "[landline]"},
+    ]
+
+
+def case_replace_all_matches(df) -> Callable:
+    from app.utils.pattern_library import get_pattern
+    from app.utils.replace_all_matches import replace_all_matches
+
+    pattern = get_pattern("au_mobile")
+    return lambda: replace_all_matches(df, pattern, "[mobile]")
+
+
+def case_replace_column_matches(df) -> Callable:
+    from app.utils.pattern_library import get_pattern
+    from app.utils.replace_column_matches import replace_column_matches
+
+    pattern = get_pattern("email")
+    return lambda: replace_column_matches(df, "Email", pattern, "[email]")
+
+
+def case_expand_range(df) -> Callable:
+    from app.utils.task_expander import expand_task
+
+    last = chr(ord("A") + len(df.columns) - 1)
+    task = {"target": f"range A1:{last}{len(df)}", "regex": "@email", "replacement": "[email]"}
+    return lambda: expand_task(df, task)
+
+
+def case_expand_rows(df) -> Callable:
+    from app.utils.task_expander import expand_task
+
+    task = {"target": f"row 1 to {len(df)}", "regex": "@email", "replacement": "[email]"}
+    return lambda: expand_task(df, task)
+
+
+def case_apply_tasks(df) -> Callable:
+    from app.services.replace_service import apply_tasks
+
+    tasks = _tasks()
+    return lambda: apply_tasks(df.copy(), tasks)
+
+
+def case_preview_tasks(df) -> Callable:
+    from app.services.replace_service import preview_tasks
+
+    tasks = _tasks()
+    return lambda: preview_tasks(df, tasks)
+
+
+def case_session_roundtrip(df) -> Callable:
+    # What every view does: serialize the working DataFrame for storage and read it back
+    import pandas as pd
+
+    return lambda: pd.read_json(io.StringIO(df.to_json()))
+
+
+def _upload_case(df, extension: str, sheets: int = 1) -> Callable:
+    import pandas as pd
+    from app.services.upload_service import handle_upload
+
+    buffer = io.BytesIO()
+    if extension == "csv":
+        df.to_csv(buffer, index=False)
+    else:
+        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+            for i in range(sheets):
+                df.to_excel(writer, sheet_name=f"Sheet{i + 1}", index=False)
+    data = buffer.getvalue()
+
+    def run():
+        file = io.BytesIO(data)
+        file.name = f"benchmark.{extension}"
+        return handle_upload(file)
+
+    return run
+
+
+def case_upload_csv(df) -> Callable:
+    return _upload_case(df, "csv")
+
+
+def case_upload_xlsx(df) -> Callable:
+    return _upload_case(df, "xlsx")
+
+
+def case_upload_xlsx_sheets(df) -> Callable:
+    # A workbook of four sheets: parsed in parallel with more than one CPU
+    return _upload_case(df, "xlsx", sheets=4)
+
+
+def _download_case(df, extension: str) -> Callable:
+    from app.services.download_service import get_file_from_session
+    from app.utils.dataset_store import save_dataset
+
+    session = {"uploaded_format": extension}
+    save_dataset(session, df.to_json())
+    return lambda: get_file_from_session(session)
+
+
+def case_download_csv(df) -> Callable:
+    return _download_case(df, "csv")
+
+
+def case_download_xlsx(df) -> Callable:
+    return _download_case(df, "xlsx")
+
+
+CASES: Dict[str, Callable] = {
+    "replace_all_matches": case_replace_all_matches,
+    "replace_column_matches": case_replace_column_matches,
+    "expand_range": case_expand_range,
+    "expand_rows": case_expand_rows,
+    "apply_tasks": case_apply_tasks,
+    "preview_tasks": case_preview_tasks,
+    "session_roundtrip": case_session_roundtrip,
+    "upload_csv": case_upload_csv,
+    "upload_xlsx": case_upload_xlsx,
+    "upload_xlsx_sheets": case_upload_xlsx_sheets,
+    "download_csv": case_download_csv,
+    "download_xlsx": case_download_xlsx,
+}
+
+# openpyxl needs minutes per run above this size; pass --xlsx-max-rows to override
+XLSX_CASES = ("upload_xlsx", "upload_xlsx_sheets", "download_xlsx")
+DEFAULT_XLSX_MAX_ROWS = 100_000
+
+
+def time_case(run: Callable, repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return {"min_s": min(samples), "median_s": statistics.median(samples)}
+
+
+# ---------------------------------------------------------------------------
+# Result files
+# ---------------------------------------------------------------------------
+
+
+def save_results(revision: str, results: Dict[str, Dict]) -> str:
+    """
+    Write results to RESULTS_DIR/<revision>.json, merging with an earlier run
+    of the same revision (e.g. other sizes or cases).
+    """
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{revision}.json")
+    previous = load_results(revision) or {}
+    merged = {**previous.get("results", {}), **results}
+    payload = {
+        "revision": revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": merged,
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_results(revision: str) -> Optional[Dict]:
+    path = os.path.join(RESULTS_DIR, f"{revision}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline: Dict, results: Dict[str, Dict], threshold: float) -> int:
+    """
+    Print current vs. baseline minimum times; return the number of regressions.
+    """
+    print(f"\ncompared with {baseline['revision']} ({baseline['timestamp']})")
+    print(f"{'case':<34}{'base ms':>12}{'now ms':>12}{'ratio':>9}")
+    regressions = 0
+    for key, current in results.items():
+        base = baseline["results"].get(key)
+        if base is None:
+            print(f"{key:<34}{'-':>12}{current['min_s'] * 1000:>12.1f}{'new':>9}")
+            continue
+        ratio = current["min_s"] / base["min_s"] if base["min_s"] else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(
+            f"{key:<34}{base['min_s'] * 1000:>12.1f}"
+            f"{current['min_s'] * 1000:>12.1f}{ratio:>8.2f}x{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10k", help="comma-separated row counts, e.g. 10k,100k,1m")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated case names")
+    parser.add_argument("--xlsx-max-rows", type=int, default=DEFAULT_XLSX_MAX_ROWS)
+    parser.add_argument("--compare", metavar="COMMIT", help="compare with a saved run")
+    parser.add_argument("--threshold", type=float, default=1.10, help="ratio flagged as a regression")
+    parser.add_argument("--no-save", action="store_true", help="do not write a result file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    import django
+
+    django.setup()
+    logging.disable(logging.INFO)
+
+    from benchmarks.datasets import make_dataset
+
+    cases = [name.strip() for name in args.cases.split(",") if name.strip()]
+    unknown = [name for name in cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)} (choose from {', '.join(CASES)})")
+
+    results: Dict[str, Dict] = {}
+    print(f"{'case':<34}{'min ms':>12}{'median ms':>12}")
+    for rows in (parse_size(s) for s in args.sizes.split(",")):
+        df = make_dataset(rows, seed=args.seed)
+        for name in cases:
+            key = f"{name}[{rows}]"
+            if name in XLSX_CASES and rows > args.xlsx_max_rows:
+                print(f"{key:<34}{'skipped (--xlsx-max-rows)':>24}")
+                continue
+            timing = time_case(CASES[name](df), args.repeat)
+            results[key] = {**timing, "rows": rows, "repeat": args.repeat, "seed": args.seed}
+            print(f"{key:<34}{timing['min_s'] * 1000:>12.1f}{timing['median_s'] * 1000:>12.1f}")
+
+    revision = git_revision()
+    if not args.no_save:
+        print(f"\nsaved {save_results(revision, results)}")
+
+    if args.compare:
+        baseline = load_results(_resolve_revision(args.compare)) or load_results(args.compare)
+        if baseline is None:
+            parser.error(f"no saved results for '{args.compare}' in {RESULTS_DIR}")
+        if compare(baseline, results, args.threshold):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_startup.py
+"""
+Measure cold-start time: `manage.py check` and the first requests of a fresh process.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_startup [--repeat 5]
+
+Every sample runs in a new interpreter without OPENAI_API_KEY, as a
+management command or a freshly booted worker would. The first-request
+timings include importing the view and its dependencies on first use.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter and prints JSON timings in milliseconds
+FIRST_REQUEST_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.test import Client
+client = Client(HTTP_HOST="localhost")
+timings = {"boot": time.perf_counter() - start}
+for name, path in [("get_csrf", "/api/get_csrf"), ("preview_data", "/api/preview_data")]:
+    t = time.perf_counter()
+    client.get(path)
+    timings[name] = time.perf_counter() - t
+timings["total"] = time.perf_counter() - start
+timings["heavy_modules"] = sorted(m for m in ("pandas", "numpy", "openpyxl", "openai") if m in sys.modules)
+print(json.dumps({k: v * 1000 if isinstance(v, float) else v for k, v in timings.items()}))
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env.pop("OPENAI_API_KEY", None)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    return env
+
+
+def time_manage_check() -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "manage.py", "check"],
+        cwd=BACKEND_DIR,
+        env=_env(),
+        check=True,
+        capture_output=True,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def first_request_timings() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", FIRST_REQUEST_SCRIPT],
+        cwd=BACKEND_DIR,
+        env=_env(),
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    checks = [time_manage_check() for _ in range(args.repeat)]
+    print(f"manage.py check      median {statistics.median(checks):8.1f} ms   min {min(checks):8.1f} ms")
+
+    samples = [first_request_timings() for _ in range(args.repeat)]
+    for key in ("boot", "get_csrf", "preview_data", "total"):
+        values = [s[key] for s in samples]
+        print(f"first request {key:<12} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms")
+    print(f"heavy modules loaded after the first requests: {', '.join(samples[-1]['heavy_modules']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
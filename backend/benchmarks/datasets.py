@@ -0,0 +1,82 @@
+# benchmarks/datasets.py
+"""
+Seeded synthetic datasets shaped like the customer lists users upload:
+Australian names, emails, mobile and landline numbers, ABNs, postcodes,
+join dates and free-text notes that sometimes leak PII.
+
+The same (rows, seed) always produces the same DataFrame, so benchmark
+results from different commits are comparable.
+"""
+
+import numpy as np
+import pandas as pd
+
+FIRST_NAMES = [
+    "Olivia", "Jack", "Charlotte", "William", "Amelia", "Noah", "Isla", "Oliver",
+    "Mia", "Thomas", "Ava", "James", "Grace", "Lachlan", "Chloe", "Liam",
+]
+LAST_NAMES = [
+    "Smith", "Jones", "Williams", "Brown", "Wilson", "Taylor", "Nguyen", "Johnson",
+    "Martin", "White", "Anderson", "Walker", "Thompson", "Harris", "Lee", "Ryan",
+]
+DOMAINS = ["example.com.au", "mail.com", "bigpond.net.au", "outlook.com", "company.org.au"]
+STATES = [("NSW", "02", 2000), ("VIC", "03", 3000), ("QLD", "07", 4000), ("WA", "08", 6000)]
+NOTE_WORDS = ["called", "about", "invoice", "delivery", "Level", "Street", "Unit", "ref", "follow", "up"]
+
+# Share of notes that contain a phone number or an email address
+NOTE_PII_RATE = 0.3
+
+COLUMNS = ["Name", "Email", "Mobile", "Landline", "ABN", "Postcode", "Joined Date", "Notes"]
+
+
+def make_dataset(rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Return a DataFrame of `rows` synthetic customers with the COLUMNS above.
+    Values are strings, as they are after an upload round-trips through JSON.
+    """
+    rng = np.random.default_rng(seed)
+    first = rng.choice(FIRST_NAMES, rows)
+    last = rng.choice(LAST_NAMES, rows)
+    domains = rng.choice(DOMAINS, rows)
+    states = rng.integers(0, len(STATES), rows)
+    numbers = rng.integers(0, 10**8, (rows, 3))
+    days = rng.integers(0, 3650, rows)
+
+    names = [f"{f} {l}" for f, l in zip(first, last)]
+    emails = [
+        f"{f.lower()}.{l.lower()}{n % 100}@{d}"
+        for f, l, n, d in zip(first, last, numbers[:, 0], domains)
+    ]
+    mobiles = [f"04{n:08d}"[:4] + f" {n % 1000:03d} {n // 1000 % 1000:03d}" for n in numbers[:, 1]]
+    landlines = [
+        f"({STATES[s][1]}) {n // 10**4 % 10**4:04d} {n % 10**4:04d}"
+        for s, n in zip(states, numbers[:, 2])
+    ]
+    abns = [f"{n % 100:02d} {n // 100 % 1000:03d} {n // 10**5 % 1000:03d} {n % 1000:03d}" for n in numbers[:, 0]]
+    postcodes = [str(STATES[s][2] + n % 1000) for s, n in zip(states, numbers[:, 1])]
+    joined = (pd.Timestamp("2015-01-01") + pd.to_timedelta(days, unit="D")).strftime("%Y-%m-%d")
+
+    notes = []
+    note_words = rng.choice(NOTE_WORDS, (rows, 5))
+    leaks = rng.random(rows)
+    for i in range(rows):
+        text = " ".join(note_words[i])
+        if leaks[i] < NOTE_PII_RATE / 2:
+            text += " on " + mobiles[i]
+        elif leaks[i] < NOTE_PII_RATE:
+            text += " cc " + emails[i]
+        notes.append(text)
+
+    return pd.DataFrame(
+        {
+            "Name": names,
+            "Email": emails,
+            "Mobile": mobiles,
+            "Landline": landlines,
+            "ABN": abns,
+            "Postcode": postcodes,
+            "Joined Date": list(joined),
+            "Notes": notes,
+        },
+        columns=COLUMNS,
+    )
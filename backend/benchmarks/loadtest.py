@@ -0,0 +1,344 @@
+# benchmarks/loadtest.py
+"""
+Load-test the API with concurrent simulated user sessions.
+
+Usage (from the backend directory):
+    python -m benchmarks.loadtest [--sessions 20] [--iterations 3] [--rows 2000]
+                                  [--llm-latency 0.5] [--json report.json]
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000   # existing server
+
+By default a `manage.py testserver` (fresh test database, no autoreload)
+is started with the offline fake LLM backend (LLM_BACKEND=fake, answering
+after --llm-latency seconds) and a throwaway LLM cache, metrics and dataset
+directory, so no OpenAI key is needed and nothing touches db.sqlite3.
+Set DATASET_STORE_BACKEND=file to load-test the shared dataset store.
+
+Every session keeps its own cookies and runs the flow of the UI
+--iterations times: upload a CSV, page through preview_data, generate
+tasks, preview_replace, replace and download. The report gives the
+throughput, p50/p95/p99 latency and errors per endpoint, and the peak
+RSS of the server process (not available with --url).
+"""
+
+import argparse
+import http.cookiejar
+import io
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Mix of requests the local rule parser answers and ones that reach the (fake) LLM
+DESCRIPTIONS = [
+    "Replace all emails with [email]",
+    "Remove mobile numbers in column Mobile",
+    "Mask email addresses and phone numbers everywhere",
+    "Hide any postcode or ABN that appears in the customer list",
+    "Redact dates and emails from the notes",
+]
+
+
+class Session:
+    """
+    One simulated user: a cookie jar, a CSRF token, and the request log it appends to.
+    """
+
+    def __init__(self, base_url: str, log: List, lock: threading.Lock, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies)
+        )
+        self.log = log
+        self.lock = lock
+        self.timeout = timeout
+
+    def csrf_token(self) -> str:
+        for cookie in self.cookies:
+            if cookie.name == "csrftoken":
+                return cookie.value
+        return ""
+
+    def request(self, endpoint: str, method: str = "GET", path: str = None,
+                body: bytes = None, content_type: str = None) -> Optional[bytes]:
+        headers = {"X-CSRFToken": self.csrf_token()}
+        if content_type:
+            headers["Content-Type"] = content_type
+        req = urllib.request.Request(
+            f"{self.base_url}{path or '/api/' + endpoint}",
+            data=body, method=method, headers=headers,
+        )
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                payload = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            payload, status = e.read(), e.code
+        except (urllib.error.URLError, OSError) as e:
+            payload, status = None, f"{type(e).__name__}"
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.log.append((endpoint, elapsed, status))
+        return payload if status == 200 else None
+
+    def post_json(self, endpoint: str, data: Dict) -> Optional[Dict]:
+        payload = self.request(
+            endpoint, "POST", body=json.dumps(data).encode(), content_type="application/json"
+        )
+        return json.loads(payload) if payload else None
+
+    def upload(self, filename: str, data: bytes) -> Optional[Dict]:
+        boundary = uuid.uuid4().hex
+        body = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: text/csv\r\n\r\n"
+        ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+        payload = self.request(
+            "upload", "POST", body=body,
+            content_type=f"multipart/form-data; boundary={boundary}",
+        )
+        return json.loads(payload) if payload else None
+
+
+def run_flow(session: Session, csv_data: bytes, pages: int, rng: random.Random):
+    """
+    One pass through the UI: upload → preview pages → generate → preview → replace → download.
+    Steps after a failed request are skipped, as the UI would.
+    """
+    if session.upload("customers.csv", csv_data) is None:
+        return
+    for page in range(1, pages + 1):
+        session.request("preview_data", path=f"/api/preview_data?page={page}&page_size=50")
+
+    generated = session.post_json("generate_tasks", {"description": rng.choice(DESCRIPTIONS)})
+    if not generated or not generated.get("tasks"):
+        return
+    tasks = generated["tasks"]
+    preview = session.post_json("preview_replace", {"tasks": tasks})
+    if preview is None:
+        return
+    # As the UI does: apply only to the version that was previewed
+    if session.post_json("replace", {"tasks": tasks, "version": preview.get("version")}) is None:
+        return
+    session.request("download")
+
+
+def run_session(index: int, args, base_url: str, csv_data: bytes, log: List, lock: threading.Lock):
+    rng = random.Random(args.seed + index)
+    session = Session(base_url, log, lock, args.timeout)
+    session.request("get_csrf")
+    for _ in range(args.iterations):
+        run_flow(session, csv_data, args.pages, rng)
+
+
+# ---------------------------------------------------------------------------
+# Server process
+# ---------------------------------------------------------------------------
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, workdir: str) -> tuple:
+    """
+    Start `manage.py testserver` with the fake LLM; returns (process, base_url, log path).
+    """
+    port = _free_port()
+    env = {
+        **os.environ,
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_LATENCY": str(args.llm_latency),
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.sqlite3"),
+        "METRICS_DIR": os.path.join(workdir, "metrics"),
+        "DATASET_STORE_DIR": os.path.join(workdir, "datasets"),
+        "SERVER_TIMING_SAMPLE_RATE": "0",
+    }
+    log_path = os.path.join(workdir, "server.log")
+    # testserver requires a fixture; the flows need no data
+    fixture = os.path.join(workdir, "empty.json")
+    with open(fixture, "w") as f:
+        f.write("[]")
+    process = subprocess.Popen(
+        [
+            sys.executable, "manage.py", "testserver", fixture,
+            "--noinput", "--addrport", f"127.0.0.1:{port}",
+        ],
+        cwd=BACKEND_DIR, env=env,
+        stdout=open(log_path, "wb"), stderr=subprocess.STDOUT,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(
+                f"testserver exited with {process.returncode}:\n{_tail(log_path)}"
+            )
+        try:
+            urllib.request.urlopen(f"{base_url}/api/get_csrf", timeout=1).read()
+            return process, base_url, log_path
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(
+        f"testserver did not start within {args.startup_timeout}s:\n{_tail(log_path)}"
+    )
+
+
+def _tail(path: str, lines: int = 20) -> str:
+    with open(path, errors="replace") as f:
+        return "".join(f.readlines()[-lines:])
+
+
+def _peak_rss_mb(pid: int) -> Optional[float]:
+    """
+    Peak resident set size of a running process (Linux /proc), in MiB.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _children_peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of an ascending list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(q / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(log: List, duration: float) -> Dict:
+    endpoints: Dict[str, Dict] = {}
+    for endpoint in dict.fromkeys(entry[0] for entry in log):
+        entries = [entry for entry in log if entry[0] == endpoint]
+        latencies = sorted(elapsed for _, elapsed, _ in entries)
+        endpoints[endpoint] = {
+            "requests": len(entries),
+            "errors": sum(status != 200 for _, _, status in entries),
+            "rps": len(entries) / duration if duration else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": latencies[-1] * 1000,
+        }
+    return {
+        "duration_s": duration,
+        "requests": len(log),
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "throughput_rps": len(log) / duration if duration else 0.0,
+        "flows_completed": endpoints.get("download", {}).get("requests", 0),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: Dict):
+    print(
+        f"{report['requests']} requests in {report['duration_s']:.1f}s "
+        f"({report['throughput_rps']:.1f} req/s), {report['errors']} errors, "
+        f"{report['flows_completed']} flows completed"
+    )
+    print(f"{'endpoint':<18}{'reqs':>7}{'errors':>8}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for name, e in report["endpoints"].items():
+        print(
+            f"{name:<18}{e['requests']:>7}{e['errors']:>8}{e['rps']:>8.1f}"
+            f"{e['p50_ms']:>9.1f}{e['p95_ms']:>9.1f}{e['p99_ms']:>9.1f}{e['max_ms']:>9.1f}"
+        )
+    if report.get("peak_rss_mb") is not None:
+        print(f"peak server RSS: {report['peak_rss_mb']:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--iterations", type=int, default=3, help="flows per session")
+    parser.add_argument("--rows", type=int, default=2000, help="rows in the uploaded CSV")
+    parser.add_argument("--pages", type=int, default=3, help="preview_data pages viewed per flow")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="fake LLM answer delay (s)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout (s)")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--url", help="target a running server instead of starting testserver")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    from benchmarks.datasets import make_dataset
+
+    buffer = io.BytesIO()
+    make_dataset(args.rows, seed=args.seed).to_csv(buffer, index=False)
+    csv_data = buffer.getvalue()
+
+    with tempfile.TemporaryDirectory(prefix="regexflow_loadtest_") as workdir:
+        process = None
+        if args.url:
+            base_url = args.url
+        else:
+            process, base_url, log_path = start_server(args, workdir)
+            print(f"testserver on {base_url} (log: {log_path})")
+
+        log: List = []
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=run_session, args=(i, args, base_url, csv_data, log, lock))
+            for i in range(args.sessions)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - start
+
+        report = summarize(log, duration)
+        report["config"] = {
+            k: getattr(args, k) for k in ("sessions", "iterations", "rows", "pages", "llm_latency", "url")
+        }
+        report["peak_rss_mb"] = None
+        if process is not None:
+            report["peak_rss_mb"] = _peak_rss_mb(process.pid)
+            process.terminate()
+            process.wait()
+            if report["peak_rss_mb"] is None:
+                report["peak_rss_mb"] = _children_peak_rss_mb()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
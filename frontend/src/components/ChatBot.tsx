@@ -42,6 +42,7 @@ export default function ChatBot({ onDataChanged, onPreviewFull }: ChatBotProps)
   const [messages, setMessages] = useState<ChatMessage[]>([]);
   const [input, setInput] = useState("");
   const [pendingTasks, setPendingTasks] = useState<BackendRegexTask[] | null>(null);
+  const [pendingVersions, setPendingVersions] = useState<Record<string, string> | undefined>(undefined);
   const [awaitingConfirmation, setAwaitingConfirmation] = useState(false);
 
   const messagesEndRef = useRef<HTMLDivElement | null>(null);
@@ -92,7 +93,7 @@ export default function ChatBot({ onDataChanged, onPreviewFull }: ChatBotProps)
       if (confirm === "yes" || confirm === "确认") {
         appendMessage({ role: "bot", text: "Proceeding with replacement…" });
         try {
-          const replaceReq: ReplaceTasksRequest = { tasks: pendingTasks };
+          const replaceReq: ReplaceTasksRequest = { tasks: pendingTasks, versions: pendingVersions };
           const replaceRes: ReplaceTasksResponse = await replaceTasks(replaceReq);
 
           appendMessage({
@@ -103,7 +104,7 @@ export default function ChatBot({ onDataChanged, onPreviewFull }: ChatBotProps)
           replaceRes.preview.slice(0, 10).forEach((entry) => {
             appendMessage({
               role: "bot",
-              text: `Row ${entry.row}, Column ${entry.column}: "${entry.from}" → "${entry.to}"`,
+              text: `${entry.sheet ? `Sheet ${entry.sheet}, ` : ""}Row ${entry.row}, Column ${entry.column}: "${entry.from}" → "${entry.to}"`,
             });
           });
           if (replaceRes.preview.length > 10) {
@@ -131,6 +132,7 @@ export default function ChatBot({ onDataChanged, onPreviewFull }: ChatBotProps)
       }
 
       setPendingTasks(null);
+      setPendingVersions(undefined);
       setAwaitingConfirmation(false);
       return;
     }
@@ -158,7 +160,7 @@ export default function ChatBot({ onDataChanged, onPreviewFull }: ChatBotProps)
       previewRes.preview.slice(0, 10).forEach((entry) => {
         appendMessage({
           role: "bot",
-          text: `Row ${entry.row}, Column ${entry.column}: "${entry.original}" → "${entry.modified}"`,
+          text: `${entry.sheet ? `Sheet ${entry.sheet}, ` : ""}Row ${entry.row}, Column ${entry.column}: "${entry.original}" → "${entry.modified}"`,
         });
       });
       if (previewRes.preview.length > 10) {
@@ -172,6 +174,7 @@ export default function ChatBot({ onDataChanged, onPreviewFull }: ChatBotProps)
       appendMessage({ role: "bot", text: "Do you want to apply these changes? (Yes/No)" });
 
       setPendingTasks(genRes.tasks);
+      setPendingVersions(previewRes.versions);
       setAwaitingConfirmation(true);
     } catch (e) {
       appendMessage({ role: "bot", text: `⚠️ Error: ${String(e)}` });
@@ -33,6 +33,8 @@ export const handleApiError = (error: unknown): never => {
         throw new ApiError('Access forbidden. You do not have sufficient permissions.', status, code);
       case 404:
         throw new ApiError('The requested resource was not found.', status, code);
+      case 409:
+        throw new ApiError('The data was changed by another request. Please reload it and try again.', status, code);
       case 413:
         throw new ApiError('Uploaded file is too large.', status, code);
       case 429:
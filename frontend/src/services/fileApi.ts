@@ -1,6 +1,6 @@
 import api from './axiosInstance';
 import { handleApiError } from './errorHandler';
-import { UploadResponse } from '../types/api';
+import { UploadResponse, ColumnProfileResponse, BackendRegexTask } from '../types/api';
 import type { PreviewDataResponse } from "@/types/api";
 
 export const uploadFile = async (file: File): Promise<UploadResponse> => {
@@ -30,6 +30,35 @@ export const downloadFile = async (filename?: string): Promise<Blob> => {
   }
 };
 
+// Returns a zip archive of the processed files and summary.json (BatchSummary)
+export const batchProcess = async (files: File[], tasks: BackendRegexTask[]): Promise<Blob> => {
+  try {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+    formData.append('tasks', JSON.stringify(tasks));
+    const response = await api.post<Blob>('/batch', formData, {
+      headers: {
+        'Content-Type': 'multipart/form-data',
+      },
+      responseType: 'blob',
+    });
+    return response.data;
+  } catch (error) {
+    throw handleApiError(error);
+  }
+};
+
+export const getColumnProfile = async (sheet?: string): Promise<ColumnProfileResponse> => {
+  try {
+    const response = await api.get<ColumnProfileResponse>('/profile', {
+      params: sheet ? { sheet } : {},
+    });
+    return response.data;
+  } catch (error) {
+    throw handleApiError(error);
+  }
+};
+
 export const previewData = async (
   page: number = 1,
   pageSize: number = 50
@@ -8,6 +8,12 @@ import {
   PreviewReplaceResponse,
   ReplaceTasksRequest,
   ReplaceTasksResponse,
+  ExplainTasksRequest,
+  ExplainTasksResponse,
+  ScanRequest,
+  ScanResponse,
+  JobStartedResponse,
+  JobStatusResponse,
 } from '../types/api';
 
 export const previewData = async (
@@ -35,6 +41,29 @@ export const generateRegexTasks = async (
   }
 };
 
+export const startGenerateRegexTasks = async (
+  data: GenerateTasksRequest
+): Promise<JobStartedResponse> => {
+  try {
+    const response = await api.post<JobStartedResponse>('/generate_tasks', {
+      ...data,
+      background: true,
+    });
+    return response.data;
+  } catch (error) {
+    throw handleApiError(error);
+  }
+};
+
+export const getJob = async (jobId: string): Promise<JobStatusResponse> => {
+  try {
+    const response = await api.get<JobStatusResponse>(`/jobs/${jobId}`);
+    return response.data;
+  } catch (error) {
+    throw handleApiError(error);
+  }
+};
+
 export const previewReplace = async (
   data: PreviewReplaceRequest
 ): Promise<PreviewReplaceResponse> => {
@@ -56,3 +85,23 @@ export const replaceTasks = async (
     throw handleApiError(error);
   }
 };
+
+export const explainTasks = async (
+  data: ExplainTasksRequest
+): Promise<ExplainTasksResponse> => {
+  try {
+    const response = await api.post<ExplainTasksResponse>('/explain', data);
+    return response.data;
+  } catch (error) {
+    throw handleApiError(error);
+  }
+};
+
+export const scanPii = async (data: ScanRequest = {}): Promise<ScanResponse> => {
+  try {
+    const response = await api.post<ScanResponse>('/scan', data);
+    return response.data;
+  } catch (error) {
+    throw handleApiError(error);
+  }
+};
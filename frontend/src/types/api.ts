@@ -5,14 +5,41 @@ export interface CsrfTokenResponse {
 
 
 // 2. Upload File
+// 2.1 Per-column profile computed at upload
+export interface ColumnProfile {
+  null_ratio: number;                          // share of empty cells, 0..1
+  distinct: number;                            // distinct non-null values
+  length_histogram: Record<string, number>;    // e.g. { "<=4": 10, "<=8": 3, ">256": 0 }
+  pattern_fractions: Record<string, number>;   // e.g. { "email": 0.98, "phone": 0 }
+}
+
+// 2.2 One sheet of the upload (a CSV file is a single sheet)
+export interface UploadedSheet {
+  name: string;                    // e.g. "Contacts"
+  columns: string[];
+  total_rows: number;
+  version: string;                 // version token of the sheet's working dataset
+  profile: Record<string, ColumnProfile>; // keyed by column name
+}
+
+// 2.3 Response (columns, profile and preview are those of the first sheet)
 export interface UploadResponse {
   columns: string[];               // e.g. ["Name", "Email", ...]
+  profile: Record<string, ColumnProfile>; // keyed by column name
   preview: Record<string, any>[];  // first page (page_size rows) of data
   page: number;                    // always 1 for upload
   page_size: number;               // e.g. 50
   total_rows: number;              // e.g. 250
   total_pages: number;             // e.g. 5
   message: string;                 // e.g. "File uploaded successfully."
+  version: string;                 // version token of the working dataset
+  sheets: UploadedSheet[];         // every sheet, in workbook order
+}
+
+
+// 2.4 Column profile endpoint
+export interface ColumnProfileResponse {
+  profile: Record<string, ColumnProfile>;
 }
 
 
@@ -23,6 +50,7 @@ export interface PreviewDataResponse {
   page_size: number;            // number of rows per page
   total_rows: number;           // total number of rows in working_df
   total_pages: number;          // computed as Math.ceil(total_rows / page_size)
+  version: string;              // version token of the working dataset
 }
 
 
@@ -30,11 +58,12 @@ export interface PreviewDataResponse {
 // 4.1 Request
 export interface GenerateTasksRequest {
   description: string;  // natural‐language instruction, e.g. "Replace all emails in column Email with [hidden]"
+  background?: boolean; // run as a job; the response is then a JobStartedResponse (HTTP 202)
 }
 
 // 4.2 Individual Task returned by backend
 export interface BackendRegexTask {
-  target: string;      // e.g. "cell 0,2" or "column Email"
+  target: string;      // e.g. "cell 0,2", "column Email" or "sheet Orders column Note"
   regex: string;       // double‐escaped regex string, e.g. "\\b\\d{3}-\\d{3}-\\d{4}\\b"
   replacement: string; // e.g. "[redacted]"
 }
@@ -46,6 +75,29 @@ export interface GenerateTasksResponse {
 }
 
 
+// 4.4 Task that could not be applied (e.g. regex timed out)
+export interface FailedTask {
+  task: BackendRegexTask;
+  status: "timed_out" | "error";
+  detail: string;
+}
+
+// 4.5 Execution report of one task (one per submitted task)
+export interface TaskReport {
+  task: BackendRegexTask;
+  status: "ok" | "partial" | "error" | "timed_out";
+  engine: string | null;          // regex engine used, e.g. "re"
+  simple_tasks: number;           // row/column/cell tasks after expansion
+  cells_scanned: number;          // non-null cells the regex ran against
+  matches: number;
+  replacements: number;           // cells rewritten
+  elapsed_ms: number;
+  detail?: string;                // why the whole task failed
+  sheet?: string;                 // sheet the task ran on (workbooks with several sheets)
+  errors: { task: BackendRegexTask; detail: string }[]; // failed simple tasks
+}
+
+
 // 5. Preview Replace Tasks
 // 5.1 Request
 export interface PreviewReplaceRequest {
@@ -58,6 +110,7 @@ export interface PreviewReplaceEntry {
   column: string;    // column name, e.g. "Email"
   original: string;  // original cell value (stringified)
   modified: string;  // modified cell value (stringified)
+  sheet?: string;    // sheet of the cell (workbooks with several sheets)
 }
 
 // 5.3 Response
@@ -65,6 +118,10 @@ export interface PreviewReplaceResponse {
   message: string;                // "Preview completed."
   total_matches: number;          // total cells that would be changed
   preview: PreviewReplaceEntry[]; // up to 20 diffs
+  failed_tasks: FailedTask[];     // tasks skipped because of errors or timeouts
+  task_reports: TaskReport[];     // one execution report per task
+  version: string;                // dataset version the preview was computed on (first sheet)
+  versions: Record<string, string>; // {sheet: version} of the first sheet and the sheets the tasks target
 }
 
 
@@ -72,6 +129,8 @@ export interface PreviewReplaceResponse {
 // 6.1 Request
 export interface ReplaceTasksRequest {
   tasks: BackendRegexTask[]; // same shape as PreviewReplaceRequest
+  version?: string;          // apply only if the dataset is still at this version (else HTTP 409)
+  versions?: Record<string, string>; // same, per sheet (PreviewReplaceResponse.versions)
 }
 
 // 6.2 One replace preview entry
@@ -80,6 +139,7 @@ export interface ReplacePreviewEntry {
   column: string;    // column name, e.g. "Email"
   from: string;      // original cell value
   to: string;        // new cell value
+  sheet?: string;    // sheet of the cell (workbooks with several sheets)
 }
 
 // 6.3 Response
@@ -87,4 +147,144 @@ export interface ReplaceTasksResponse {
   message: string;                // "Tasks applied successfully."
   total_replacements: number;     // total cells actually changed
   preview: ReplacePreviewEntry[]; // up to 10 diffs
+  failed_tasks: FailedTask[];     // tasks skipped because of errors or timeouts
+  task_reports: TaskReport[];     // one execution report per task
+  version: string;                // new version token of the working dataset (first sheet)
+  versions: Record<string, string>; // {sheet: new version} of the sheets that were edited
+  deduplicated?: boolean;         // true when an identical request in flight did the work
+}
+
+
+// 7. PII Scan
+// 7.1 Request
+export interface ScanRequest {
+  types?: string[];        // subset of ["email", "phone", "abn", "date", "postcode"]
+  max_locations?: number;  // per type, default 100
+  sheet?: string;          // sheet of a workbook upload (default: the first)
+}
+
+// 7.2 One match location
+export interface ScanLocation {
+  row: number;     // 1-based row index
+  column: string;  // column name
+  start: number;   // match offset within the cell
+  end: number;
+  match: string;
+}
+
+// 7.3 Response
+export interface ScanResponse {
+  message: string;                                   // "Scan completed."
+  counts: Record<string, number>;                    // total matches per type
+  by_column: Record<string, Record<string, number>>; // column -> type -> count
+  locations: Record<string, ScanLocation[]>;         // up to max_locations per type
+  truncated: Record<string, boolean>;                // true when locations were capped
+}
+
+
+// 8. Background Jobs
+// 8.1 Returned (HTTP 202) when a job is started
+export interface JobStartedResponse {
+  job_id: string;
+  status_url: string;  // GET for the current JobStatusResponse
+  events_url: string;  // Server-Sent Events stream of "status" events
+}
+
+// 8.2 Job state
+export interface JobStatusResponse<T = GenerateTasksResponse> {
+  job_id: string;
+  kind: string;                                          // e.g. "generate_tasks"
+  status: "queued" | "running" | "succeeded" | "failed";
+  created: number;                                       // unix timestamps
+  updated: number;
+  result?: T;                                            // when succeeded
+  error?: string;                                        // when failed
+}
+
+
+// 9. Batch Processing (POST /batch, multipart: files + tasks as JSON)
+// The response is a zip archive of the output files plus summary.json (BatchSummary)
+// 9.1 Outcome of one input file
+export interface BatchFileSummary {
+  file: string;                        // input name (path inside a zip archive)
+  status: "ok" | "error" | "skipped";  // skipped: not a .csv/.xlsx file
+  output: string | null;               // name of the output file in the archive
+  sheets?: number;
+  rows?: number;
+  replacements?: number;
+  failed_tasks?: FailedTask[];
+  unmatched_tasks?: BackendRegexTask[]; // tasks for a sheet the file does not have
+  elapsed_ms?: number;
+  error?: string;                      // why the file failed or was skipped
+}
+
+// 9.2 summary.json
+export interface BatchSummary {
+  files: BatchFileSummary[];  // inputs in order, then skipped files
+  total_files: number;
+  succeeded: number;
+  failed: number;
+  skipped: number;
+  total_replacements: number;
+  elapsed_ms: number;
+}
+
+
+// 10. Explain (the plan /replace would execute, without running it)
+// 10.1 Request
+export interface ExplainTasksRequest {
+  tasks: BackendRegexTask[];
+  sample_rows?: number;  // rows sampled to time each task (default 200)
+}
+
+// 10.2 One simple task of a plan
+export interface PlanStep {
+  target: string;      // normalized target, e.g. "column 1", "row 3", "all"
+  kind: "all" | "column" | "row" | "cell";
+  columns: string[];   // columns scanned ("all"/"column")
+  dedup: boolean;      // regex evaluated once per distinct value
+  distinct?: number;   // distinct values of those columns (from the column profile)
+  cells: number;       // non-null cells to scan
+  error?: string;      // why this simple task would fail
+}
+
+// 10.3 Run time estimated from a sample
+export interface PlanEstimate {
+  sampled_cells: number;
+  us_per_cell: number | null;    // full cost of a visited cell
+  us_per_regex: number | null;   // regex evaluation alone
+  selectivity: number;           // share of cells containing every literal
+  cells_visited: number;         // after the trigram prefilter
+  regex_runs: number;            // after dedup
+  estimated_ms: number | null;   // null when the sample timed out
+}
+
+// 10.4 Plan of one task
+export interface TaskPlan {
+  task: BackendRegexTask;
+  status: "ok" | "error";
+  detail?: string;               // why the task cannot run
+  engine: string | null;
+  linear_time: boolean;
+  warnings: string[];            // backtracking risks
+  isolated: boolean;             // runs in a worker killed after REGEX_TASK_TIME_BUDGET
+  literals: string[];            // substrings every match contains
+  prefilter: "trigram_index" | null;
+  skipped_columns: string[];     // proved not to match by the column profile
+  steps: PlanStep[];
+  cells: number;
+  issues: string[];
+  estimate: PlanEstimate;
+  sheet?: string;                // workbooks with several sheets
+}
+
+// 10.5 Response
+export interface ExplainTasksResponse {
+  message: string;                // "Plan computed."
+  plans: TaskPlan[];              // one per task, in order
+  total_cells: number;
+  estimated_ms: number | null;    // null when a sample timed out
+  invalid_tasks: number;
+  issues: { task: BackendRegexTask; issue: string }[];
+  versions: Record<string, string>; // {sheet: version} the plans were computed on
 }